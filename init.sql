@@ -14,49 +14,11 @@ CREATE TABLE IF NOT EXISTS items (
     quality VARCHAR(10) NOT NULL
 );
 
--- Create EU commodity price stats table
-CREATE TABLE IF NOT EXISTS eu_commodity_price_stats (
-    item_id INTEGER NOT NULL,
-    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    min_price BIGINT,
-    max_price BIGINT,
-    mean_price DOUBLE PRECISION,
-    median_price DOUBLE PRECISION,
-    total_quantity BIGINT,
-    num_auctions INTEGER,
-    estimated_sales INTEGER,
-    new_listings INTEGER,
-    PRIMARY KEY (item_id, timestamp)
-) PARTITION BY RANGE (timestamp);
-
--- Create US commodity price stats table
-CREATE TABLE IF NOT EXISTS us_commodity_price_stats (
-    item_id INTEGER NOT NULL,
-    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    min_price BIGINT,
-    max_price BIGINT,
-    mean_price DOUBLE PRECISION,
-    median_price DOUBLE PRECISION,
-    total_quantity BIGINT,
-    num_auctions INTEGER,
-    estimated_sales INTEGER,
-    new_listings INTEGER,
-    PRIMARY KEY (item_id, timestamp)
-) PARTITION BY RANGE (timestamp);
-
--- Create EU token price table
-CREATE TABLE IF NOT EXISTS eu_token_price (
-    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    price BIGINT NOT NULL,
-    PRIMARY KEY (timestamp)
-) PARTITION BY RANGE (timestamp);
-
--- Create US token price table
-CREATE TABLE IF NOT EXISTS us_token_price (
-    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    price BIGINT NOT NULL,
-    PRIMARY KEY (timestamp)
-) PARTITION BY RANGE (timestamp);
+-- Create regions table (regions whose market tables have been created)
+CREATE TABLE IF NOT EXISTS regions (
+    code VARCHAR(2) NOT NULL PRIMARY KEY,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
 
 -- Create recipes table
 CREATE TABLE IF NOT EXISTS recipes (
@@ -88,10 +50,14 @@ CREATE TABLE IF NOT EXISTS seeder_status (
     seeder_type VARCHAR(50) PRIMARY KEY,
     completed BOOLEAN NOT NULL DEFAULT FALSE,
     completed_at TIMESTAMP,
+    progress JSON,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Column added after the table was first created
+ALTER TABLE seeder_status ADD COLUMN IF NOT EXISTS progress JSON;
+
 -- Create scraper_logs table
 CREATE TABLE IF NOT EXISTS scraper_logs (
     id SERIAL PRIMARY KEY,
@@ -119,27 +85,165 @@ CREATE TABLE IF NOT EXISTS benchmarks (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Create partitioned auction_snapshots_eu table
-CREATE TABLE IF NOT EXISTS auction_snapshots_eu (
-    auction_id BIGINT NOT NULL,
+-- Create snapshot_catalog table (one row per committed snapshot per region)
+CREATE TABLE IF NOT EXISTS snapshot_catalog (
+    region VARCHAR(2) NOT NULL,
+    snapshot_time TIMESTAMP NOT NULL,
+    last_modified TIMESTAMP,
+    row_count INTEGER NOT NULL,
+    item_count INTEGER NOT NULL,
+    ingest_duration_seconds REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (region, snapshot_time)
+);
+
+-- Create latest_commodity_prices table (current market per region and item, updated in place)
+CREATE TABLE IF NOT EXISTS latest_commodity_prices (
+    region VARCHAR(2) NOT NULL,
     item_id INTEGER NOT NULL,
-    unit_price BIGINT NOT NULL,
-    quantity INTEGER NOT NULL,
-    time_left VARCHAR(1) NOT NULL,
     snapshot_time TIMESTAMP NOT NULL,
-    PRIMARY KEY (auction_id, snapshot_time)
-) PARTITION BY RANGE (snapshot_time);
+    min_price BIGINT,
+    max_price BIGINT,
+    mean_price DOUBLE PRECISION,
+    median_price DOUBLE PRECISION,
+    total_quantity BIGINT,
+    num_auctions INTEGER,
+    estimated_sales INTEGER,
+    estimated_relisted INTEGER,
+    estimated_expired INTEGER,
+    new_listings INTEGER,
+    previous_snapshot_time TIMESTAMP,
+    previous_min_price BIGINT,
+    previous_median_price DOUBLE PRECISION,
+    previous_total_quantity BIGINT,
+    previous_estimated_sales INTEGER,
+    min_price_change BIGINT,
+    median_price_change DOUBLE PRECISION,
+    total_quantity_change BIGINT,
+    PRIMARY KEY (region, item_id)
+);
+
+-- Create recipe_profits table (crafting profit of every recipe, rewritten each cycle)
+CREATE TABLE IF NOT EXISTS recipe_profits (
+    region VARCHAR(2) NOT NULL,
+    price_basis VARCHAR(10) NOT NULL,
+    recipe_id INTEGER NOT NULL,
+    faction VARCHAR(8) NOT NULL,
+    crafted_item_id INTEGER,
+    reagent_cost DOUBLE PRECISION,
+    crafted_price DOUBLE PRECISION,
+    profit DOUBLE PRECISION,
+    margin DOUBLE PRECISION,
+    missing_reagents INTEGER NOT NULL,
+    computed_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (region, price_basis, recipe_id, faction)
+);
+
+-- Create market_indicators table (running indicator state per region and item, updated in place)
+CREATE TABLE IF NOT EXISTS market_indicators (
+    region VARCHAR(2) NOT NULL,
+    item_id INTEGER NOT NULL,
+    updated_at TIMESTAMP NOT NULL,
+    observations INTEGER NOT NULL,
+    price_ema_short DOUBLE PRECISION,
+    price_ema_medium DOUBLE PRECISION,
+    price_ema_long DOUBLE PRECISION,
+    price_mean DOUBLE PRECISION,
+    price_m2 DOUBLE PRECISION,
+    price_ew_mean DOUBLE PRECISION,
+    price_ew_variance DOUBLE PRECISION,
+    quantity_ema DOUBLE PRECISION,
+    quantity_ew_variance DOUBLE PRECISION,
+    sales_ew_mean DOUBLE PRECISION,
+    sales_ew_variance DOUBLE PRECISION,
+    sales_velocity_short DOUBLE PRECISION,
+    sales_velocity_long DOUBLE PRECISION,
+    PRIMARY KEY (region, item_id)
+);
+
+-- Create arbitrage_opportunities table (cross-region spreads in WoW Token units, rewritten each cycle)
+CREATE TABLE IF NOT EXISTS arbitrage_opportunities (
+    buy_region VARCHAR(2) NOT NULL,
+    sell_region VARCHAR(2) NOT NULL,
+    item_id INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    buy_price BIGINT NOT NULL,
+    sell_price BIGINT NOT NULL,
+    buy_price_tokens DOUBLE PRECISION NOT NULL,
+    sell_price_tokens DOUBLE PRECISION NOT NULL,
+    spread_tokens DOUBLE PRECISION NOT NULL,
+    spread_pct DOUBLE PRECISION NOT NULL,
+    available_quantity BIGINT,
+    sell_volume INTEGER,
+    tradable_quantity BIGINT,
+    score DOUBLE PRECISION NOT NULL,
+    computed_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (buy_region, sell_region, item_id)
+);
+
+-- Create arbitrage_scans table (snapshot of each region the last arbitrage scan used)
+CREATE TABLE IF NOT EXISTS arbitrage_scans (
+    region VARCHAR(2) PRIMARY KEY,
+    snapshot_time TIMESTAMP NOT NULL,
+    scanned_at TIMESTAMP NOT NULL
+);
 
--- Create partitioned auction_snapshots_us table
-CREATE TABLE IF NOT EXISTS auction_snapshots_us (
-    auction_id BIGINT NOT NULL,
+-- Create market_events table (anomalies flagged by the streaming detector)
+CREATE TABLE IF NOT EXISTS market_events (
+    id SERIAL PRIMARY KEY,
+    region VARCHAR(2) NOT NULL,
     item_id INTEGER NOT NULL,
-    unit_price BIGINT NOT NULL,
-    quantity INTEGER NOT NULL,
-    time_left VARCHAR(1) NOT NULL,
     snapshot_time TIMESTAMP NOT NULL,
-    PRIMARY KEY (auction_id, snapshot_time)
-) PARTITION BY RANGE (snapshot_time);
+    event_type VARCHAR(20) NOT NULL,
+    severity DOUBLE PRECISION NOT NULL,
+    level VARCHAR(10) NOT NULL,
+    observed_value DOUBLE PRECISION,
+    expected_value DOUBLE PRECISION,
+    zscore DOUBLE PRECISION,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_market_events_region_time ON market_events(region, snapshot_time DESC);
+CREATE INDEX IF NOT EXISTS idx_market_events_item ON market_events(region, item_id, snapshot_time DESC);
+
+-- Create scheduler_leases table (time-limited ownership of scheduler work across replicas)
+CREATE TABLE IF NOT EXISTS scheduler_leases (
+    name VARCHAR(100) PRIMARY KEY,
+    holder VARCHAR(100) NOT NULL,
+    acquired_at TIMESTAMP NOT NULL,
+    renewed_at TIMESTAMP NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- Create jobs table (durable queue for background work run by job workers)
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    job_type VARCHAR(50) NOT NULL,
+    payload JSON NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 100,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    dedupe_key VARCHAR(200),
+    run_after TIMESTAMP NOT NULL,
+    locked_by VARCHAR(100),
+    lease_expires_at TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_queued ON jobs(priority, run_after, id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_jobs_running_lease ON jobs(lease_expires_at) WHERE status = 'running';
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(dedupe_key) WHERE status = 'queued';
+
+-- Create api_budget table (Blizzard API token bucket shared by every process)
+CREATE TABLE IF NOT EXISTS api_budget (
+    name VARCHAR(50) PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    refilled_at TIMESTAMP NOT NULL
+);
 
 -- Function to create partition for a given table and date range
 CREATE OR REPLACE FUNCTION create_partition(
@@ -159,8 +263,9 @@ BEGIN
         EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (snapshot_time)', 
                        partition_name || '_time_idx', partition_name);
     ELSIF parent_table LIKE '%commodity_price_stats%' THEN
-        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (item_id, timestamp)', 
-                       partition_name || '_item_time_idx', partition_name);
+        -- Covering index so per-item history reads are index-only scans
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (item_id, timestamp) INCLUDE (min_price, max_price, mean_price, median_price, total_quantity, num_auctions, estimated_sales, new_listings)', 
+                       partition_name || '_item_history_idx', partition_name);
         EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (timestamp)', 
                        partition_name || '_time_idx', partition_name);
     ELSIF parent_table LIKE '%token_price%' THEN
@@ -170,8 +275,11 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Function to create partitions for the next N months
-CREATE OR REPLACE FUNCTION create_monthly_partitions(months_ahead INTEGER DEFAULT 6) RETURNS VOID AS $$
+-- Function to create one region's partitions for the next N months
+CREATE OR REPLACE FUNCTION create_region_partitions(
+    region TEXT,
+    months_ahead INTEGER DEFAULT 6
+) RETURNS VOID AS $$
 DECLARE
     current_month DATE;
     next_month DATE;
@@ -185,23 +293,85 @@ BEGIN
         next_month := current_month + INTERVAL '1 month';
         partition_suffix := to_char(current_month, 'YYYY_MM');
         
-        -- Create partitions for regional auction snapshot tables
-        PERFORM create_partition('auction_snapshots_eu', 'auction_snapshots_eu_' || partition_suffix, current_month, next_month);
-        PERFORM create_partition('auction_snapshots_us', 'auction_snapshots_us_' || partition_suffix, current_month, next_month);
-        
-        -- Create partitions for regional commodity price stats tables
-        PERFORM create_partition('eu_commodity_price_stats', 'eu_commodity_price_stats_' || partition_suffix, current_month, next_month);
-        PERFORM create_partition('us_commodity_price_stats', 'us_commodity_price_stats_' || partition_suffix, current_month, next_month);
-        
-        -- Create partitions for regional token price tables
-        PERFORM create_partition('eu_token_price', 'eu_token_price_' || partition_suffix, current_month, next_month);
-        PERFORM create_partition('us_token_price', 'us_token_price_' || partition_suffix, current_month, next_month);
+        PERFORM create_partition('auction_snapshots_' || region, 'auction_snapshots_' || region || '_' || partition_suffix, current_month, next_month);
+        PERFORM create_partition(region || '_commodity_price_stats', region || '_commodity_price_stats_' || partition_suffix, current_month, next_month);
+        PERFORM create_partition(region || '_token_price', region || '_token_price_' || partition_suffix, current_month, next_month);
         
         current_month := next_month;
     END LOOP;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Function to create partitions for every registered region for the next N months
+CREATE OR REPLACE FUNCTION create_monthly_partitions(months_ahead INTEGER DEFAULT 6) RETURNS VOID AS $$
+DECLARE
+    region_code TEXT;
+BEGIN
+    FOR region_code IN SELECT code FROM regions ORDER BY code LOOP
+        PERFORM create_region_partitions(region_code, months_ahead);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to create a region's partitioned market tables and register the region
+CREATE OR REPLACE FUNCTION create_region_tables(region TEXT) RETURNS VOID AS $$
+BEGIN
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I (
+        auction_id BIGINT NOT NULL,
+        item_id INTEGER NOT NULL,
+        unit_price BIGINT NOT NULL,
+        quantity INTEGER NOT NULL,
+        time_left VARCHAR(1) NOT NULL,
+        snapshot_time TIMESTAMP NOT NULL,
+        PRIMARY KEY (auction_id, snapshot_time)
+    ) PARTITION BY RANGE (snapshot_time)', 'auction_snapshots_' || region);
+
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I (
+        item_id INTEGER NOT NULL,
+        timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        min_price BIGINT,
+        max_price BIGINT,
+        mean_price DOUBLE PRECISION,
+        median_price DOUBLE PRECISION,
+        total_quantity BIGINT,
+        num_auctions INTEGER,
+        estimated_sales INTEGER,
+        estimated_relisted INTEGER,
+        estimated_expired INTEGER,
+        new_listings INTEGER,
+        price_sketch BYTEA,
+        PRIMARY KEY (item_id, timestamp)
+    ) PARTITION BY RANGE (timestamp)', region || '_commodity_price_stats');
+
+    -- Columns added after the table was first created
+    EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS estimated_relisted INTEGER,
+                                   ADD COLUMN IF NOT EXISTS estimated_expired INTEGER,
+                                   ADD COLUMN IF NOT EXISTS price_sketch BYTEA',
+                   region || '_commodity_price_stats');
+
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I (
+        timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        price BIGINT NOT NULL,
+        PRIMARY KEY (timestamp)
+    ) PARTITION BY RANGE (timestamp)', region || '_token_price');
+
+    -- Catalog snapshots ingested before snapshot_catalog existed. Only times older
+    -- than the region's first catalog entry are scanned, so once backfilled this
+    -- is an index probe
+    EXECUTE format('INSERT INTO snapshot_catalog (region, snapshot_time, row_count, item_count)
+        SELECT %L, snapshot_time, count(*), count(DISTINCT item_id)
+        FROM %I
+        WHERE snapshot_time < (SELECT coalesce(min(snapshot_time), ''infinity'')
+                               FROM snapshot_catalog WHERE region = %L)
+        GROUP BY snapshot_time
+        ON CONFLICT DO NOTHING', region, 'auction_snapshots_' || region, region);
+
+    INSERT INTO regions (code) VALUES (region) ON CONFLICT DO NOTHING;
+
+    PERFORM create_region_partitions(region, 6);
+END;
+$$ LANGUAGE plpgsql;
+
 -- Function to check and create future partitions if needed
 CREATE OR REPLACE FUNCTION ensure_future_partitions() RETURNS VOID AS $$
 DECLARE
@@ -213,12 +383,9 @@ BEGIN
     FROM pg_constraint c
     JOIN pg_class t ON c.conrelid = t.oid
     LEFT JOIN LATERAL regexp_matches(pg_get_expr(c.conbin, c.conrelid), 'TO \(''([^'']+)''.*\)') AS matches ON true
-    WHERE (t.relname LIKE '%auction_snapshots_eu%' 
-           OR t.relname LIKE '%auction_snapshots_us%'
-           OR t.relname LIKE '%eu_commodity_price_stats%'
-           OR t.relname LIKE '%us_commodity_price_stats%'
-           OR t.relname LIKE '%eu_token_price%'
-           OR t.relname LIKE '%us_token_price%')
+    WHERE (t.relname LIKE 'auction_snapshots_%' 
+           OR t.relname LIKE '%_commodity_price_stats%'
+           OR t.relname LIKE '%_token_price%')
     AND c.contype = 'c'
     AND pg_get_expr(c.conbin, c.conrelid) LIKE '%FOR VALUES FROM%'
     AND matches IS NOT NULL;
@@ -230,8 +397,10 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Create initial partitions for the next 6 months
-SELECT create_monthly_partitions(6);
+-- Create the default regions' tables and their partitions for the next 6 months
+-- (further regions are added by the scheduler via create_region_tables)
+SELECT create_region_tables('eu');
+SELECT create_region_tables('us');
 
 -- Create indexes on non-partitioned tables
 CREATE INDEX IF NOT EXISTS idx_recipes_profession ON recipes(profession);
@@ -244,6 +413,8 @@ CREATE INDEX IF NOT EXISTS idx_reagents_item_id ON reagents(item_id);
 CREATE INDEX IF NOT EXISTS idx_scraper_logs_region_timestamp ON scraper_logs(region, timestamp);
 CREATE INDEX IF NOT EXISTS idx_scraper_logs_status ON scraper_logs(status);
 
+CREATE INDEX IF NOT EXISTS idx_recipe_profits_profit ON recipe_profits(region, price_basis, profit DESC NULLS LAST);
+
 -- Create a view to easily check partition information
 CREATE OR REPLACE VIEW partition_info AS
 SELECT 
@@ -0,0 +1,177 @@
+"""
+Streaming market anomaly detector.
+
+Buyouts, resets and supply dumps show up as a sudden move in an item's min
+price, estimated sales or listed quantity. The detector scores each new
+stats row against the item's indicator state from before the snapshot (the
+exponentially weighted mean and variance of each series kept in
+market_indicators), so it needs no history and costs O(1) per item.
+
+Event types:
+- price_spike / price_drop: min price far above / below its mean
+- sales_spike: estimated sales far above their mean
+- supply_drop / supply_flood: listed quantity far below / above its mean
+- reset: a price spike together with a sales spike, i.e. the cheap end of
+  the book was bought out and relisted higher
+"""
+
+import math
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from analytics.indicators import zscore
+from models.models import MarketEvent
+
+# Observations an item needs before its distribution summaries are trusted
+MIN_OBSERVATIONS = 6
+
+# Absolute z-score at or above which each severity level starts
+SEVERITY_LEVELS = (
+    (8.0, "high"),
+    (5.0, "medium"),
+    (3.0, "low"),
+)
+
+
+def severity_level(score: float) -> str | None:
+    """Name of the severity level for an absolute z-score, or None below the lowest."""
+    for threshold, level in SEVERITY_LEVELS:
+        if score >= threshold:
+            return level
+    return None
+
+
+class AnomalyDetector:
+    """Flags anomalous per-item changes in a snapshot against their running summaries."""
+
+    def __init__(self, min_observations: int = MIN_OBSERVATIONS):
+        self.min_observations = min_observations
+
+    def _event(
+        self,
+        item_id: int,
+        snapshot_time: datetime,
+        event_type: str,
+        z: float,
+        observed: float,
+        expected: float | None,
+    ) -> dict[str, Any] | None:
+        level = severity_level(abs(z))
+        if level is None:
+            return None
+        return {
+            "item_id": item_id,
+            "snapshot_time": snapshot_time,
+            "event_type": event_type,
+            "severity": abs(z),
+            "level": level,
+            "observed_value": observed,
+            "expected_value": expected,
+            "zscore": z,
+        }
+
+    def detect(
+        self, state: dict[str, Any] | None, row: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        """Score one stats row against the item's indicator state before it.
+
+        Args:
+            state: Indicator state the row is being folded into
+            row: Commodity stats row of the new snapshot
+
+        Returns:
+            Event rows (without region); empty when nothing is anomalous
+        """
+        if state is None or state["observations"] < self.min_observations:
+            return []
+
+        item_id = row["item_id"]
+        snapshot_time = row["timestamp"].replace(tzinfo=None)
+        events = []
+
+        price_event = None
+        price = row.get("min_price")
+        if price is not None:
+            z = zscore(state["price_ew_mean"], state["price_ew_variance"], price)
+            if z is not None:
+                price_event = self._event(
+                    item_id,
+                    snapshot_time,
+                    "price_spike" if z > 0 else "price_drop",
+                    z,
+                    price,
+                    state["price_ew_mean"],
+                )
+
+        sales_event = None
+        sales = row.get("estimated_sales") or 0
+        z = zscore(state["sales_ew_mean"], state["sales_ew_variance"], sales)
+        if z is not None and z > 0:
+            sales_event = self._event(
+                item_id, snapshot_time, "sales_spike", z, sales, state["sales_ew_mean"]
+            )
+
+        if (
+            price_event is not None
+            and sales_event is not None
+            and price_event["event_type"] == "price_spike"
+        ):
+            z = max(price_event["zscore"], sales_event["zscore"])
+            events.append(
+                {
+                    **price_event,
+                    "event_type": "reset",
+                    "severity": z,
+                    "level": severity_level(z),
+                }
+            )
+        else:
+            events.extend(event for event in (price_event, sales_event) if event)
+
+        quantity = row.get("total_quantity") or 0
+        z = zscore(state["quantity_ema"], state["quantity_ew_variance"], quantity)
+        if z is not None:
+            supply_event = self._event(
+                item_id,
+                snapshot_time,
+                "supply_flood" if z > 0 else "supply_drop",
+                z,
+                quantity,
+                state["quantity_ema"],
+            )
+            if supply_event:
+                events.append(supply_event)
+
+        return events
+
+    def process(
+        self,
+        session: Session,
+        region: str,
+        stats_values: Iterable[dict[str, Any]],
+        previous_states: dict[int, dict[str, Any] | None],
+    ) -> int:
+        """Detect and store events for one snapshot of a region (no commit).
+
+        Args:
+            session: Database session
+            region: Region code
+            stats_values: Commodity stats rows of the snapshot
+            previous_states: Item ID -> indicator state before the snapshot
+
+        Returns:
+            Number of events written
+        """
+        events = []
+        for row in stats_values:
+            for event in self.detect(previous_states.get(row["item_id"]), row):
+                if math.isfinite(event["severity"]):
+                    events.append({"region": region, **event})
+
+        table = MarketEvent.__table__
+        for i in range(0, len(events), 2000):
+            session.execute(table.insert(), events[i : i + 2000])
+        return len(events)
@@ -0,0 +1,221 @@
+"""
+Cross-region arbitrage scanner.
+
+Gold is not comparable across regions, but the WoW Token has a fixed
+real-money price everywhere, so dividing a region's gold prices by its
+current token price puts every region in the same unit (tokens). After a
+collection cycle the latest prices of all regions are loaded as columns,
+aligned on the items every region lists, and each ordered region pair is
+scored in one pass over the aligned arrays:
+
+    spread = sell_tokens * (1 - AH cut) - buy_tokens
+    score  = spread * min(listed quantity in the buy region,
+                          estimated sales in the sell region)
+
+Positive spreads are ranked per pair and written to arbitrage_opportunities.
+
+Regions publish at different times, so a scan is only run once every
+region has committed a snapshot newer than the one the previous scan used
+(recorded in arbitrage_scans, even when a scan finds nothing); a region
+that finishes first never has its fresh prices paired with last hour's
+prices of another.
+"""
+
+import logging
+from array import array
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from itertools import permutations
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from analytics.profit_engine import AUCTION_HOUSE_CUT
+from models.models import ArbitrageOpportunity, ArbitrageScan, LatestCommodityPrice
+from repository.snapshot_catalog_repository import SnapshotCatalogRepository
+from repository.token_repository import TokenPriceRepository
+
+MAX_OPPORTUNITIES_PER_PAIR = 500
+
+
+class ArbitrageScanner:
+    """Ranks items by their token-normalized price spread between regions."""
+
+    def __init__(
+        self,
+        auction_house_cut: float = AUCTION_HOUSE_CUT,
+        max_per_pair: int = MAX_OPPORTUNITIES_PER_PAIR,
+    ):
+        self.auction_house_cut = auction_house_cut
+        self.max_per_pair = max_per_pair
+        self.logger = logging.getLogger(__name__)
+
+    def _load_columns(
+        self, session: Session, regions: Sequence[str]
+    ) -> tuple[list[int], dict[str, tuple[array, array, array]]]:
+        """Load (min_price, total_quantity, estimated_sales) of each region,
+        aligned on the items that are priced in every region."""
+        rows_by_region = {}
+        for region in regions:
+            rows_by_region[region] = {
+                item_id: (min_price, quantity, sales)
+                for item_id, min_price, quantity, sales in session.query(
+                    LatestCommodityPrice.item_id,
+                    LatestCommodityPrice.min_price,
+                    LatestCommodityPrice.total_quantity,
+                    LatestCommodityPrice.estimated_sales,
+                )
+                .filter(
+                    LatestCommodityPrice.region == region,
+                    LatestCommodityPrice.min_price.isnot(None),
+                )
+                .all()
+            }
+
+        item_ids = sorted(set.intersection(*(set(rows) for rows in rows_by_region.values())))
+        columns = {}
+        for region, rows in rows_by_region.items():
+            aligned = [rows[item_id] for item_id in item_ids]
+            columns[region] = (
+                array("q", (row[0] for row in aligned)),
+                array("q", (row[1] or 0 for row in aligned)),
+                array("q", (row[2] or 0 for row in aligned)),
+            )
+        return item_ids, columns
+
+    def _latest_snapshots(
+        self, session: Session, regions: Sequence[str]
+    ) -> dict[str, datetime | None]:
+        catalog = SnapshotCatalogRepository(session)
+        snapshots = {}
+        for region in regions:
+            latest = catalog.get_latest(region)
+            snapshots[region] = latest.snapshot_time if latest is not None else None
+        return snapshots
+
+    def _behind(
+        self, session: Session, latest: dict[str, datetime | None]
+    ) -> list[str]:
+        scanned = dict(
+            session.query(ArbitrageScan.region, ArbitrageScan.snapshot_time)
+            .filter(ArbitrageScan.region.in_(list(latest)))
+            .all()
+        )
+        return [
+            region
+            for region, snapshot_time in latest.items()
+            if snapshot_time is None
+            or (region in scanned and snapshot_time <= scanned[region])
+        ]
+
+    def regions_behind(self, session: Session, regions: Sequence[str]) -> list[str]:
+        """Regions without a snapshot newer than the one the last scan used."""
+        return self._behind(session, self._latest_snapshots(session, regions))
+
+    def _record_scan(
+        self, session: Session, latest: dict[str, datetime | None], scanned_at: datetime
+    ) -> None:
+        table = ArbitrageScan.__table__
+        stmt = insert(table).values(
+            [
+                {"region": region, "snapshot_time": snapshot_time, "scanned_at": scanned_at}
+                for region, snapshot_time in latest.items()
+            ]
+        )
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.region],
+                set_={
+                    "snapshot_time": stmt.excluded.snapshot_time,
+                    "scanned_at": stmt.excluded.scanned_at,
+                },
+            )
+        )
+
+    def scan(self, session: Session, regions: Sequence[str]) -> int:
+        """Recompute and store opportunities for every ordered region pair (no commit).
+
+        Args:
+            session: Database session
+            regions: Regions to compare; regions without a token price are skipped.
+                Nothing is scanned until all of them have a snapshot newer than
+                the previous scan.
+
+        Returns:
+            Number of opportunities written
+        """
+        token_prices = {}
+        for region in regions:
+            latest = TokenPriceRepository(session, region).get_latest()
+            if latest is not None and latest.price > 0:
+                token_prices[region] = latest.price
+        regions = [region for region in regions if region in token_prices]
+        if len(regions) < 2:
+            self.logger.info("Arbitrage scan needs token prices for at least two regions")
+            return 0
+        latest = self._latest_snapshots(session, regions)
+        behind = self._behind(session, latest)
+        if behind:
+            self.logger.info(
+                f"Arbitrage scan waiting for {', '.join(behind).upper()} to finish the cycle"
+            )
+            return 0
+
+        item_ids, columns = self._load_columns(session, regions)
+        keep = 1.0 - self.auction_house_cut
+        computed_at = datetime.now(UTC).replace(tzinfo=None)
+
+        rows = []
+        for buy_region, sell_region in permutations(regions, 2):
+            buy_prices, buy_quantities, _ = columns[buy_region]
+            sell_prices, _, sell_sales = columns[sell_region]
+            buy_token = token_prices[buy_region]
+            sell_token = token_prices[sell_region]
+
+            pair_rows = []
+            for i, item_id in enumerate(item_ids):
+                buy_tokens = buy_prices[i] / buy_token
+                sell_tokens = sell_prices[i] / sell_token
+                spread = sell_tokens * keep - buy_tokens
+                if spread <= 0:
+                    continue
+                tradable = min(buy_quantities[i], sell_sales[i])
+                pair_rows.append(
+                    {
+                        "buy_region": buy_region,
+                        "sell_region": sell_region,
+                        "item_id": item_id,
+                        "buy_price": buy_prices[i],
+                        "sell_price": sell_prices[i],
+                        "buy_price_tokens": buy_tokens,
+                        "sell_price_tokens": sell_tokens,
+                        "spread_tokens": spread,
+                        "spread_pct": spread / buy_tokens,
+                        "available_quantity": buy_quantities[i],
+                        "sell_volume": sell_sales[i],
+                        "tradable_quantity": tradable,
+                        "score": spread * tradable,
+                        "computed_at": computed_at,
+                    }
+                )
+
+            # Rank by score, then by relative spread among untradable items
+            pair_rows.sort(key=lambda row: (row["score"], row["spread_pct"]), reverse=True)
+            for rank, row in enumerate(pair_rows[: self.max_per_pair], start=1):
+                row["rank"] = rank
+                rows.append(row)
+
+        table = ArbitrageOpportunity.__table__
+        session.execute(
+            table.delete().where(
+                table.c.buy_region.in_(regions), table.c.sell_region.in_(regions)
+            )
+        )
+        for i in range(0, len(rows), 2000):
+            session.execute(table.insert(), rows[i : i + 2000])
+        self._record_scan(session, latest, computed_at)
+
+        self.logger.info(
+            f"Arbitrage scan over {len(item_ids)} shared items found {len(rows)} opportunities"
+        )
+        return len(rows)
@@ -0,0 +1,184 @@
+"""
+Recursive crafting-tree cost resolution.
+
+Many reagents are themselves crafted, so the true cost of an item is
+min(buy it, craft it) applied recursively down the tree. The recipes form
+a graph with an edge from each reagent to the item its recipe crafts;
+ordering the items topologically once means every item's cheapest
+acquisition cost can be evaluated in a single pass per collection cycle,
+each item reusing the already-memoized costs of its reagents.
+
+Items on a recipe cycle (A crafts B, B crafts A) have no topological
+position. They are detected up front as strongly connected components;
+inside a component, other members count at their buy price, so crafting
+is only ever one step deep around a cycle.
+"""
+
+import logging
+import math
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from analytics.profit_engine import RecipeMatrix
+
+
+@dataclass(frozen=True)
+class ItemCost:
+    """Cheapest way to acquire one unit of an item"""
+
+    item_id: int
+    cost: float  # NaN when the item can be neither bought nor crafted
+    method: str  # 'buy', 'craft' or 'unavailable'
+    recipe_key: tuple[int, str] | None = None  # Recipe used when crafted
+
+
+class CraftingTree:
+    """Crafting DAG over a recipe matrix with cycle detection."""
+
+    def __init__(self, matrix: "RecipeMatrix"):
+        self.matrix = matrix
+        self.logger = logging.getLogger(__name__)
+
+        # Recipe rows producing each crafted item
+        self.producers: dict[int, list[int]] = {}
+        for row, crafted_item_id in enumerate(matrix.crafted_item_ids):
+            if crafted_item_id is not None:
+                self.producers.setdefault(crafted_item_id, []).append(row)
+
+        self.order, self.cyclic_items = self._topological_order()
+        if self.cyclic_items:
+            self.logger.info(
+                f"{len(self.cyclic_items)} crafted items are on recipe cycles; "
+                "their reagent cost uses the buy price"
+            )
+
+    def _reagent_items(self, row: int) -> list[int]:
+        matrix = self.matrix
+        return [
+            matrix.item_ids[matrix.column_indices[k]]
+            for k in range(matrix.row_offsets[row], matrix.row_offsets[row + 1])
+        ]
+
+    def _topological_order(self) -> tuple[list[list[int]], set[int]]:
+        """Strongly connected components of the item graph in topological order.
+
+        Uses an iterative Tarjan pass, which emits every component after the
+        components it feeds into; reversing that gives reagents before the
+        items crafted from them. Components with more than one item, or an
+        item that is its own reagent, are the recipe cycles.
+        """
+        dependents: dict[int, set[int]] = {}
+        for crafted_item_id, rows in self.producers.items():
+            for row in rows:
+                for reagent in self._reagent_items(row):
+                    dependents.setdefault(reagent, set()).add(crafted_item_id)
+
+        index_of: dict[int, int] = {}
+        lowlink: dict[int, int] = {}
+        stack: list[int] = []
+        on_stack: set[int] = set()
+        components: list[list[int]] = []
+
+        for root in set(self.producers) | set(self.matrix.item_ids):
+            if root in index_of:
+                continue
+            work = [(root, iter(dependents.get(root, ())))]
+            index_of[root] = lowlink[root] = len(index_of)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                item, successors = work[-1]
+                for successor in successors:
+                    if successor not in index_of:
+                        index_of[successor] = lowlink[successor] = len(index_of)
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(dependents.get(successor, ()))))
+                        break
+                    if successor in on_stack:
+                        lowlink[item] = min(lowlink[item], index_of[successor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[item])
+                    if lowlink[item] == index_of[item]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == item:
+                                break
+                        components.append(component)
+
+        components.reverse()
+        cyclic_items = {
+            item
+            for component in components
+            if len(component) > 1 or component[0] in dependents.get(component[0], ())
+            for item in component
+        }
+        return components, cyclic_items
+
+    def _craft_cost(
+        self, row: int, costs: Mapping[int, ItemCost], buy_prices: Mapping[int, float]
+    ) -> float:
+        matrix = self.matrix
+        total = 0.0
+        for k in range(matrix.row_offsets[row], matrix.row_offsets[row + 1]):
+            item_id = matrix.item_ids[matrix.column_indices[k]]
+            resolved = costs.get(item_id)
+            unit_cost = (
+                resolved.cost
+                if resolved is not None
+                else buy_prices.get(item_id, math.nan)
+            )
+            total += matrix.quantities[k] * unit_cost
+        return total
+
+    def _resolve_item(
+        self, item_id: int, costs: Mapping[int, ItemCost], buy_prices: Mapping[int, float]
+    ) -> ItemCost:
+        best = ItemCost(item_id, buy_prices.get(item_id, math.nan), "buy")
+        if best.cost != best.cost:  # NaN
+            best = ItemCost(item_id, math.nan, "unavailable")
+
+        for row in self.producers.get(item_id, ()):
+            craft_cost = self._craft_cost(row, costs, buy_prices)
+            if craft_cost == craft_cost and not craft_cost >= best.cost:
+                best = ItemCost(item_id, craft_cost, "craft", self.matrix.recipe_keys[row])
+        return best
+
+    def resolve(self, buy_prices: Mapping[int, float]) -> dict[int, ItemCost]:
+        """Cheapest acquisition cost of every item in the tree.
+
+        Args:
+            buy_prices: Market price per unit of each item
+
+        Returns:
+            Dictionary mapping item ID to its ItemCost
+        """
+        costs: dict[int, ItemCost] = {}
+
+        for component in self.order:
+            if component[0] not in self.cyclic_items:
+                costs[component[0]] = self._resolve_item(component[0], costs, buy_prices)
+                continue
+
+            # Cycle members enter the memo at their buy price first, so a
+            # recipe consuming another member never recurses around the cycle
+            for item_id in component:
+                price = buy_prices.get(item_id, math.nan)
+                costs[item_id] = ItemCost(
+                    item_id, price, "buy" if price == price else "unavailable"
+                )
+            resolved = [
+                self._resolve_item(item_id, costs, buy_prices) for item_id in component
+            ]
+            for item_cost in resolved:
+                costs[item_cost.item_id] = item_cost
+
+        return costs
@@ -0,0 +1,214 @@
+"""
+Order-book depth index.
+
+Summary stats (min/median/mean) hide how expensive it is to actually buy a
+useful quantity of a commodity. Each fresh snapshot is turned into a depth
+index: per item, the distinct listed prices in ascending order alongside the
+cumulative quantity and cumulative cost up to and including each level.
+The cost of buying N units is then a binary search for the level that
+fills the N-th unit plus one multiply, independent of the number of
+listings.
+
+The latest index of each region is kept in memory by a DepthIndexStore, so
+analytics run after a collection can price against the full order book
+without re-reading the snapshot.
+"""
+
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(frozen=True)
+class DepthQuote:
+    """Result of walking an item's order book for a quantity"""
+
+    item_id: int
+    requested_quantity: int
+    filled_quantity: int  # Less than requested when the book runs out
+    total_cost: int  # Copper paid for the filled quantity
+    marginal_price: int | None  # Unit price of the last unit bought
+
+    @property
+    def average_price(self) -> float | None:
+        if not self.filled_quantity:
+            return None
+        return self.total_cost / self.filled_quantity
+
+    @property
+    def fully_filled(self) -> bool:
+        return self.filled_quantity >= self.requested_quantity
+
+
+@dataclass
+class ItemDepth:
+    """Sorted price levels of one item with cumulative quantity and cost."""
+
+    prices: array  # Ascending distinct unit prices
+    cumulative_quantity: array  # Units available at or below prices[i]
+    cumulative_cost: array  # Copper to buy all of them
+
+    @classmethod
+    def from_levels(cls, quantity_by_price: Mapping[int, int]) -> "ItemDepth":
+        prices = array("q", sorted(quantity_by_price))
+        cumulative_quantity = array("q")
+        cumulative_cost = array("q")
+        quantity_total = cost_total = 0
+        for price in prices:
+            quantity = quantity_by_price[price]
+            quantity_total += quantity
+            cost_total += quantity * price
+            cumulative_quantity.append(quantity_total)
+            cumulative_cost.append(cost_total)
+        return cls(prices, cumulative_quantity, cumulative_cost)
+
+    @property
+    def total_quantity(self) -> int:
+        return self.cumulative_quantity[-1] if self.cumulative_quantity else 0
+
+    def levels(self) -> Iterator[tuple[int, int]]:
+        """(unit price, quantity listed at that price) in ascending price order."""
+        previous = 0
+        for price, cumulative in zip(self.prices, self.cumulative_quantity, strict=True):
+            yield price, cumulative - previous
+            previous = cumulative
+
+    def quote(self, item_id: int, quantity: int) -> DepthQuote:
+        """Cost of buying the cheapest `quantity` units."""
+        if quantity <= 0 or not self.prices:
+            return DepthQuote(item_id, quantity, 0, 0, None)
+
+        if quantity >= self.total_quantity:
+            return DepthQuote(
+                item_id,
+                quantity,
+                self.total_quantity,
+                self.cumulative_cost[-1],
+                self.prices[-1],
+            )
+
+        # First level whose cumulative quantity covers the last unit
+        level = bisect_left(self.cumulative_quantity, quantity)
+        bought_before = self.cumulative_quantity[level - 1] if level else 0
+        cost_before = self.cumulative_cost[level - 1] if level else 0
+        price = self.prices[level]
+        return DepthQuote(
+            item_id,
+            quantity,
+            quantity,
+            cost_before + (quantity - bought_before) * price,
+            price,
+        )
+
+    def quantity_at_or_below(self, price: int) -> int:
+        """Units listed at or below a unit price."""
+        level = bisect_left(self.prices, price + 1)
+        return self.cumulative_quantity[level - 1] if level else 0
+
+
+class DepthIndex:
+    """Depth of every item in one snapshot."""
+
+    def __init__(self, depths: dict[int, ItemDepth], snapshot_time: datetime | None = None):
+        self.depths = depths
+        self.snapshot_time = snapshot_time
+
+    @classmethod
+    def from_auctions(
+        cls,
+        item_auctions: Mapping[int, Iterable[dict]],
+        snapshot_time: datetime | None = None,
+    ) -> "DepthIndex":
+        """Build the index from auctions grouped by item.
+
+        Args:
+            item_auctions: Item ID -> auction dictionaries containing
+                'unit_price' and 'quantity'
+            snapshot_time: Time of the snapshot the auctions came from
+        """
+        depths = {}
+        for item_id, auctions in item_auctions.items():
+            quantity_by_price: dict[int, int] = {}
+            for auction in auctions:
+                price = auction["unit_price"]
+                quantity_by_price[price] = (
+                    quantity_by_price.get(price, 0) + auction["quantity"]
+                )
+            depths[item_id] = ItemDepth.from_levels(quantity_by_price)
+        return cls(depths, snapshot_time)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self.depths
+
+    def __len__(self) -> int:
+        return len(self.depths)
+
+    def cost_to_buy(self, item_id: int, quantity: int) -> DepthQuote:
+        """Total cost and marginal price of buying `quantity` units of an item."""
+        depth = self.depths.get(item_id)
+        if depth is None:
+            return DepthQuote(item_id, quantity, 0, 0, None)
+        return depth.quote(item_id, quantity)
+
+    def cost_to_buy_many(self, quantities: Mapping[int, int]) -> dict[int, DepthQuote]:
+        """Quote many items at once.
+
+        Args:
+            quantities: Item ID -> units to buy
+
+        Returns:
+            Dictionary mapping item ID to its DepthQuote
+        """
+        depths = self.depths
+        quotes = {}
+        for item_id, quantity in quantities.items():
+            depth = depths.get(item_id)
+            quotes[item_id] = (
+                depth.quote(item_id, quantity)
+                if depth is not None
+                else DepthQuote(item_id, quantity, 0, 0, None)
+            )
+        return quotes
+
+    def average_price_map(self, quantities: Mapping[int, int]) -> dict[int, float]:
+        """Average unit price of buying the given quantities, for fully filled items only."""
+        return {
+            item_id: quote.average_price
+            for item_id, quote in self.cost_to_buy_many(quantities).items()
+            if quote.fully_filled and quote.filled_quantity
+        }
+
+
+class DepthIndexStore:
+    """Latest depth index per region, replaced atomically after each collection."""
+
+    def __init__(self):
+        self._indexes: dict[str, DepthIndex] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, region: str, index: DepthIndex) -> None:
+        with self._lock:
+            current = self._indexes.get(region)
+            if (
+                current is not None
+                and current.snapshot_time is not None
+                and index.snapshot_time is not None
+                and current.snapshot_time > index.snapshot_time
+            ):
+                return
+            self._indexes[region] = index
+
+    def get(self, region: str) -> DepthIndex | None:
+        with self._lock:
+            return self._indexes.get(region)
+
+
+_store = DepthIndexStore()
+
+
+def get_depth_store() -> DepthIndexStore:
+    """Get the process-wide depth index store."""
+    return _store
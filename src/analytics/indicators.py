@@ -0,0 +1,192 @@
+"""
+Incrementally maintained market indicators.
+
+Each (region, item) keeps a small running state in market_indicators that is
+folded forward with every new stats row, so moving averages, volatility and
+sales velocity are always current without re-reading price history:
+
+- time-decayed EMAs of the min price at several horizons; the weight of a
+  new observation is 1 - exp(-dt / horizon), so irregular collection gaps
+  decay the old value by the time that actually passed
+- Welford's running mean / sum of squared deviations of the min price
+- an exponentially weighted mean and variance at the long horizon, which
+  tracks recent volatility
+- EMAs of listed quantity and of estimated sales per hour
+- exponentially weighted mean and variance of listed quantity and of
+  estimated sales per snapshot, the distribution summaries the anomaly
+  detector scores new observations against
+
+Every update is O(1) per item.
+"""
+
+import math
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from repository.indicator_repository import IndicatorRepository
+
+# Horizons in hours
+SHORT_HORIZON_HOURS = 6.0
+MEDIUM_HORIZON_HOURS = 24.0
+LONG_HORIZON_HOURS = 168.0
+
+
+def decay_weight(elapsed_hours: float, horizon_hours: float) -> float:
+    """Weight of a new observation after elapsed_hours for a time-decayed EMA."""
+    if elapsed_hours <= 0:
+        return 0.0
+    return 1.0 - math.exp(-elapsed_hours / horizon_hours)
+
+
+def ema(previous: float | None, value: float, weight: float) -> float:
+    if previous is None:
+        return value
+    return previous + weight * (value - previous)
+
+
+def ew_update(
+    mean: float | None, variance: float | None, value: float, weight: float
+) -> tuple[float, float]:
+    """Exponentially weighted mean and variance after one observation."""
+    if mean is None:
+        return float(value), 0.0
+    delta = value - mean
+    increment = weight * delta
+    return mean + increment, (1 - weight) * ((variance or 0.0) + delta * increment)
+
+
+def welford_variance(state: dict[str, Any]) -> float | None:
+    """Sample variance of the min price over every observation."""
+    if state.get("observations", 0) < 2 or state.get("price_m2") is None:
+        return None
+    return state["price_m2"] / (state["observations"] - 1)
+
+
+def zscore(mean: float | None, variance: float | None, value: float) -> float | None:
+    """How many standard deviations a value is from a mean; None without spread."""
+    if mean is None or not variance or variance <= 0:
+        return None
+    return (value - mean) / math.sqrt(variance)
+
+
+def price_zscore(state: dict[str, Any], price: float) -> float | None:
+    """How many long-horizon standard deviations a price is from its EW mean."""
+    return zscore(state.get("price_ew_mean"), state.get("price_ew_variance"), price)
+
+
+def update_state(
+    state: dict[str, Any] | None, row: dict[str, Any]
+) -> dict[str, Any] | None:
+    """Fold one commodity stats row into an item's indicator state.
+
+    Args:
+        state: Current state (column values of market_indicators) or None
+        row: Stats row with item_id, timestamp, min_price, total_quantity and
+            estimated_sales
+
+    Returns:
+        The new state, or None when the row carries no price or is not newer
+        than the state
+    """
+    price = row.get("min_price")
+    timestamp: datetime = row["timestamp"].replace(tzinfo=None)
+    if price is None:
+        return None
+
+    quantity = row.get("total_quantity") or 0
+    sales = row.get("estimated_sales") or 0
+
+    if state is None:
+        return {
+            "item_id": row["item_id"],
+            "updated_at": timestamp,
+            "observations": 1,
+            "price_ema_short": float(price),
+            "price_ema_medium": float(price),
+            "price_ema_long": float(price),
+            "price_mean": float(price),
+            "price_m2": 0.0,
+            "price_ew_mean": float(price),
+            "price_ew_variance": 0.0,
+            "quantity_ema": float(quantity),
+            "quantity_ew_variance": 0.0,
+            "sales_ew_mean": None,
+            "sales_ew_variance": None,
+            # No previous snapshot, so no sales interval to measure yet
+            "sales_velocity_short": None,
+            "sales_velocity_long": None,
+        }
+
+    elapsed_hours = (timestamp - state["updated_at"]).total_seconds() / 3600
+    if elapsed_hours <= 0:
+        return None
+
+    short = decay_weight(elapsed_hours, SHORT_HORIZON_HOURS)
+    medium = decay_weight(elapsed_hours, MEDIUM_HORIZON_HOURS)
+    long = decay_weight(elapsed_hours, LONG_HORIZON_HOURS)
+
+    # Welford
+    observations = state["observations"] + 1
+    delta = price - state["price_mean"]
+    price_mean = state["price_mean"] + delta / observations
+    price_m2 = state["price_m2"] + delta * (price - price_mean)
+
+    price_ew_mean, price_ew_variance = ew_update(
+        state["price_ew_mean"], state["price_ew_variance"], price, long
+    )
+    quantity_ema, quantity_ew_variance = ew_update(
+        state["quantity_ema"], state["quantity_ew_variance"], quantity, medium
+    )
+    sales_ew_mean, sales_ew_variance = ew_update(
+        state["sales_ew_mean"], state["sales_ew_variance"], sales, medium
+    )
+
+    sales_per_hour = sales / elapsed_hours
+
+    return {
+        "item_id": row["item_id"],
+        "updated_at": timestamp,
+        "observations": observations,
+        "price_ema_short": ema(state["price_ema_short"], price, short),
+        "price_ema_medium": ema(state["price_ema_medium"], price, medium),
+        "price_ema_long": ema(state["price_ema_long"], price, long),
+        "price_mean": price_mean,
+        "price_m2": price_m2,
+        "price_ew_mean": price_ew_mean,
+        "price_ew_variance": price_ew_variance,
+        "quantity_ema": quantity_ema,
+        "quantity_ew_variance": quantity_ew_variance,
+        "sales_ew_mean": sales_ew_mean,
+        "sales_ew_variance": sales_ew_variance,
+        "sales_velocity_short": ema(state["sales_velocity_short"], sales_per_hour, short),
+        "sales_velocity_long": ema(state["sales_velocity_long"], sales_per_hour, long),
+    }
+
+
+class IndicatorEngine:
+    """Applies a snapshot's stats rows to the persisted indicator state."""
+
+    def update_region(
+        self, session: Session, region: str, stats_values: Iterable[dict[str, Any]]
+    ) -> list[tuple[dict[str, Any] | None, dict[str, Any]]]:
+        """Update every item's indicators from one snapshot (no commit).
+
+        Returns:
+            (previous state, new state) per updated item, for consumers that
+            compare an observation with the state it was folded into
+        """
+        repository = IndicatorRepository(session)
+        states = repository.get_states(region)
+
+        updates = []
+        for row in stats_values:
+            previous = states.get(row["item_id"])
+            new_state = update_state(previous, row)
+            if new_state is not None:
+                updates.append((previous, new_state))
+
+        repository.upsert_states(region, [new_state for _, new_state in updates])
+        return updates
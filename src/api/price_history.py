@@ -0,0 +1,382 @@
+"""
+Read API for per-item commodity price history.
+
+This module is framework agnostic: PriceHistoryService methods take plain
+arguments and return JSON-serialisable dictionaries, so a FastAPI app can
+expose them directly as route handlers, e.g.
+
+    service = PriceHistoryService()
+    service.start_invalidation_listener()
+
+    @app.get("/regions/{region}/items/{item_id}/history")
+    def item_history(region: str, item_id: int, start: datetime | None = None,
+                     end: datetime | None = None, after: datetime | None = None,
+                     limit: int = 500):
+        return service.get_item_history(region, item_id, start, end, after, limit)
+
+get_price_quantiles answers distribution questions over any window by
+merging the per-snapshot price sketches (see analytics.quantile_sketch),
+which keeps working after the raw auction partitions are dropped.
+
+Queries hit the covering (item_id, timestamp) index on each
+*_commodity_price_stats partition and paginate with a keyset cursor on
+timestamp, so every page is an index-only range scan regardless of how
+deep into the history it is. Results are kept in an in-process LRU cache
+that is invalidated when the collector commits a new snapshot (delivered
+through PostgreSQL NOTIFY on the SNAPSHOT_CHANNEL channel).
+"""
+
+import logging
+import select
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import text
+
+from analytics.quantile_sketch import merge_sketches
+from models.models import get_region_tables
+from repository.database import get_engine
+from repository.snapshot_catalog_repository import SNAPSHOT_CHANNEL
+
+HISTORY_COLUMNS = (
+    "min_price",
+    "max_price",
+    "mean_price",
+    "median_price",
+    "total_quantity",
+    "num_auctions",
+    "estimated_sales",
+    "new_listings",
+)
+
+MAX_PAGE_SIZE = 5000
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with predicate invalidation."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches the predicate and return the count."""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _to_naive_utc(value: datetime | None) -> datetime | None:
+    """Normalise a datetime to the naive UTC representation the tables use."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+class PriceHistoryService:
+    """Per-item and multi-item price history queries with caching."""
+
+    def __init__(self, engine=None, cache_size: int = 10000):
+        self.engine = engine or get_engine()
+        self.cache = LRUCache(cache_size)
+        self.logger = logging.getLogger(__name__)
+        self._listener: threading.Thread | None = None
+        self._listening = False
+
+    # Queries
+
+    def get_item_history(
+        self,
+        region: str,
+        item_id: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        after: datetime | str | None = None,
+        limit: int = 500,
+    ) -> dict[str, Any]:
+        """Get one page of an item's price history.
+
+        Args:
+            region: Region code, e.g. 'eu'
+            item_id: Commodity item ID
+            start: Inclusive lower bound on timestamp (None for unbounded)
+            end: Inclusive upper bound on timestamp (None for up to now)
+            after: Keyset cursor, the next_cursor of the previous page
+            limit: Maximum number of points to return
+
+        Returns:
+            Dictionary with the points in ascending time order and the
+            next_cursor to pass as `after` (None on the last page)
+        """
+        if isinstance(after, str):
+            after = datetime.fromisoformat(after)
+        start, end, after = _to_naive_utc(start), _to_naive_utc(end), _to_naive_utc(after)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        key = (region, item_id, start, end, after, limit)
+
+        page = self.cache.get(key)
+        if page is None:
+            page = self._query_history(region, [item_id], start, end, after, limit)[
+                item_id
+            ]
+            self.cache.put(key, page)
+        return {"region": region, "item_id": item_id, **page}
+
+    def get_items_history(
+        self,
+        region: str,
+        item_ids: list[int],
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int = 500,
+    ) -> dict[str, Any]:
+        """Get the first page of history for several items at once.
+
+        Cached items are served from memory; the rest are fetched together in
+        a single query.
+
+        Returns:
+            Dictionary mapping each item ID to its page (points and next_cursor)
+        """
+        start, end = _to_naive_utc(start), _to_naive_utc(end)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        pages: dict[int, dict[str, Any]] = {}
+        missing = []
+        for item_id in dict.fromkeys(item_ids):
+            page = self.cache.get((region, item_id, start, end, None, limit))
+            if page is None:
+                missing.append(item_id)
+            else:
+                pages[item_id] = page
+
+        if missing:
+            fetched = self._query_history(region, missing, start, end, None, limit)
+            for item_id, page in fetched.items():
+                self.cache.put((region, item_id, start, end, None, limit), page)
+                pages[item_id] = page
+
+        return {"region": region, "items": pages}
+
+    def get_price_quantiles(
+        self,
+        region: str,
+        item_id: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        quantiles: tuple[float, ...] = DEFAULT_QUANTILES,
+    ) -> dict[str, Any]:
+        """Get approximate quantity-weighted price quantiles of an item over a window.
+
+        Args:
+            region: Region code, e.g. 'eu'
+            item_id: Commodity item ID
+            start: Inclusive lower bound on timestamp (None for unbounded)
+            end: Inclusive upper bound on timestamp (None for up to now)
+            quantiles: Quantiles to report, each between 0 and 1
+
+        Returns:
+            Dictionary with the quantiles, the number of snapshots merged and
+            the total listed quantity they cover
+        """
+        start, end = _to_naive_utc(start), _to_naive_utc(end)
+        quantiles = tuple(quantiles)
+        # Same shape as the history keys, so invalidate() treats it alike
+        key = (region, item_id, start, end, "quantiles", quantiles)
+
+        result = self.cache.get(key)
+        if result is None:
+            table = get_region_tables(region).commodity_price_stats.__tablename__
+            conditions = ["item_id = :item_id", "price_sketch IS NOT NULL"]
+            params: dict[str, Any] = {"item_id": item_id}
+            if start is not None:
+                conditions.append("timestamp >= :start")
+                params["start"] = start
+            if end is not None:
+                conditions.append("timestamp <= :end")
+                params["end"] = end
+
+            with self.engine.connect() as connection:
+                sketches = connection.execute(
+                    text(
+                        f"SELECT price_sketch FROM {table} WHERE {' AND '.join(conditions)}"
+                    ),
+                    params,
+                ).scalars().all()
+
+            digest = merge_sketches(bytes(sketch) for sketch in sketches)
+            result = {
+                "quantiles": {str(q): digest.quantile(q) for q in quantiles},
+                "snapshots": len(sketches),
+                "total_quantity": digest.total_weight,
+            }
+            self.cache.put(key, result)
+        return {"region": region, "item_id": item_id, **result}
+
+    def _query_history(
+        self,
+        region: str,
+        item_ids: list[int],
+        start: datetime | None,
+        end: datetime | None,
+        after: datetime | None,
+        limit: int,
+    ) -> dict[int, dict[str, Any]]:
+        """Fetch up to `limit` points per item with a keyset range scan."""
+        table = get_region_tables(region).commodity_price_stats.__tablename__
+        conditions = ["s.item_id = i.item_id"]
+        params: dict[str, Any] = {"item_ids": item_ids, "limit": limit + 1}
+        if start is not None:
+            conditions.append("s.timestamp >= :start")
+            params["start"] = start
+        if after is not None:
+            conditions.append("s.timestamp > :after")
+            params["after"] = after
+        if end is not None:
+            conditions.append("s.timestamp <= :end")
+            params["end"] = end
+
+        # LATERAL keeps the per-item LIMIT inside each item's index range
+        query = text(f"""
+            SELECT i.item_id, p.timestamp, {", ".join(f"p.{c}" for c in HISTORY_COLUMNS)}
+            FROM unnest(:item_ids) AS i(item_id)
+            CROSS JOIN LATERAL (
+                SELECT s.timestamp, {", ".join(f"s.{c}" for c in HISTORY_COLUMNS)}
+                FROM {table} s
+                WHERE {" AND ".join(conditions)}
+                ORDER BY s.timestamp
+                LIMIT :limit
+            ) p
+        """)
+
+        rows_by_item: dict[int, list] = {item_id: [] for item_id in item_ids}
+        with self.engine.connect() as connection:
+            for row in connection.execute(query, params):
+                rows_by_item[row.item_id].append(row)
+
+        pages = {}
+        for item_id, rows in rows_by_item.items():
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            pages[item_id] = {
+                "points": [
+                    {
+                        "timestamp": row.timestamp.replace(tzinfo=UTC).isoformat(),
+                        **{column: getattr(row, column) for column in HISTORY_COLUMNS},
+                    }
+                    for row in rows
+                ],
+                "next_cursor": (
+                    rows[-1].timestamp.replace(tzinfo=UTC).isoformat()
+                    if has_more
+                    else None
+                ),
+            }
+        return pages
+
+    # Cache invalidation
+
+    def invalidate(self, region: str, snapshot_time: datetime | None = None) -> int:
+        """Drop cached pages a new snapshot could change.
+
+        Pages whose range ends before the snapshot are immutable history and
+        stay cached; open-ended ranges and ranges covering the snapshot go.
+        """
+        snapshot_time = _to_naive_utc(snapshot_time)
+
+        def is_stale(key: Hashable) -> bool:
+            key_region, _, _, end, _, _ = key  # type: ignore[misc]
+            if key_region != region:
+                return False
+            return end is None or snapshot_time is None or end >= snapshot_time
+
+        dropped = self.cache.invalidate(is_stale)
+        self.logger.debug(f"Invalidated {dropped} cached {region.upper()} pages")
+        return dropped
+
+    def _handle_notification(self, payload: str) -> None:
+        region, _, snapshot_iso = payload.partition("|")
+        snapshot_time = datetime.fromisoformat(snapshot_iso) if snapshot_iso else None
+        self.invalidate(region, snapshot_time)
+
+    def start_invalidation_listener(self, poll_timeout: float = 5.0) -> None:
+        """LISTEN for committed snapshots on a dedicated connection in the background."""
+        if self._listener is not None:
+            return
+        self._listening = True
+        self._listener = threading.Thread(
+            target=self._listen, args=(poll_timeout,), name="price-history-listener",
+            daemon=True,
+        )
+        self._listener.start()
+
+    def stop_invalidation_listener(self) -> None:
+        self._listening = False
+        if self._listener is not None:
+            self._listener.join()
+            self._listener = None
+
+    def _listen(self, poll_timeout: float) -> None:
+        while self._listening:
+            connection = None
+            try:
+                connection = self.engine.raw_connection()
+                # Keep the autocommit LISTEN connection out of the pool
+                connection.detach()
+                dbapi_connection = connection.dbapi_connection
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {SNAPSHOT_CHANNEL}")
+
+                # Notifications may have been missed while disconnected
+                self.cache.clear()
+
+                while self._listening:
+                    ready, _, _ = select.select([dbapi_connection], [], [], poll_timeout)
+                    if not ready:
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        notify = dbapi_connection.notifies.pop(0)
+                        self._handle_notification(notify.payload)
+            except Exception as e:
+                self.logger.warning(f"Snapshot listener connection failed: {e}")
+                self.cache.clear()
+                threading.Event().wait(poll_timeout)
+            finally:
+                if connection is not None:
+                    connection.close()
@@ -0,0 +1,259 @@
+"""
+Offline micro-benchmarks for the hot paths of snapshot processing.
+
+Each case runs against a synthetic commodities feed (simulation.commodities)
+with a previous and a current snapshot, so churn-dependent code like sales
+estimation sees realistic input. Every case is timed over several repeats
+and run once more under tracemalloc for its peak allocation. Results are
+compared with the stored baselines, and the run fails when a case is slower
+or allocates more than the baseline by more than the tolerance.
+
+Baselines are machine specific; refresh them on the machine that runs the
+suite with --update-baseline.
+
+Usage:
+    python -m benchmarks.micro
+    python -m benchmarks.micro --only stats,estimate_sales --repeat 10
+    python -m benchmarks.micro --update-baseline
+"""
+
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from analytics.depth_index import DepthIndex
+from simulation.commodities import CommodityFeedConfig, CommodityFeedGenerator
+from utils.auction_stream import AuctionStreamSplitter
+from utils.auction_utils import (
+    calculate_commodity_stats,
+    classify_disappeared_auctions,
+    count_new_listings,
+    estimate_sales,
+    group_snapshot_rows,
+    snapshot_rows,
+)
+
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class Fixture:
+    """Two consecutive synthetic snapshots in every shape the cases need."""
+
+    config: CommodityFeedConfig
+    previous_document: dict[str, Any]
+    current_document: dict[str, Any]
+    current_bytes: bytes
+    current_rows: list[dict]
+    previous_by_item: dict[int, list[dict]]
+    current_by_item: dict[int, list[dict]]
+
+    @classmethod
+    def build(cls, config: CommodityFeedConfig) -> "Fixture":
+        generator = CommodityFeedGenerator(config)
+        snapshot_time = datetime.now(UTC)
+        previous_document = generator.snapshot()
+        previous_by_item = group_snapshot_rows(
+            snapshot_rows(previous_document["auctions"], snapshot_time)
+        )
+        current_document = generator.advance()
+        current_rows = snapshot_rows(current_document["auctions"], snapshot_time)
+        return cls(
+            config=config,
+            previous_document=previous_document,
+            current_document=current_document,
+            current_bytes=generator.to_bytes(),
+            current_rows=current_rows,
+            previous_by_item=previous_by_item,
+            current_by_item=group_snapshot_rows(current_rows),
+        )
+
+
+def _parse_stream(fixture: Fixture) -> int:
+    data = fixture.current_bytes
+    splitter = AuctionStreamSplitter()
+    count = 0
+    for start in range(0, len(data), CHUNK_BYTES):
+        for batch in splitter.feed(data[start : start + CHUNK_BYTES]):
+            count += len(splitter.decode(batch))
+    for batch in splitter.finish():
+        count += len(splitter.decode(batch))
+    return count
+
+
+def _stats(fixture: Fixture) -> None:
+    for auctions in fixture.current_by_item.values():
+        calculate_commodity_stats(auctions)
+
+
+def _estimate_sales(fixture: Fixture) -> None:
+    for item_id, previous in fixture.previous_by_item.items():
+        estimate_sales(fixture.current_by_item.get(item_id, []), previous)
+
+
+def _count_new_listings(fixture: Fixture) -> None:
+    for item_id, current in fixture.current_by_item.items():
+        count_new_listings(current, fixture.previous_by_item.get(item_id, []))
+
+
+CASES: dict[str, Callable[[Fixture], Any]] = {
+    "serialize": lambda f: json.dumps(f.current_document, separators=(",", ":")).encode(),
+    "parse_stream": _parse_stream,
+    "snapshot_rows": lambda f: snapshot_rows(
+        f.current_document["auctions"], datetime.now(UTC)
+    ),
+    "group_by_item": lambda f: group_snapshot_rows(f.current_rows),
+    "stats": _stats,
+    "estimate_sales": _estimate_sales,
+    "count_new_listings": _count_new_listings,
+    "classify_disappeared": lambda f: classify_disappeared_auctions(
+        f.current_by_item, f.previous_by_item
+    ),
+    "depth_index": lambda f: DepthIndex.from_auctions(f.current_by_item, datetime.now(UTC)),
+}
+
+
+@dataclass
+class CaseResult:
+    name: str
+    median_seconds: float
+    min_seconds: float
+    peak_bytes: int
+
+
+def run_case(name: str, fixture: Fixture, repeat: int) -> CaseResult:
+    case = CASES[name]
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        case(fixture)
+        timings.append(time.perf_counter() - started)
+
+    # One extra run for memory; tracemalloc slows it too much to time
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        case(fixture)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return CaseResult(
+        name=name,
+        median_seconds=statistics.median(timings),
+        min_seconds=min(timings),
+        peak_bytes=peak - baseline,
+    )
+
+
+def compare(
+    results: list[CaseResult],
+    baselines: dict[str, dict[str, float]],
+    time_tolerance: float,
+    memory_tolerance: float,
+) -> list[str]:
+    """Describe every case that regressed against its baseline."""
+    regressions = []
+    for result in results:
+        baseline = baselines.get(result.name)
+        if not baseline:
+            continue
+        time_limit = baseline["median_seconds"] * (1 + time_tolerance)
+        if result.median_seconds > time_limit:
+            regressions.append(
+                f"{result.name}: {result.median_seconds * 1000:.1f} ms > "
+                f"{time_limit * 1000:.1f} ms allowed "
+                f"(baseline {baseline['median_seconds'] * 1000:.1f} ms)"
+            )
+        memory_limit = baseline["peak_bytes"] * (1 + memory_tolerance)
+        if result.peak_bytes > memory_limit:
+            regressions.append(
+                f"{result.name}: peak {result.peak_bytes / 2**20:.1f} MiB > "
+                f"{memory_limit / 2**20:.1f} MiB allowed "
+                f"(baseline {baseline['peak_bytes'] / 2**20:.1f} MiB)"
+            )
+    return regressions
+
+
+def _print_table(results: list[CaseResult], baselines: dict[str, dict[str, float]]) -> None:
+    print(f"{'case':<22}{'median ms':>12}{'min ms':>10}{'peak MiB':>10}{'vs base':>10}")
+    for r in results:
+        base = baselines.get(r.name)
+        change = (
+            f"{(r.median_seconds / base['median_seconds'] - 1) * 100:+.0f}%"
+            if base and base["median_seconds"]
+            else "new"
+        )
+        print(
+            f"{r.name:<22}{r.median_seconds * 1000:>12.2f}{r.min_seconds * 1000:>10.2f}"
+            f"{r.peak_bytes / 2**20:>10.2f}{change:>10}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snapshot processing micro-benchmarks")
+    parser.add_argument("--auctions", type=int, default=CommodityFeedConfig.auction_count)
+    parser.add_argument("--items", type=int, default=CommodityFeedConfig.item_count)
+    parser.add_argument("--seed", type=int, default=CommodityFeedConfig.seed)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="Comma separated case names")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--time-tolerance", type=float, default=0.3)
+    parser.add_argument("--memory-tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        parser.error(f"Unknown case(s): {', '.join(unknown)}; choose from {', '.join(CASES)}")
+
+    config = CommodityFeedConfig(
+        auction_count=args.auctions, item_count=args.items, seed=args.seed
+    )
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    baselines = stored.get("cases", {})
+    if baselines and stored.get("config") != asdict(config):
+        print("Baseline was recorded with a different feed config; not comparing")
+        baselines = {}
+
+    fixture = Fixture.build(config)
+    print(
+        f"Feed: {len(fixture.current_rows)} auctions over {len(fixture.current_by_item)} items, "
+        f"{len(fixture.current_bytes) / 2**20:.1f} MiB JSON"
+    )
+    results = [run_case(name, fixture, args.repeat) for name in names]
+    _print_table(results, baselines)
+
+    if args.update_baseline:
+        cases = {**baselines, **{r.name: asdict(r) for r in results}}
+        for case in cases.values():
+            case.pop("name", None)
+        args.baseline.write_text(
+            json.dumps({"config": asdict(config), "cases": cases}, indent=2) + "\n"
+        )
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    regressions = compare(results, baselines, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Durable background jobs.
+
+Work that does not have to happen on the collection path is queued in the
+jobs table and run by job workers (jobs.worker), which can run as many
+processes and containers as needed.
+"""
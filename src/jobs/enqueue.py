@@ -0,0 +1,60 @@
+"""
+Queue one-off jobs and inspect the queue.
+
+Usage:
+    python -m jobs.enqueue backfill-stats --region eu --since 2026-10-01 --until 2026-10-07
+    python -m jobs.enqueue reseed --seeders items,reagents
+    python -m jobs.enqueue status
+"""
+
+import argparse
+from datetime import UTC, datetime
+
+from jobs.handlers import PRIORITY_BACKFILL, enqueue_stats_backfill
+from repository.database import db_session
+from repository.job_repository import JobRepository
+
+
+def _parse_time(value: str) -> datetime:
+    # Catalog times are stored as naive UTC
+    parsed = datetime.fromisoformat(value)
+    return parsed.astimezone(UTC).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Queue background jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill-stats", help="Recompute stats of stored snapshots")
+    backfill.add_argument("--region", required=True)
+    backfill.add_argument("--since", required=True, type=_parse_time, help="ISO time (UTC)")
+    backfill.add_argument("--until", type=_parse_time, help="ISO time (UTC), default now")
+
+    reseed = commands.add_parser("reseed", help="Rerun seeders from scratch")
+    reseed.add_argument("--seeders", default="recipes,reagents,items")
+
+    commands.add_parser("status", help="Count jobs by status")
+    args = parser.parse_args()
+
+    with db_session() as session:
+        if args.command == "backfill-stats":
+            until = args.until or datetime.now(UTC).replace(tzinfo=None)
+            queued = enqueue_stats_backfill(session, args.region.lower(), args.since, until)
+            print(f"Queued {queued} recompute_stats job(s)")
+        elif args.command == "reseed":
+            seeder_types = [s.strip() for s in args.seeders.split(",") if s.strip()]
+            job_id = JobRepository(session).enqueue(
+                "reseed",
+                {"seeder_types": seeder_types},
+                priority=PRIORITY_BACKFILL,
+                max_attempts=1,
+                dedupe_key="reseed",
+            )
+            print(f"Queued reseed job {job_id}" if job_id else "A reseed is already queued")
+        else:
+            for status, count in sorted(JobRepository(session).counts_by_status().items()):
+                print(f"{status:<12}{count:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Job types the workers know how to run, and helpers to queue them.
+
+Each handler receives a session (committed by the worker once the handler
+returns) and the job's JSON payload. Long handlers check job_may_continue(),
+which turns False once the worker has lost the job's lease:
+
+    region_analytics        {"region", "price_bases"}  recipe profits per price basis
+    cross_region_analytics  {"regions"}                arbitrage scan across regions
+    recompute_stats         {"region", "snapshot_time"} rebuild a past snapshot's stats
+    reseed                  {"seeder_types"}           rerun seeders from scratch
+
+Priorities: lower runs first.
+"""
+
+import contextvars
+import logging
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from analytics.arbitrage import ArbitrageScanner
+from analytics.depth_index import DepthIndex, get_depth_store
+from analytics.profit_engine import DEPTH_PRICE_BASIS, ProfitEngine
+from models.models import SeederStatus, get_region_tables
+from repository.auction_repository import AuctionRepository
+from repository.job_repository import JobRepository
+from repository.snapshot_catalog_repository import SnapshotCatalogRepository
+from scraper.auction_collector import AuctionCollector
+from seeding.seeder import SeederOrchestrator
+
+PRIORITY_REGION_ANALYTICS = 10
+PRIORITY_CROSS_REGION_ANALYTICS = 20
+PRIORITY_BACKFILL = 100
+
+logger = logging.getLogger(__name__)
+
+# Set by the worker around each handler call
+job_may_continue: contextvars.ContextVar[Callable[[], bool]] = contextvars.ContextVar(
+    "job_may_continue", default=lambda: True
+)
+
+# Kept per worker process so the recipe matrix is only rebuilt when reagents change
+_profit_engine = ProfitEngine()
+
+
+def _load_depth_index(session: Session, region: str) -> None:
+    """Publish the region's latest order book in this process.
+
+    The scheduler only publishes depth indexes in its own memory, so a
+    worker rebuilds the index from the latest stored snapshot.
+    """
+    latest = SnapshotCatalogRepository(session).get_latest(region)
+    if latest is None:
+        return
+    snapshot_time = latest.snapshot_time.replace(tzinfo=UTC)
+    published = get_depth_store().get(region)
+    if published is not None and published.snapshot_time == snapshot_time:
+        return
+    depths = {}
+    for item_id, auctions in AuctionRepository(session, region).iter_snapshot_items(
+        snapshot_time
+    ):
+        depths.update(DepthIndex.from_auctions({item_id: auctions}).depths)
+    get_depth_store().publish(region, DepthIndex(depths, snapshot_time))
+
+
+def run_region_analytics(session: Session, payload: dict[str, Any]) -> None:
+    region = payload["region"]
+    price_bases = payload["price_bases"]
+    if DEPTH_PRICE_BASIS in price_bases:
+        _load_depth_index(session, region)
+    for price_basis in price_bases:
+        recipe_count = _profit_engine.run(session, region, price_basis)
+        logger.info(
+            f"Computed {region.upper()} profits for {recipe_count} recipes ({price_basis} prices)"
+        )
+
+
+def run_cross_region_analytics(session: Session, payload: dict[str, Any]) -> None:
+    ArbitrageScanner().scan(session, payload["regions"])
+
+
+def recompute_stats(session: Session, payload: dict[str, Any]) -> None:
+    """Replace a stored snapshot's commodity stats with freshly computed ones.
+
+    Only backfills history. The region's latest snapshot also feeds
+    latest_commodity_prices and the running market indicators, which cannot
+    fold the same snapshot in twice, so it is skipped.
+    """
+    region = payload["region"]
+    snapshot_time = datetime.fromisoformat(payload["snapshot_time"])
+    catalog = SnapshotCatalogRepository(session)
+    latest = catalog.get_latest(region)
+    if latest is not None and latest.snapshot_time <= snapshot_time.replace(tzinfo=None):
+        logger.warning(
+            f"Not recomputing {region.upper()} stats for {snapshot_time:%Y-%m-%d %H:%M}: "
+            "only snapshots older than the latest are backfilled"
+        )
+        return
+    previous = catalog.get_closest_before(
+        region, snapshot_time.replace(tzinfo=None) - timedelta(microseconds=1)
+    )
+    collector = AuctionCollector(session, None, AuctionRepository(session, region))
+    _, stats_values = collector.stats_from_database(
+        snapshot_time, previous.snapshot_time.replace(tzinfo=UTC) if previous else None
+    )
+
+    model = get_region_tables(region).commodity_price_stats
+    session.execute(delete(model).where(model.timestamp == snapshot_time))
+    if stats_values:
+        session.execute(model.__table__.insert(), stats_values)
+    logger.info(
+        f"Recomputed {len(stats_values)} {region.upper()} stats rows for {snapshot_time:%Y-%m-%d %H:%M}"
+    )
+
+
+def reseed(session: Session, payload: dict[str, Any]) -> None:
+    session.query(SeederStatus).filter(
+        SeederStatus.seeder_type.in_(payload["seeder_types"])
+    ).update(
+        {SeederStatus.completed: False, SeederStatus.progress: None},
+        synchronize_session=False,
+    )
+    session.commit()
+    # Stops at the next checkpoint once the worker has lost the job's lease
+    SeederOrchestrator().run_initial_seeding(should_continue=job_may_continue.get())
+
+
+JOB_HANDLERS: dict[str, Callable[[Session, dict[str, Any]], None]] = {
+    "region_analytics": run_region_analytics,
+    "cross_region_analytics": run_cross_region_analytics,
+    "recompute_stats": recompute_stats,
+    "reseed": reseed,
+}
+
+
+def enqueue_region_analytics(session: Session, region: str, price_bases: list[str]) -> int | None:
+    """Queue a region's analytics refresh; a refresh still waiting covers this one too."""
+    return JobRepository(session).enqueue(
+        "region_analytics",
+        {"region": region, "price_bases": price_bases},
+        priority=PRIORITY_REGION_ANALYTICS,
+        dedupe_key=f"region_analytics:{region}",
+    )
+
+
+def enqueue_cross_region_analytics(session: Session, regions: list[str]) -> int | None:
+    return JobRepository(session).enqueue(
+        "cross_region_analytics",
+        {"regions": regions},
+        priority=PRIORITY_CROSS_REGION_ANALYTICS,
+        dedupe_key="cross_region_analytics",
+    )
+
+
+def enqueue_stats_backfill(
+    session: Session, region: str, start: datetime, end: datetime
+) -> int:
+    """Queue a recompute_stats job for every snapshot of a region in [start, end].
+
+    The region's latest snapshot is left out (see recompute_stats).
+
+    Returns:
+        Number of jobs queued
+    """
+    queued = 0
+    repository = JobRepository(session)
+    catalog = SnapshotCatalogRepository(session)
+    latest = catalog.get_latest(region)
+    for entry in catalog.get_between(region, start, end):
+        if latest is not None and entry.snapshot_time >= latest.snapshot_time:
+            continue
+        snapshot_iso = entry.snapshot_time.replace(tzinfo=UTC).isoformat()
+        job_id = repository.enqueue(
+            "recompute_stats",
+            {"region": region, "snapshot_time": snapshot_iso},
+            priority=PRIORITY_BACKFILL,
+            dedupe_key=f"recompute_stats:{region}:{snapshot_iso}",
+        )
+        queued += job_id is not None
+    return queued
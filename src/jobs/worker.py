@@ -0,0 +1,282 @@
+"""
+Job worker: claims jobs from the queue and runs them.
+
+Each worker process claims one job at a time with FOR UPDATE SKIP LOCKED,
+keeps its lease alive from a heartbeat thread while the handler runs, and
+then marks the job succeeded or schedules a retry with exponential backoff.
+Jobs whose worker died are requeued by whichever worker next finds their
+lease expired. Idle workers wait on a LISTEN for newly queued jobs, with
+JOB_POLL_SECONDS as a fallback for delayed retries.
+
+Run any number of these, as processes or containers:
+
+    python -m jobs.worker
+    python -m jobs.worker --processes 4 --job-types region_analytics,recompute_stats
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import secrets
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+
+from jobs.handlers import JOB_HANDLERS, job_may_continue
+from repository.database import db_session, get_engine
+from repository.job_repository import JOB_CHANNEL, JobRepository
+from utils.telemetry import get_telemetry_writer
+from utils.tracing import span
+
+
+class JobWorker:
+    def __init__(
+        self,
+        job_types: list[str] | None = None,
+        worker_id: str | None = None,
+    ):
+        self.job_types = job_types
+        self.worker_id = (
+            worker_id or f"{socket.gethostname()[:60]}-{os.getpid()}-{secrets.token_hex(3)}"
+        )
+        self.lease_seconds = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+        self.poll_seconds = float(os.getenv("JOB_POLL_SECONDS", "5"))
+        self.retry_seconds = float(os.getenv("JOB_RETRY_SECONDS", "30"))
+        self.retention_days = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+        self.logger = logging.getLogger(__name__)
+        self._stopping = threading.Event()
+        self._listen_connection = None
+        self._last_purge = 0.0
+        self._claimed_at = 0.0
+
+    def stop(self) -> None:
+        """Stop once the current job (if any) has finished."""
+        self._stopping.set()
+
+    # Main loop
+
+    def run(self) -> None:
+        self.logger.info(
+            f"Job worker {self.worker_id} started"
+            + (f" for {', '.join(self.job_types)}" if self.job_types else "")
+        )
+        try:
+            while not self._stopping.is_set():
+                try:
+                    self._housekeeping()
+                    job = self._claim()
+                except Exception as e:
+                    self.logger.warning(f"Job queue unavailable: {e}")
+                    self._stopping.wait(self.poll_seconds)
+                    continue
+                if job is None:
+                    self._wait_for_jobs()
+                    continue
+                try:
+                    self._execute(job)
+                except Exception as e:
+                    # The job's lease runs out and another worker requeues it
+                    self.logger.warning(f"Failed to record the outcome of job {job.id}: {e}")
+                    self._stopping.wait(self.poll_seconds)
+        finally:
+            self._close_listener()
+            get_telemetry_writer().stop()
+
+    def _housekeeping(self) -> None:
+        with db_session() as session:
+            repository = JobRepository(session)
+            requeued = repository.requeue_expired()
+            if requeued:
+                self.logger.warning(f"Requeued {requeued} job(s) whose worker stopped")
+            if time.monotonic() - self._last_purge > 3600:
+                repository.purge_finished(self.retention_days)
+                self._last_purge = time.monotonic()
+
+    def _claim(self):
+        # The lease is certainly ours until lease_seconds after the request
+        self._claimed_at = time.monotonic()
+        with db_session() as session:
+            return JobRepository(session).claim(
+                self.worker_id, self.lease_seconds, self.job_types
+            )
+
+    # Running a job
+
+    def _heartbeat(self, job_id: int, done: threading.Event, held_until: list[float]) -> None:
+        while not done.wait(self.lease_seconds / 3):
+            started = time.monotonic()
+            try:
+                with db_session() as session:
+                    if not JobRepository(session).extend_lease(
+                        job_id, self.worker_id, self.lease_seconds
+                    ):
+                        self.logger.warning(f"Lost the lease on job {job_id}")
+                        held_until[0] = 0.0
+                        return
+                held_until[0] = started + self.lease_seconds
+            except Exception as e:
+                self.logger.warning(f"Failed to extend the lease on job {job_id}: {e}")
+
+    def _execute(self, job) -> None:
+        handler = JOB_HANDLERS.get(job.job_type)
+        done = threading.Event()
+        # Monotonic time until which the job's lease is certainly still ours
+        held_until = [self._claimed_at + self.lease_seconds]
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(job.id, done, held_until),
+            name=f"job-{job.id}-lease",
+            daemon=True,
+        )
+        heartbeat.start()
+        started = time.perf_counter()
+        try:
+            with span(
+                "job",
+                job_type=job.job_type,
+                job_id=job.id,
+                attempt=job.attempts,
+                region=job.payload.get("region"),
+            ):
+                if handler is None:
+                    raise ValueError(f"No handler for job type {job.job_type}")
+                token = job_may_continue.set(lambda: time.monotonic() < held_until[0])
+                try:
+                    with db_session() as session:
+                        handler(session, job.payload)
+                finally:
+                    job_may_continue.reset(token)
+        except Exception as e:
+            done.set()
+            delay = min(self.retry_seconds * 2 ** (job.attempts - 1), 3600.0)
+            final = handler is None or job.attempts >= job.max_attempts
+            self.logger.error(
+                f"Job {job.id} ({job.job_type}) attempt {job.attempts}/{job.max_attempts} failed: {e}"
+                + ("" if final else f"; retrying in {delay:.0f}s")
+            )
+            with db_session() as session:
+                # Retrying cannot help a job nobody can run
+                JobRepository(session).fail(
+                    job.id, self.worker_id, f"{type(e).__name__}: {e}", delay, give_up=handler is None
+                )
+        else:
+            done.set()
+            with db_session() as session:
+                if not JobRepository(session).complete(job.id, self.worker_id):
+                    self.logger.warning(
+                        f"Job {job.id} finished after its lease passed to another worker"
+                    )
+            self.logger.info(
+                f"Job {job.id} ({job.job_type}) done in {time.perf_counter() - started:.1f}s"
+            )
+        finally:
+            heartbeat.join()
+
+    # Waiting for work
+
+    def _wait_for_jobs(self) -> None:
+        """Sleep until a job is queued or the poll interval passes."""
+        try:
+            connection = self._listener()
+            ready, _, _ = select.select([connection], [], [], self.poll_seconds)
+            if ready:
+                connection.poll()
+                connection.notifies.clear()
+        except Exception as e:
+            self.logger.warning(f"Job listener connection failed: {e}")
+            self._close_listener()
+            self._stopping.wait(self.poll_seconds)
+
+    def _listener(self):
+        if self._listen_connection is None:
+            connection = get_engine().raw_connection()
+            # Keep the autocommit LISTEN connection out of the pool
+            connection.detach()
+            dbapi_connection = connection.dbapi_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {JOB_CHANNEL}")
+            self._listen_connection = connection
+        return self._listen_connection.dbapi_connection
+
+    def _close_listener(self) -> None:
+        if self._listen_connection is not None:
+            try:
+                self._listen_connection.close()
+            finally:
+                self._listen_connection = None
+
+
+def run_worker(job_types: list[str] | None) -> None:
+    """Run one worker in this process until SIGTERM or SIGINT."""
+    worker = JobWorker(job_types)
+
+    def handle_signal(signum, frame):
+        logging.getLogger(__name__).info(f"Received signal {signum}, stopping after the current job")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    worker.run()
+
+
+def _configure_logging() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+
+
+def _run_process(job_types: list[str] | None) -> None:
+    _configure_logging()
+    run_worker(job_types)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=int(os.getenv("JOB_WORKER_PROCESSES", "1")),
+        help="Worker processes to run (one job at a time each)",
+    )
+    parser.add_argument("--job-types", help="Comma separated job types to take (default all)")
+    args = parser.parse_args()
+
+    job_types = [t.strip() for t in args.job_types.split(",")] if args.job_types else None
+    unknown = [t for t in job_types or [] if t not in JOB_HANDLERS]
+    if unknown:
+        parser.error(f"Unknown job type(s): {', '.join(unknown)}; choose from {', '.join(JOB_HANDLERS)}")
+
+    _configure_logging()
+    if args.processes <= 1:
+        run_worker(job_types)
+        return
+
+    # Spawned, not forked, so no process inherits the parent's pooled connections
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_run_process, args=(job_types,), name=f"job-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward_signal(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward_signal)
+    signal.signal(signal.SIGINT, forward_signal)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,32 @@
 Entry Point for the Ironforge Scheduler Service
 
 This service handles:
-1. Initial seeding of recipes and reagents (run once on startup)
-2. Continuous hourly auction data collection for EU and US regions
+1. Initial seeding of recipes, reagents and items (in the background on
+   startup, checkpointed so a restart resumes where it stopped)
+2. Continuous hourly auction data collection for EU and US regions, which
+   starts immediately; seeding only uses API budget collection leaves over
+   (see utils.api_budget)
+
+With SCHEDULER_HA enabled several replicas can run at once; leases decide
+which replica seeds, maintains partitions and collects each region (see
+scraper.leases).
 """
 
 import logging
+import os
 import signal
 import sys
+import threading
+import time
 
+from repository.database import db_session
+from repository.job_repository import JobRepository
+from scraper.leases import LEADER, LeaseManager, ha_enabled
 from scraper.scraper import ScraperOrchestrator
-from seeding.seeder import SeederOrchestrator
+from seeding.seeder import SeederOrchestrator, SeedingAborted
+from utils.metrics import MetricsServer
 from utils.partition_manager import PartitionManagerService
+from utils.telemetry import get_telemetry_writer
 
 # Configure logging
 logging.basicConfig(
@@ -30,22 +45,66 @@ class SchedulerService:
         self.seeder_orchestrator = SeederOrchestrator()
         self.scraper_orchestrator = ScraperOrchestrator()
         self.partition_manager = PartitionManagerService()
+        self.metrics_server = MetricsServer()
+        self.leases = (
+            LeaseManager(self.scraper_orchestrator.regions) if ha_enabled() else None
+        )
+        self.scraper_orchestrator.leases = self.leases
+        self.seeding_retry_seconds = float(os.getenv("SEEDING_RETRY_SECONDS", "300"))
         self.running = False
+        self._stopping = threading.Event()
 
-    def run_initial_seeding(self):
-        """Run initial seeding in a separate thread."""
-        try:
-            logger.info("Starting initial seeding process...")
-            self.seeder_orchestrator.run_initial_seeding()
-            logger.info("Initial seeding completed successfully")
-        except Exception as e:
-            logger.error(f"Initial seeding failed: {e}")
-            raise
+    def _is_leader(self):
+        return self.running and (self.leases is None or self.leases.owns(LEADER))
 
-    def start_services(self):
-        """Start all services: partition management, seeding, then continuous scraping."""
-        self.running = True
+    def _reseed_job_running(self):
+        with db_session() as session:
+            return JobRepository(session).has_running("reseed")
 
+    def _may_seed(self):
+        return self._is_leader() and not self._reseed_job_running()
+
+    def run_initial_seeding(self):
+        """Run initial seeding, retrying failed runs from their checkpoint.
+
+        Leadership is checked before every profession or item chunk, so a
+        replica that loses the leader lease stops at its next checkpoint and
+        the new leader resumes from there. Seeding also stops, and waits,
+        while a job worker runs a reseed job over the same tables.
+        """
+        while self._is_leader():
+            try:
+                if self._reseed_job_running():
+                    logger.info("A reseed job is running; seeding waits for it")
+                    self._stopping.wait(self.seeding_retry_seconds)
+                    continue
+                logger.info("Starting initial seeding process...")
+                self.seeder_orchestrator.run_initial_seeding(should_continue=self._may_seed)
+                logger.info("Initial seeding completed successfully")
+                return
+            except SeedingAborted:
+                # Lost leadership, or a reseed job started; the loop tells which
+                continue
+            except Exception as e:
+                logger.error(
+                    f"Initial seeding failed: {e}; resuming in {self.seeding_retry_seconds:.0f}s"
+                )
+                self._stopping.wait(self.seeding_retry_seconds)
+        if self.running and self.leases is not None:
+            logger.warning("Lost leadership; leaving initial seeding to the new leader")
+            # Pick seeding up again if this replica becomes leader once more
+            threading.Thread(
+                target=self._bootstrap_when_leader, name="leader-bootstrap", daemon=True
+            ).start()
+
+    def start_background_seeding(self):
+        """Seed in a daemon thread so collection does not wait for it."""
+        threading.Thread(
+            target=self.run_initial_seeding, name="initial-seeding", daemon=True
+        ).start()
+
+    def run_leader_bootstrap(self):
+        """Partition setup and initial seeding, run by the leader only."""
         # Initialize partition management first
         logger.info("Initializing database partitions...")
         try:
@@ -53,8 +112,42 @@ class SchedulerService:
         except Exception as e:
             logger.warning(f"Partition initialization failed: {e}. Continuing without partitions...")
 
-        # Run initial seeding
-        self.run_initial_seeding()
+        # Seeding takes hours on a fresh database; collect alongside it
+        self.start_background_seeding()
+
+    def _bootstrap_when_leader(self):
+        while self.running and not self.leases.owns(LEADER):
+            time.sleep(self.leases.renew_seconds)
+        if not self.running:
+            return
+        logger.info("Became leader; finishing partition setup and seeding")
+        try:
+            self.run_leader_bootstrap()
+        except Exception as e:
+            logger.error(f"Leader bootstrap failed: {e}")
+
+    def start_services(self):
+        """Start all services: partition management, background seeding and continuous scraping."""
+        self.running = True
+
+        # Expose /metrics before anything slow starts
+        try:
+            self.metrics_server.start()
+        except OSError as e:
+            logger.warning(f"Metrics endpoint unavailable: {e}")
+
+        if self.leases is None:
+            self.run_leader_bootstrap()
+        else:
+            self.leases.start()
+            if self.leases.owns(LEADER):
+                self.run_leader_bootstrap()
+            else:
+                # Take over partition setup and seeding if the leader dies first
+                logger.info("Another replica is leader; skipping partition setup and seeding")
+                threading.Thread(
+                    target=self._bootstrap_when_leader, name="leader-bootstrap", daemon=True
+                ).start()
 
         # Start continuous scraping
         logger.info("Starting continuous auction data collection...")
@@ -64,7 +157,12 @@ class SchedulerService:
         """Stop all services gracefully."""
         logger.info("Stopping scheduler services...")
         self.running = False
+        self._stopping.set()
         self.scraper_orchestrator.stop()
+        if self.leases is not None:
+            self.leases.stop()
+        self.metrics_server.stop()
+        get_telemetry_writer().stop()
 
 
 def create_signal_handler(service):
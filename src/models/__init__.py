@@ -1,2 +1,2 @@
 # type: ignore
-from .models import Base, Reagent, Recipe, AuctionSnapshotEU, AuctionSnapshotUS, ScraperLog, SeederStatus, Benchmark, EUCommodityPriceStats, USCommodityPriceStats
+from .models import Base, Reagent, Recipe, AuctionSnapshotEU, AuctionSnapshotUS, ScraperLog, SeederStatus, Benchmark, EUCommodityPriceStats, USCommodityPriceStats, SnapshotCatalog, LatestCommodityPrice, RecipeProfit, MarketIndicator, ArbitrageOpportunity, ArbitrageScan, MarketEvent, SchedulerLease, Job
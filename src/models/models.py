@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+
 from sqlalchemy import (
     JSON,
     BigInteger,
@@ -7,7 +9,9 @@ from sqlalchemy import (
     Float,
     ForeignKeyConstraint,
     Integer,
+    LargeBinary,
     String,
+    Text,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
@@ -15,9 +19,8 @@ from sqlalchemy.sql import func
 Base = declarative_base()
 
 
-class EUCommodityPriceStats(Base):
-    """Tracks price statistics for EU commodities over time"""
-    __tablename__ = "eu_commodity_price_stats"
+class CommodityPriceStatsColumns:
+    """Tracks price statistics for a region's commodities over time"""
 
     item_id = Column(Integer, primary_key=True)
     timestamp = Column(DateTime, primary_key=True, nullable=False, server_default=func.now())
@@ -32,26 +35,12 @@ class EUCommodityPriceStats(Base):
     total_quantity = Column(BigInteger)
     num_auctions = Column(Integer)  # Number of distinct auctions for this item
     estimated_sales = Column(Integer)  # Estimated number of items sold since last snapshot
+    estimated_relisted = Column(Integer)  # Disappeared items that reappeared as a new listing
+    estimated_expired = Column(Integer)  # Disappeared items whose auction ran out
     new_listings = Column(Integer)  # Number of new items listed since last snapshot
 
-class USCommodityPriceStats(Base):
-    """Tracks price statistics for US commodities over time"""
-    __tablename__ = "us_commodity_price_stats"
-
-    item_id = Column(Integer, primary_key=True)
-    timestamp = Column(DateTime, primary_key=True, nullable=False, server_default=func.now())
-    
-    # Price statistics
-    min_price = Column(BigInteger)
-    max_price = Column(BigInteger)
-    mean_price = Column(Float)
-    median_price = Column(Float)
-    
-    # Quantity statistics
-    total_quantity = Column(BigInteger)
-    num_auctions = Column(Integer)  # Number of distinct auctions for this item
-    estimated_sales = Column(Integer)  # Estimated number of items sold since last snapshot
-    new_listings = Column(Integer)  # Number of new items listed since last snapshot
+    # Quantity-weighted t-digest of listed unit prices (analytics.quantile_sketch)
+    price_sketch = Column(LargeBinary)
 
 
 class Recipe(Base):
@@ -85,8 +74,8 @@ class Reagent(Base):
     )
 
 
-class AuctionSnapshotEU(Base):
-    __tablename__ = "auction_snapshots_eu"
+class AuctionSnapshotColumns:
+    """Raw commodity auctions captured in a region's hourly snapshots"""
 
     auction_id = Column(BigInteger, primary_key=True)
     item_id = Column(Integer, nullable=False)
@@ -96,15 +85,188 @@ class AuctionSnapshotEU(Base):
     snapshot_time = Column(DateTime, primary_key=True)
 
 
-class AuctionSnapshotUS(Base):
-    __tablename__ = "auction_snapshots_us"
+class SnapshotCatalog(Base):
+    """Catalog of committed auction snapshots, one row per region and snapshot"""
+    __tablename__ = "snapshot_catalog"
 
-    auction_id = Column(BigInteger, primary_key=True)
-    item_id = Column(Integer, nullable=False)
-    unit_price = Column(BigInteger, nullable=False)
-    quantity = Column(Integer, nullable=False)
-    time_left = Column(String(1), nullable=False)
+    region = Column(String(2), primary_key=True)  # 'eu' or 'us'
     snapshot_time = Column(DateTime, primary_key=True)
+    last_modified = Column(DateTime, nullable=True)  # Blizzard Last-Modified header
+    row_count = Column(Integer, nullable=False)  # Auctions stored in the snapshot
+    item_count = Column(Integer, nullable=False)  # Distinct items in the snapshot
+    ingest_duration_seconds = Column(Float, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class LatestCommodityPrice(Base):
+    """Current market per region and item, upserted in place every collection"""
+    __tablename__ = "latest_commodity_prices"
+
+    region = Column(String(2), primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    snapshot_time = Column(DateTime, nullable=False)
+
+    # Current statistics (same meaning as *_commodity_price_stats)
+    min_price = Column(BigInteger)
+    max_price = Column(BigInteger)
+    mean_price = Column(Float)
+    median_price = Column(Float)
+    total_quantity = Column(BigInteger)
+    num_auctions = Column(Integer)
+    estimated_sales = Column(Integer)
+    estimated_relisted = Column(Integer)
+    estimated_expired = Column(Integer)
+    new_listings = Column(Integer)
+
+    # Values from the item's previous snapshot
+    previous_snapshot_time = Column(DateTime)
+    previous_min_price = Column(BigInteger)
+    previous_median_price = Column(Float)
+    previous_total_quantity = Column(BigInteger)
+    previous_estimated_sales = Column(Integer)
+
+    # Current minus previous
+    min_price_change = Column(BigInteger)
+    median_price_change = Column(Float)
+    total_quantity_change = Column(BigInteger)
+
+
+class RecipeProfit(Base):
+    """Crafting profit of a recipe in a region at one price basis"""
+    __tablename__ = "recipe_profits"
+
+    region = Column(String(2), primary_key=True)
+    price_basis = Column(String(10), primary_key=True)  # 'min', 'median', ...
+    recipe_id = Column(Integer, primary_key=True)
+    faction = Column(String(8), primary_key=True)
+    crafted_item_id = Column(Integer)
+    reagent_cost = Column(Float)  # Cost of the required reagents
+    crafted_price = Column(Float)  # Market price of the crafted item
+    profit = Column(Float)  # Crafted price after the AH cut minus reagent cost
+    margin = Column(Float)  # Profit relative to reagent cost
+    missing_reagents = Column(Integer, nullable=False)  # Reagents without a price
+    computed_at = Column(DateTime, nullable=False)
+
+
+class MarketIndicator(Base):
+    """Running indicator state per region and item, updated in O(1) every collection"""
+    __tablename__ = "market_indicators"
+
+    region = Column(String(2), primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    updated_at = Column(DateTime, nullable=False)  # Snapshot time of the last update
+    observations = Column(Integer, nullable=False)
+
+    # Time-decayed EMAs of the min price at the short/medium/long horizons
+    price_ema_short = Column(Float)
+    price_ema_medium = Column(Float)
+    price_ema_long = Column(Float)
+
+    # Welford running mean and sum of squared deviations of the min price
+    price_mean = Column(Float)
+    price_m2 = Column(Float)
+
+    # Exponentially weighted mean and variance at the long horizon
+    price_ew_mean = Column(Float)
+    price_ew_variance = Column(Float)
+
+    # Exponentially weighted mean/variance of listed quantity and of
+    # estimated sales per snapshot, medium horizon
+    quantity_ema = Column(Float)
+    quantity_ew_variance = Column(Float)
+    sales_ew_mean = Column(Float)
+    sales_ew_variance = Column(Float)
+
+    sales_velocity_short = Column(Float)  # Estimated units sold per hour
+    sales_velocity_long = Column(Float)
+
+
+class ArbitrageOpportunity(Base):
+    """Cross-region price spread of an item, valued in WoW Tokens"""
+    __tablename__ = "arbitrage_opportunities"
+
+    buy_region = Column(String(2), primary_key=True)
+    sell_region = Column(String(2), primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    rank = Column(Integer, nullable=False)  # 1 = best score for the region pair
+    buy_price = Column(BigInteger, nullable=False)  # Min price in the buy region
+    sell_price = Column(BigInteger, nullable=False)  # Min price in the sell region
+    buy_price_tokens = Column(Float, nullable=False)  # Prices divided by each region's token price
+    sell_price_tokens = Column(Float, nullable=False)
+    spread_tokens = Column(Float, nullable=False)  # Per unit, after the AH cut
+    spread_pct = Column(Float, nullable=False)  # Spread relative to the buy price
+    available_quantity = Column(BigInteger)  # Listed quantity in the buy region
+    sell_volume = Column(Integer)  # Estimated sales in the sell region last snapshot
+    tradable_quantity = Column(BigInteger)  # min(available_quantity, sell_volume)
+    score = Column(Float, nullable=False)  # spread_tokens * tradable_quantity
+    computed_at = Column(DateTime, nullable=False)
+
+
+class ArbitrageScan(Base):
+    """Snapshot of each region the last arbitrage scan was computed from"""
+    __tablename__ = "arbitrage_scans"
+
+    region = Column(String(2), primary_key=True)
+    snapshot_time = Column(DateTime, nullable=False)  # Latest snapshot at scan time
+    scanned_at = Column(DateTime, nullable=False)  # Written even when nothing was found
+
+
+class MarketEvent(Base):
+    """Anomalous price, sales or supply change flagged by the streaming detector"""
+    __tablename__ = "market_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    region = Column(String(2), nullable=False)
+    item_id = Column(Integer, nullable=False)
+    snapshot_time = Column(DateTime, nullable=False)
+    event_type = Column(String(20), nullable=False)  # 'price_spike', 'reset', ...
+    severity = Column(Float, nullable=False)  # Largest absolute z-score involved
+    level = Column(String(10), nullable=False)  # 'low', 'medium' or 'high'
+    observed_value = Column(Float)
+    expected_value = Column(Float)  # Exponentially weighted mean before the snapshot
+    zscore = Column(Float)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class SchedulerLease(Base):
+    """Time-limited ownership of a piece of scheduler work by one replica"""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(100), primary_key=True)  # 'leader', 'region:eu', 'replica:<id>'
+    holder = Column(String(100), nullable=False)  # Replica ID of the owner
+    acquired_at = Column(DateTime, nullable=False)
+    renewed_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)  # Free for the taking after this (UTC)
+
+
+class ApiBudgetBucket(Base):
+    """Blizzard API token bucket shared by every scheduler and job worker process"""
+    __tablename__ = "api_budget"
+
+    name = Column(String(50), primary_key=True)
+    tokens = Column(Float, nullable=False)  # Tokens left as of refilled_at
+    refilled_at = Column(DateTime, nullable=False)  # Database clock (UTC)
+
+
+class Job(Base):
+    """Unit of background work claimed by job workers"""
+    __tablename__ = "jobs"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    job_type = Column(String(50), nullable=False)  # Key into jobs.handlers.JOB_HANDLERS
+    payload = Column(JSON, nullable=False)
+    priority = Column(Integer, nullable=False, default=100)  # Lower runs first
+    status = Column(String(20), nullable=False, default="queued")  # 'queued', 'running', 'succeeded', 'failed', 'superseded'
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    dedupe_key = Column(String(200), nullable=True)  # At most one queued job per key
+    run_after = Column(DateTime, nullable=False)  # Not claimed before this (UTC)
+    locked_by = Column(String(100), nullable=True)  # Worker running the job
+    lease_expires_at = Column(DateTime, nullable=True)  # Requeued if not renewed by then
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
 
 
 class SeederStatus(Base):
@@ -113,6 +275,8 @@ class SeederStatus(Base):
     seeder_type = Column(String(50), primary_key=True)
     completed = Column(Boolean, nullable=False, default=False)
     completed_at = Column(DateTime, nullable=True)
+    # Checkpoint of an unfinished run, e.g. professions done or the next item ID
+    progress = Column(JSON(none_as_null=True), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
@@ -154,17 +318,8 @@ class Benchmark(Base):
     created_at = Column(DateTime, server_default=func.now())
 
 
-class EUTokenPrice(Base):
-    """Tracks WoW Token prices in the EU region over time"""
-    __tablename__ = "eu_token_price"
-
-    timestamp = Column(DateTime, primary_key=True, nullable=False, server_default=func.now())
-    price = Column(BigInteger, nullable=False)
-
-
-class USTokenPrice(Base):
-    """Tracks WoW Token prices in the US region over time"""
-    __tablename__ = "us_token_price"
+class TokenPriceColumns:
+    """Tracks WoW Token prices in a region over time"""
 
     timestamp = Column(DateTime, primary_key=True, nullable=False, server_default=func.now())
     price = Column(BigInteger, nullable=False)
@@ -182,3 +337,58 @@ class Item(Base):
     is_equippable = Column(Boolean, nullable=False, default=False)
     is_stackable = Column(Boolean, nullable=False, default=False)
     quality = Column(String(10), nullable=False)
+
+
+@dataclass(frozen=True)
+class RegionTables:
+    """The partitioned tables holding one region's market data"""
+
+    region: str
+    auction_snapshot: type
+    commodity_price_stats: type
+    token_price: type
+
+
+def _create_region_tables(region: str) -> RegionTables:
+    """Map the per-region tables created by create_region_tables() in init.sql."""
+    suffix = region.upper()
+    return RegionTables(
+        region=region,
+        auction_snapshot=type(
+            f"AuctionSnapshot{suffix}",
+            (AuctionSnapshotColumns, Base),
+            {"__tablename__": f"auction_snapshots_{region}"},
+        ),
+        commodity_price_stats=type(
+            f"{suffix}CommodityPriceStats",
+            (CommodityPriceStatsColumns, Base),
+            {"__tablename__": f"{region}_commodity_price_stats"},
+        ),
+        token_price=type(
+            f"{suffix}TokenPrice",
+            (TokenPriceColumns, Base),
+            {"__tablename__": f"{region}_token_price"},
+        ),
+    )
+
+
+# Every region the service can collect; each gets its own set of tables
+SUPPORTED_REGIONS = ("eu", "us", "kr", "tw")
+
+_REGION_TABLES = {region: _create_region_tables(region) for region in SUPPORTED_REGIONS}
+
+
+def get_region_tables(region: str) -> RegionTables:
+    """Get the mapped tables for a region."""
+    try:
+        return _REGION_TABLES[region]
+    except KeyError:
+        raise ValueError(f"Unsupported region: {region}") from None
+
+
+AuctionSnapshotEU = get_region_tables("eu").auction_snapshot
+AuctionSnapshotUS = get_region_tables("us").auction_snapshot
+EUCommodityPriceStats = get_region_tables("eu").commodity_price_stats
+USCommodityPriceStats = get_region_tables("us").commodity_price_stats
+EUTokenPrice = get_region_tables("eu").token_price
+USTokenPrice = get_region_tables("us").token_price
@@ -0,0 +1,64 @@
+import math
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.models import ApiBudgetBucket
+
+# Wall clock rather than now(), which is frozen at the start of a transaction
+# that may have waited for the row lock
+DB_CLOCK_UTC = func.timezone("utc", func.clock_timestamp())
+
+
+class ApiBudgetRepository:
+    """Token bucket rows in api_budget, refilled on the database clock."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def take(
+        self,
+        name: str,
+        requests_per_second: float,
+        burst: float,
+        floor: float,
+        count: int = 1,
+    ) -> tuple[int, float]:
+        """Take up to count tokens while more than floor are left after
+        refilling (no commit).
+
+        The bucket row stays locked until the caller's transaction ends, so
+        concurrent processes take tokens one after another.
+
+        Returns:
+            (tokens taken, how many tokens short the bucket is when none
+            could be taken)
+        """
+        now = DB_CLOCK_UTC.label("now")
+        elapsed = func.extract("epoch", now - ApiBudgetBucket.refilled_at)
+        query = (
+            select(
+                func.least(burst, ApiBudgetBucket.tokens + elapsed * requests_per_second),
+                now,
+            )
+            .where(ApiBudgetBucket.name == name)
+            .with_for_update()
+        )
+        row = self.session.execute(query).first()
+        if row is None:
+            self.session.execute(
+                insert(ApiBudgetBucket)
+                .values(name=name, tokens=burst, refilled_at=DB_CLOCK_UTC)
+                .on_conflict_do_nothing(index_elements=[ApiBudgetBucket.name])
+            )
+            row = self.session.execute(query).one()
+        tokens, refilled_at = row
+
+        taken = max(0, min(count, math.floor(tokens - floor)))
+        self.session.execute(
+            update(ApiBudgetBucket)
+            .where(ApiBudgetBucket.name == name)
+            .values(tokens=tokens - taken, refilled_at=refilled_at)
+        )
+        return taken, 0.0 if taken else floor + 1 - tokens
@@ -0,0 +1,102 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.models import get_region_tables
+from repository.snapshot_catalog_repository import SnapshotCatalogRepository
+
+
+class AuctionRepository:
+    def __init__(self, session: Session, region: str):
+        self.session = session
+        self.region = region
+        self.model = get_region_tables(region).auction_snapshot
+
+    def batch_insert(self, values, chunk_size=5000):
+        """Insert multiple records into the region's auction table in chunks."""
+        if not values:
+            return
+
+        # Process in chunks to avoid database limits (increased from 1000 to 5000)
+        for i in range(0, len(values), chunk_size):
+            chunk = values[i : i + chunk_size]
+            stmt = insert(self.model).values(chunk)
+            stmt = stmt.on_conflict_do_nothing()
+            self.session.execute(stmt)
+
+    def get_snapshot(self, timestamp):
+        """Get auction snapshot for specific timestamp."""
+        try:
+            # Resolve the closest snapshot before timestamp via the catalog
+            snapshot_data = SnapshotCatalogRepository(
+                self.session
+            ).get_closest_before(self.region, timestamp)
+
+            if not snapshot_data:
+                return {}
+
+            # Fetch all auctions for the snapshot time
+            auctions = (
+                self.session.query(
+                    self.model.auction_id,
+                    self.model.item_id,
+                    self.model.quantity,
+                    self.model.unit_price,
+                    self.model.time_left,
+                )
+                .filter(self.model.snapshot_time == snapshot_data.snapshot_time)
+                .all()
+            )
+
+            # Convert SQLAlchemy result to list of dictionaries
+            snapshot = [
+                {
+                    "id": auction.auction_id,
+                    "item_id": auction.item_id,
+                    "quantity": auction.quantity,
+                    "unit_price": auction.unit_price,
+                    # Stored as the single-character time-left code
+                    "time_left": int(auction.time_left),
+                }
+                for auction in auctions
+            ]
+            return snapshot
+        except Exception as e:
+            print(f"Error retrieving {self.region.upper()} snapshot: {e}")
+            return None
+
+    def iter_snapshot_items(self, snapshot_time, batch_size=10000):
+        """Stream a snapshot's auctions grouped by item, in item_id order.
+
+        Rows are fetched through a server-side cursor, so only one item's
+        auctions (plus one fetch batch) are held at a time.
+
+        Yields:
+            (item_id, auction dictionaries) per item
+        """
+        result = self.session.execute(
+            select(
+                self.model.auction_id,
+                self.model.item_id,
+                self.model.quantity,
+                self.model.unit_price,
+                self.model.time_left,
+            )
+            .where(self.model.snapshot_time == snapshot_time)
+            .order_by(self.model.item_id),
+            execution_options={"yield_per": batch_size},
+        )
+        item_id, auctions = None, []
+        for row in result:
+            if row.item_id != item_id:
+                if auctions:
+                    yield item_id, auctions
+                item_id, auctions = row.item_id, []
+            auctions.append({
+                "id": row.auction_id,
+                "quantity": row.quantity,
+                "unit_price": row.unit_price,
+                "time_left": int(row.time_left),
+            })
+        if auctions:
+            yield item_id, auctions
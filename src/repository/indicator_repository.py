@@ -0,0 +1,54 @@
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.models import MarketIndicator
+
+INDICATOR_COLUMNS = tuple(
+    column.name
+    for column in MarketIndicator.__table__.columns
+    if column.name not in ("region", "item_id")
+)
+
+
+class IndicatorRepository:
+    """Reads and in-place updates of per-item running indicator state."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_states(self, region: str) -> dict[int, dict[str, Any]]:
+        """Get every item's indicator state in a region as {item_id: column values}."""
+        table = MarketIndicator.__table__
+        rows = self.session.execute(
+            table.select().where(table.c.region == region)
+        ).mappings()
+        return {row["item_id"]: dict(row) for row in rows}
+
+    def get_indicator(self, region: str, item_id: int) -> MarketIndicator | None:
+        """Get one item's indicators."""
+        return self.session.get(MarketIndicator, (region, item_id))
+
+    def upsert_states(
+        self, region: str, states: list[dict[str, Any]], chunk_size: int = 2000
+    ) -> None:
+        """Write updated indicator states (no commit).
+
+        Args:
+            region: Region code
+            states: Rows with item_id and the INDICATOR_COLUMNS
+            chunk_size: Rows per statement
+        """
+        table = MarketIndicator.__table__
+        for i in range(0, len(states), chunk_size):
+            chunk = [
+                {"region": region, **state} for state in states[i : i + chunk_size]
+            ]
+            stmt = insert(table).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.region, table.c.item_id],
+                set_={column: stmt.excluded[column] for column in INDICATOR_COLUMNS},
+                where=table.c.updated_at < stmt.excluded.updated_at,
+            )
+            self.session.execute(stmt)
@@ -0,0 +1,209 @@
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import and_, case, delete, exists, func, select, text, true, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, aliased
+
+from models.models import Job
+from repository.lease_repository import DB_NOW_UTC
+
+# NOTIFY channel announcing newly queued jobs, payload is the job type
+JOB_CHANNEL = "jobs_enqueued"
+
+
+class JobRepository:
+    """Enqueueing, claiming and settling rows of the jobs queue.
+
+    Workers claim with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+    them can poll the queue without blocking on each other. A claimed job is
+    leased to its worker; a job whose lease runs out is put back in the
+    queue (or failed once out of attempts).
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: dict[str, Any],
+        priority: int = 100,
+        max_attempts: int = 3,
+        dedupe_key: str | None = None,
+        delay_seconds: float = 0.0,
+    ) -> int | None:
+        """Queue a job in the caller's transaction (no commit).
+
+        Also queues a NOTIFY on JOB_CHANNEL, delivered to idle workers once
+        the transaction commits.
+
+        Returns:
+            The job ID, or None when a job with the same dedupe_key is
+            already waiting in the queue
+        """
+        table = Job.__table__
+        stmt = (
+            insert(table)
+            .values(
+                job_type=job_type,
+                payload=payload,
+                priority=priority,
+                max_attempts=max_attempts,
+                dedupe_key=dedupe_key,
+                run_after=DB_NOW_UTC + timedelta(seconds=delay_seconds),
+            )
+            .on_conflict_do_nothing(
+                index_elements=[table.c.dedupe_key],
+                index_where=table.c.status == "queued",
+            )
+            .returning(table.c.id)
+        )
+        job_id = self.session.execute(stmt).scalar()
+        if job_id is not None:
+            self.session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": JOB_CHANNEL, "payload": job_type},
+            )
+        return job_id
+
+    def claim(
+        self, worker_id: str, lease_seconds: float, job_types: list[str] | None = None
+    ) -> Row | None:
+        """Lease the most urgent runnable job to a worker (no commit).
+
+        Returns:
+            (id, job_type, payload, attempts, max_attempts) of the claimed
+            job, or None when nothing is runnable
+        """
+        candidate = (
+            select(Job.id)
+            .where(Job.status == "queued", Job.run_after <= DB_NOW_UTC)
+            .order_by(Job.priority, Job.run_after, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if job_types:
+            candidate = candidate.where(Job.job_type.in_(job_types))
+        return self.session.execute(
+            update(Job)
+            .where(Job.id == candidate.scalar_subquery())
+            .values(
+                status="running",
+                locked_by=worker_id,
+                attempts=Job.attempts + 1,
+                started_at=DB_NOW_UTC,
+                lease_expires_at=DB_NOW_UTC + timedelta(seconds=lease_seconds),
+            )
+            .returning(Job.id, Job.job_type, Job.payload, Job.attempts, Job.max_attempts)
+        ).first()
+
+    def extend_lease(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        """Push a running job's lease out (no commit); False if the worker lost it."""
+        result = self.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running")
+            .values(lease_expires_at=DB_NOW_UTC + timedelta(seconds=lease_seconds))
+        )
+        return result.rowcount > 0
+
+    def complete(self, job_id: int, worker_id: str) -> bool:
+        """Mark a job the worker still holds as succeeded (no commit)."""
+        result = self.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running")
+            .values(
+                status="succeeded",
+                locked_by=None,
+                lease_expires_at=None,
+                finished_at=DB_NOW_UTC,
+            )
+        )
+        return result.rowcount > 0
+
+    def _retry_values(
+        self, error: str, retry_delay_seconds: float, give_up: bool = False
+    ) -> dict[str, Any]:
+        # A retry that would collide with a newer queued copy of the same job
+        # is dropped in its favour
+        newer = aliased(Job)
+        superseded = and_(
+            Job.dedupe_key.is_not(None),
+            exists().where(
+                newer.dedupe_key == Job.dedupe_key,
+                newer.status == "queued",
+                newer.id != Job.id,
+            ),
+        )
+        out_of_attempts = true() if give_up else Job.attempts >= Job.max_attempts
+        return {
+            "status": case(
+                (out_of_attempts, "failed"), (superseded, "superseded"), else_="queued"
+            ),
+            "run_after": DB_NOW_UTC + timedelta(seconds=retry_delay_seconds),
+            "locked_by": None,
+            "lease_expires_at": None,
+            "last_error": error[:2000],
+            "finished_at": case(
+                (out_of_attempts, DB_NOW_UTC), (superseded, DB_NOW_UTC), else_=None
+            ),
+        }
+
+    def fail(
+        self,
+        job_id: int,
+        worker_id: str,
+        error: str,
+        retry_delay_seconds: float,
+        give_up: bool = False,
+    ) -> bool:
+        """Requeue a failed job after a delay, or fail it for good (no commit).
+
+        The job fails for good once out of attempts, or at once with give_up.
+        """
+        result = self.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running")
+            .values(**self._retry_values(error, retry_delay_seconds, give_up))
+        )
+        return result.rowcount > 0
+
+    def requeue_expired(self) -> int:
+        """Return jobs whose worker stopped renewing their lease to the queue (no commit)."""
+        result = self.session.execute(
+            update(Job)
+            .where(Job.status == "running", Job.lease_expires_at < DB_NOW_UTC)
+            .values(**self._retry_values("Lease expired before the job finished", 0.0))
+        )
+        return result.rowcount
+
+    def purge_finished(self, older_than_days: float) -> int:
+        """Delete finished jobs older than the retention period (no commit)."""
+        result = self.session.execute(
+            delete(Job).where(
+                Job.status.in_(("succeeded", "failed", "superseded")),
+                Job.finished_at < DB_NOW_UTC - timedelta(days=older_than_days),
+            )
+        )
+        return result.rowcount
+
+    def has_running(self, job_type: str) -> bool:
+        """Whether a worker holds a live lease on a job of this type."""
+        return self.session.execute(
+            select(
+                exists().where(
+                    Job.job_type == job_type,
+                    Job.status == "running",
+                    Job.lease_expires_at >= DB_NOW_UTC,
+                )
+            )
+        ).scalar_one()
+
+    def counts_by_status(self) -> dict[str, int]:
+        """Number of jobs in each status."""
+        return dict(
+            self.session.execute(
+                select(Job.status, func.count()).group_by(Job.status)
+            ).all()
+        )
@@ -0,0 +1,129 @@
+from typing import Any
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.models import LatestCommodityPrice
+
+STAT_COLUMNS = (
+    "min_price",
+    "max_price",
+    "mean_price",
+    "median_price",
+    "total_quantity",
+    "num_auctions",
+    "estimated_sales",
+    "estimated_relisted",
+    "estimated_expired",
+    "new_listings",
+)
+
+
+class LatestPriceRepository:
+    """Current-market reads and in-place updates of latest_commodity_prices."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def upsert_stats(
+        self, region: str, stats_values: list[dict[str, Any]], chunk_size: int = 2000
+    ) -> None:
+        """Upsert one snapshot's commodity stats rows, shifting the old values to previous_*.
+
+        Rows of items absent from the snapshot are deleted in the same
+        transaction, so a sold-out item does not keep its last price and
+        readers never need to filter on snapshot_time. An empty snapshot
+        (almost always a failed download rather than an empty market) is
+        skipped and leaves the table as it was.
+
+        Args:
+            region: Region code
+            stats_values: Rows as inserted into the region's commodity price
+                stats table (item_id, timestamp and the STAT_COLUMNS)
+            chunk_size: Rows per statement
+        """
+        if not stats_values:
+            # Keep the last known market rather than wiping the region
+            return
+
+        table = LatestCommodityPrice.__table__
+        for i in range(0, len(stats_values), chunk_size):
+            chunk = [
+                {
+                    "region": region,
+                    "item_id": row["item_id"],
+                    "snapshot_time": row["timestamp"],
+                    **{column: row.get(column) for column in STAT_COLUMNS},
+                }
+                for row in stats_values[i : i + chunk_size]
+            ]
+            stmt = insert(table).values(chunk)
+            new = stmt.excluded
+            # SET expressions read the row as it was before the update
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.region, table.c.item_id],
+                set_={
+                    "snapshot_time": new.snapshot_time,
+                    **{column: new[column] for column in STAT_COLUMNS},
+                    "previous_snapshot_time": table.c.snapshot_time,
+                    "previous_min_price": table.c.min_price,
+                    "previous_median_price": table.c.median_price,
+                    "previous_total_quantity": table.c.total_quantity,
+                    "previous_estimated_sales": table.c.estimated_sales,
+                    "min_price_change": new.min_price - table.c.min_price,
+                    "median_price_change": new.median_price - table.c.median_price,
+                    "total_quantity_change": (
+                        new.total_quantity - table.c.total_quantity
+                    ),
+                },
+                where=table.c.snapshot_time < new.snapshot_time,
+            )
+            self.session.execute(stmt)
+
+        self.session.execute(
+            delete(table).where(
+                table.c.region == region,
+                table.c.snapshot_time < stats_values[0]["timestamp"],
+            )
+        )
+
+    def get_latest_price(self, region: str, item_id: int) -> LatestCommodityPrice | None:
+        """Get the current market row for one item."""
+        return self.session.get(LatestCommodityPrice, (region, item_id))
+
+    def get_latest_prices(
+        self, region: str, item_ids: list[int]
+    ) -> list[LatestCommodityPrice]:
+        """Get the current market rows for a watchlist of items."""
+        if not item_ids:
+            return []
+        return (
+            self.session.query(LatestCommodityPrice)
+            .filter(
+                LatestCommodityPrice.region == region,
+                LatestCommodityPrice.item_id.in_(item_ids),
+            )
+            .all()
+        )
+
+    def get_region_prices(self, region: str) -> list[LatestCommodityPrice]:
+        """Get the current market rows for every item in a region."""
+        return (
+            self.session.query(LatestCommodityPrice)
+            .filter(LatestCommodityPrice.region == region)
+            .all()
+        )
+
+    def get_price_map(self, region: str, column: str = "min_price") -> dict[int, float]:
+        """Get one current stat for every item in a region as {item_id: value}."""
+        if column not in STAT_COLUMNS:
+            raise ValueError(f"Unknown price column: {column}")
+        rows = (
+            self.session.query(
+                LatestCommodityPrice.item_id, getattr(LatestCommodityPrice, column)
+            )
+            .filter(LatestCommodityPrice.region == region)
+            .all()
+        )
+        return {item_id: value for item_id, value in rows if value is not None}
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.models import SchedulerLease
+
+# Lease times come from the database clock, so replicas with skewed clocks agree
+DB_NOW_UTC = func.timezone("utc", func.now())
+
+
+class LeaseRepository:
+    """Acquisition, renewal and release of scheduler_leases rows."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def try_acquire(self, name: str, holder: str, ttl_seconds: float) -> bool:
+        """Take or renew a lease (no commit).
+
+        Succeeds when the lease is free, expired or already held by holder;
+        renewing keeps the original acquired_at.
+
+        Returns:
+            True if holder owns the lease until now + ttl_seconds
+        """
+        table = SchedulerLease.__table__
+        stmt = insert(table).values(
+            name=name,
+            holder=holder,
+            acquired_at=DB_NOW_UTC,
+            renewed_at=DB_NOW_UTC,
+            expires_at=DB_NOW_UTC + timedelta(seconds=ttl_seconds),
+        )
+        new = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={
+                "holder": new.holder,
+                "acquired_at": case(
+                    (table.c.holder == new.holder, table.c.acquired_at),
+                    else_=new.acquired_at,
+                ),
+                "renewed_at": new.renewed_at,
+                "expires_at": new.expires_at,
+            },
+            where=(table.c.holder == new.holder) | (table.c.expires_at < new.renewed_at),
+        ).returning(table.c.holder)
+        return self.session.execute(stmt).first() is not None
+
+    def release(self, name: str, holder: str) -> None:
+        """Give up a lease if holder still owns it (no commit)."""
+        self.session.execute(
+            delete(SchedulerLease).where(
+                SchedulerLease.name == name, SchedulerLease.holder == holder
+            )
+        )
+
+    def count_live(self, prefix: str) -> int:
+        """Number of unexpired leases whose name starts with prefix."""
+        return self.session.execute(
+            select(func.count())
+            .select_from(SchedulerLease)
+            .where(SchedulerLease.name.startswith(prefix), SchedulerLease.expires_at >= DB_NOW_UTC)
+        ).scalar_one()
+
+    def lock_if_held(self, name: str, holder: str) -> bool:
+        """Check holder still owns an unexpired lease and pin it until commit.
+
+        The row is locked FOR SHARE, so no other replica can take the lease
+        over before the calling transaction ends.
+        """
+        return (
+            self.session.execute(
+                select(SchedulerLease.name)
+                .where(
+                    SchedulerLease.name == name,
+                    SchedulerLease.holder == holder,
+                    SchedulerLease.expires_at >= DB_NOW_UTC,
+                )
+                .with_for_update(read=True)
+            ).first()
+            is not None
+        )
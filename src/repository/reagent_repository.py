@@ -1,5 +1,6 @@
 from typing import Any
 
+from sqlalchemy import BigInteger, cast, func, select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
@@ -80,3 +81,26 @@ class ReagentRepository:
             .filter(Reagent.recipe_id == recipe_id, Reagent.optional == False)
             .all()
         )
+
+    def get_all_required_reagents(self) -> list[Reagent]:
+        """Get the required (non-optional) reagents of every recipe."""
+        return self.session.query(Reagent).filter(Reagent.optional.is_(False)).all()
+
+    def fingerprint(self) -> tuple:
+        """Row count and an order-independent hash of every reagent row.
+
+        Changes whenever a reagent is added, removed or edited, so cached
+        views of the table can tell when to rebuild.
+        """
+        row = func.concat_ws(
+            ":", Reagent.recipe_id, Reagent.faction, Reagent.item_id,
+            Reagent.quantity, Reagent.optional,
+        )
+        return tuple(
+            self.session.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.sum(cast(func.hashtext(row), BigInteger)), 0),
+                )
+            ).one()
+        )
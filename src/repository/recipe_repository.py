@@ -1,5 +1,6 @@
 from typing import Any
 
+from sqlalchemy import BigInteger, cast, func, select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
@@ -42,3 +43,21 @@ class RecipeRepository:
             .filter(Recipe.id == recipe_id, Recipe.faction == faction)
             .first()
         ) is not None
+
+    def get_all_recipes(self) -> list[Recipe]:
+        """Get every recipe (all professions and factions)."""
+        return self.session.query(Recipe).all()
+
+    def fingerprint(self) -> tuple:
+        """Row count, an order-independent hash of every recipe row and the
+        newest updated_at; changes whenever recipes are added or edited."""
+        row = func.concat_ws(":", Recipe.id, Recipe.faction, Recipe.crafted_item_id)
+        return tuple(
+            self.session.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.sum(cast(func.hashtext(row), BigInteger)), 0),
+                    func.max(Recipe.updated_at),
+                )
+            ).one()
+        )
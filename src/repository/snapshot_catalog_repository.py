@@ -0,0 +1,93 @@
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.models import SnapshotCatalog
+
+# NOTIFY channel announcing committed snapshots as "<region>|<snapshot ISO time>"
+SNAPSHOT_CHANNEL = "snapshot_committed"
+
+
+class SnapshotCatalogRepository:
+    """Resolves snapshot times per region without scanning the partitioned tables.
+
+    Lookups walk the (region, snapshot_time) primary key backwards and stop at
+    the first row, so they stay constant-time as snapshot history grows.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def record_snapshot(
+        self,
+        region: str,
+        snapshot_time: datetime,
+        last_modified: datetime | None,
+        row_count: int,
+        item_count: int,
+        ingest_duration_seconds: float | None = None,
+    ) -> None:
+        """Add a catalog entry in the caller's transaction (no commit).
+
+        Also queues a NOTIFY on SNAPSHOT_CHANNEL, which PostgreSQL delivers to
+        listeners only once the transaction commits.
+        """
+        stmt = insert(SnapshotCatalog).values(
+            region=region,
+            snapshot_time=snapshot_time,
+            last_modified=last_modified,
+            row_count=row_count,
+            item_count=item_count,
+            ingest_duration_seconds=ingest_duration_seconds,
+        )
+        stmt = stmt.on_conflict_do_nothing()
+        self.session.execute(stmt)
+        self.session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {
+                "channel": SNAPSHOT_CHANNEL,
+                "payload": f"{region}|{snapshot_time.isoformat()}",
+            },
+        )
+
+    def get_latest(self, region: str) -> SnapshotCatalog | None:
+        """Get the most recent catalog entry for a region."""
+        return (
+            self.session.query(SnapshotCatalog)
+            .filter(SnapshotCatalog.region == region)
+            .order_by(SnapshotCatalog.snapshot_time.desc())
+            .limit(1)
+            .first()
+        )
+
+    def get_closest_before(
+        self, region: str, timestamp: datetime
+    ) -> SnapshotCatalog | None:
+        """Get the latest catalog entry at or before the given timestamp."""
+        return (
+            self.session.query(SnapshotCatalog)
+            .filter(
+                SnapshotCatalog.region == region,
+                SnapshotCatalog.snapshot_time <= timestamp,
+            )
+            .order_by(SnapshotCatalog.snapshot_time.desc())
+            .limit(1)
+            .first()
+        )
+
+    def get_between(
+        self, region: str, start: datetime, end: datetime
+    ) -> list[SnapshotCatalog]:
+        """Get a region's catalog entries from start to end inclusive, oldest first."""
+        return (
+            self.session.query(SnapshotCatalog)
+            .filter(
+                SnapshotCatalog.region == region,
+                SnapshotCatalog.snapshot_time >= start,
+                SnapshotCatalog.snapshot_time <= end,
+            )
+            .order_by(SnapshotCatalog.snapshot_time)
+            .all()
+        )
@@ -0,0 +1,32 @@
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models.models import get_region_tables
+
+
+class TokenPriceRepository:
+    """Reads and bulk writes of a region's WoW Token price history."""
+
+    def __init__(self, session: Session, region: str):
+        self.session = session
+        self.region = region
+        self.model = get_region_tables(region).token_price
+
+    def get_latest(self):
+        """Get the most recent token price row, or None if none was recorded."""
+        return (
+            self.session.query(self.model)
+            .order_by(self.model.timestamp.desc())
+            .limit(1)
+            .first()
+        )
+
+    def bulk_insert(self, rows: list[dict[str, Any]]) -> None:
+        """Insert (timestamp, price) rows, skipping timestamps already stored (no commit)."""
+        if not rows:
+            return
+        self.session.execute(
+            insert(self.model.__table__).values(rows).on_conflict_do_nothing()
+        )
@@ -1,184 +1,439 @@
-from datetime import UTC, datetime, timedelta
+import contextvars
+import logging
+import os
+import time
+import tracemalloc
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
 
 from scraper.blizzard_api_utils import BlizzardAPI
 from sqlalchemy.orm import Session
 
-from models.models import EUTokenPrice, USTokenPrice
-from repository.auction_repository_eu import AuctionRepositoryEU
-from repository.auction_repository_us import AuctionRepositoryUS
+from analytics.anomaly_detector import AnomalyDetector
+from analytics.depth_index import DepthIndex, get_depth_store
+from analytics.indicators import IndicatorEngine
+from analytics.quantile_sketch import TDigest
+from models.models import get_region_tables
+from repository.auction_repository import AuctionRepository
+from repository.database import db_session
+from repository.latest_price_repository import LatestPriceRepository
+from repository.snapshot_catalog_repository import SnapshotCatalogRepository
+from utils.auction_stream import AuctionStreamSplitter
 from utils.auction_utils import (
+    TIME_LEFT_CODES,
+    calculate_commodity_stats,
+    classify_disappeared_auctions,
     count_new_listings,
-    estimate_sales,
+    group_snapshot_rows,
+    snapshot_rows,
 )
-from utils.benchmark import BenchmarkManager
+from utils.metrics import (
+    COLLECTION_SECONDS,
+    COMMIT_SECONDS,
+    INGEST_ROWS_INSERTED,
+    INGEST_ROWS_PARSED,
+    INGEST_STAGE_SECONDS,
+    LAST_SNAPSHOT_TIMESTAMP,
+    PUBLISH_TO_INGEST_LAG,
+)
+from utils.memory_budget import MemoryBudget, payload_size, top_allocations
+from utils.pipeline import Pipeline
+from utils.tracing import Span, get_tracer, span
 
 
 class AuctionCollector:
     def __init__(
         self,
         session: Session,
-        api: BlizzardAPI,
-        repository: AuctionRepositoryEU | AuctionRepositoryUS,
+        api: BlizzardAPI | None,
+        repository: AuctionRepository,
+        fence: Callable[[Session], None] | None = None,
     ):
         self.repository = repository
+        # Called in the snapshot's transaction just before it is committed;
+        # raises to abort when this replica no longer owns the region
+        self.fence = fence
         self.session = session
         self.api = api
-        self.TIME_LEFT_CODES = {
-            "SHORT": 1,  # <0.5 hours
-            "MEDIUM": 2,  # 0.5 - 2 hours
-            "LONG": 3,  # 2 - 12 hours
-            "VERY_LONG": 4,  # 12 - 48 hours
-        }
+        self.TIME_LEFT_CODES = TIME_LEFT_CODES
+        self.parse_workers = int(os.getenv("INGEST_PARSE_WORKERS", "2"))
+        self.queue_size = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
+        self.chunk_bytes = int(os.getenv("INGEST_CHUNK_BYTES", str(1024 * 1024)))
+        self.memory_budget = MemoryBudget.from_env()
+        self.low_memory_chunk_items = int(os.getenv("LOW_MEMORY_CHUNK_ITEMS", "500"))
+        self.logger = logging.getLogger(__name__)
         
     def get_last_collection_time(self, region: str) -> datetime | None:
-        """Get the timestamp of the last commodity price stats collection for the region"""
-        from sqlalchemy import func, text
-        table = "eu_commodity_price_stats" if region == "eu" else "us_commodity_price_stats"
-        result = self.session.execute(
-            text(f"SELECT MAX(timestamp AT TIME ZONE 'UTC') FROM {table}")
-        ).scalar()
-        if result:
-            # Ensure the timestamp is UTC-aware
-            return datetime.fromisoformat(str(result)).replace(tzinfo=UTC)
+        """Get the timestamp of the last committed snapshot for the region"""
+        latest = SnapshotCatalogRepository(self.session).get_latest(region)
+        if latest:
+            # Catalog times are stored as naive UTC
+            return latest.snapshot_time.replace(tzinfo=UTC)
         return None
 
 
 
-    def collect_snapshot_for_region(self, auction_model):
-        """Collect and store current auction house data for specific region model"""
-        benchmark_manager = BenchmarkManager(self.session)
-        
-        # Get commodities data from API (check cache first to avoid double requests)
-        commodities = self.api.get_cached_commodities_if_fresh()
-        last_modified = None
-        
-        # Determine region from repository type
-        region = 'eu' if isinstance(self.repository, AuctionRepositoryEU) else 'us'
-        
-        if commodities is None:
-            # Get fresh data with headers to capture Last-Modified
-            commodities, headers = self.api.get_commodities(return_headers=True)
-            
-            # Extract Last-Modified timestamp
-            last_modified_str = headers.get("Last-Modified")
-            if last_modified_str:
-                try:
-                    last_modified = datetime.strptime(
-                        last_modified_str, "%a, %d %b %Y %H:%M:%S %Z"
-                    ).replace(tzinfo=UTC)
-                except Exception:
-                    last_modified = datetime.now(UTC)
-            else:
-                last_modified = datetime.now(UTC)
-        else:
-            # Using cached data, return current time as best estimate
-            last_modified = datetime.now(UTC)
-            
-        snapshot_time = datetime.now(UTC)
+    def _parse_last_modified(self, headers) -> datetime:
+        last_modified_str = headers.get("Last-Modified")
+        if last_modified_str:
+            try:
+                return datetime.strptime(
+                    last_modified_str, "%a, %d %b %Y %H:%M:%S %Z"
+                ).replace(tzinfo=UTC)
+            except Exception:
+                pass
+        return datetime.now(UTC)
 
-        # Prepare batch insert
-        values = [
-            {
-                "auction_id": auction["id"],
-                "item_id": auction["item"]["id"],
-                "unit_price": auction["unit_price"],
-                "quantity": auction["quantity"],
-                "time_left": self.TIME_LEFT_CODES[auction["time_left"]],
-                "snapshot_time": snapshot_time,
-            }
-            for auction in commodities["auctions"]
-        ]
-
-        # Database insertion
-        self.repository.batch_insert(auction_model, values)
-        
-        # Process commodity statistics
-        from models.models import EUCommodityPriceStats, USCommodityPriceStats
-        from utils.auction_utils import calculate_commodity_stats
-        
-        # Get previous snapshot for comparison
-        region = 'eu' if isinstance(self.repository, AuctionRepositoryEU) else 'us'
-        last_collection_time = self.get_last_collection_time(region)
-        previous_snapshot = self.get_snapshot(last_collection_time) if last_collection_time else None
-        
-        # Group previous snapshot data by item_id
+    def _fetch_previous_snapshot(self, region: str) -> dict[int, list[dict]]:
+        """Load the last committed snapshot grouped by item_id.
+
+        Runs on its own session so it can overlap the download and load.
+        """
         previous_by_item = {}
-        if previous_snapshot:
-            for prev_auction in previous_snapshot:  # previous_snapshot is now a list of dicts
-                item_id = prev_auction["item_id"]
-                if item_id not in previous_by_item:
-                    previous_by_item[item_id] = []
-                previous_by_item[item_id].append({
+        with span("previous_snapshot_load"), db_session() as session:
+            latest = SnapshotCatalogRepository(session).get_latest(region)
+            if not latest:
+                return previous_by_item
+            last_collection_time = latest.snapshot_time.replace(tzinfo=UTC)
+            previous_snapshot = AuctionRepository(session, region).get_snapshot(
+                last_collection_time
+            )
+            for prev_auction in previous_snapshot or []:
+                previous_by_item.setdefault(prev_auction["item_id"], []).append({
                     "id": prev_auction["id"],
                     "quantity": prev_auction["quantity"],
+                    "unit_price": prev_auction["unit_price"],
                     "time_left": prev_auction["time_left"]
                 })
-        
-        # Group current auctions by item_id
-        item_auctions = {}
+        return previous_by_item
+
+    def _run_ingest_pipeline(
+        self, chunks, snapshot_time: datetime, low_memory: bool = False
+    ) -> tuple[int, dict]:
+        """Stream the commodities document into the snapshot table.
+
+        Stages:
+            split - cut the raw byte stream into batches of whole auctions
+            parse - decode batches and map them to snapshot rows (parallel)
+            insert - insert rows on the collector's session and group them
+                     by item; one worker keeps the snapshot a single transaction
+
+        In low-memory mode rows are not grouped and fewer batches are kept
+        in flight between stages.
+
+        Returns:
+            (rows inserted, current auctions grouped by item_id)
+        """
+        region = self.repository.region
+        splitter = AuctionStreamSplitter()
         current_by_item = {}
-        for auction in commodities["auctions"]:
-            item_id = auction["item"]["id"]
-            if item_id not in item_auctions:
-                item_auctions[item_id] = []
-                current_by_item[item_id] = []
-            
-            auction_data = {
-                "unit_price": auction["unit_price"],
-                "quantity": auction["quantity"]
-            }
-            item_auctions[item_id].append(auction_data)
-            
-            current_by_item[item_id].append({
-                "id": auction["id"],
-                "quantity": auction["quantity"],
-                "time_left": self.TIME_LEFT_CODES[auction["time_left"]]
-            })
-        
-        # Calculate statistics for each commodity
+        loaded = 0
+
+        def parse(batch: bytes):
+            values = snapshot_rows(splitter.decode(batch), snapshot_time)
+            INGEST_ROWS_PARSED.inc(len(values), region=region)
+            return [values] if values else None
+
+        def insert(values: list[dict]):
+            nonlocal loaded
+            self.repository.batch_insert(values)
+            INGEST_ROWS_INSERTED.inc(len(values), region=region)
+            loaded += len(values)
+            if not low_memory:
+                group_snapshot_rows(values, current_by_item)
+
+        queue_size = min(self.queue_size, 2) if low_memory else self.queue_size
+        pipeline = (
+            Pipeline(
+                f"ingest-{region}",
+                on_item=lambda stage, seconds: INGEST_STAGE_SECONDS.observe(
+                    seconds, region=region, stage=stage
+                ),
+            )
+            .add_stage("split", splitter.feed, queue_size=queue_size, finish=splitter.finish)
+            .add_stage("parse", parse, workers=self.parse_workers, queue_size=queue_size)
+            .add_stage("insert", insert, queue_size=queue_size)
+        )
+        downloaded = 0
+
+        def counted(chunks):
+            nonlocal downloaded
+            for chunk in chunks:
+                downloaded += len(chunk)
+                yield chunk
+
+        pipeline.run(counted(chunks))
+        self.logger.debug(f"Ingest pipeline stages: {pipeline.stage_summary()}")
+
+        # Stages run concurrently on their own threads, so record each as
+        # a span over the window it was working in
+        tracer = get_tracer()
+        tracer.record_span(
+            "fetch",
+            pipeline.started_ns,
+            pipeline.source_finished_ns or time.time_ns(),
+            bytes=downloaded,
+            chunks=pipeline.source_items,
+        )
+        for stage in pipeline.stages:
+            if stage.first_started_ns is not None:
+                tracer.record_span(
+                    stage.name,
+                    stage.first_started_ns,
+                    stage.last_finished_ns or stage.first_started_ns,
+                    items=stage.items,
+                    workers=stage.workers,
+                    busy_seconds=round(stage.busy_seconds, 6),
+                )
+        return loaded, current_by_item
+
+    def _build_stats(
+        self,
+        current_by_item: dict[int, list[dict]],
+        previous_by_item: dict[int, list[dict]],
+        disappeared: dict[int, dict],
+        depth_index: DepthIndex,
+        snapshot_time: datetime,
+    ) -> list[dict]:
+        """Statistics rows for every item in the current snapshot."""
         stats_values = []
-        for item_id, auctions in item_auctions.items():
-            stats = calculate_commodity_stats(auctions)
-            
+        for item_id, current_auctions in current_by_item.items():
+            stats = calculate_commodity_stats(current_auctions)
+
             # Calculate estimated sales and new listings
             previous_auctions = previous_by_item.get(item_id, [])
-            current_auctions = current_by_item[item_id]
-            
-            estimated_sales = estimate_sales(current_auctions, previous_auctions) if previous_auctions else 0
+            breakdown = disappeared.get(item_id, {})
             new_listings = count_new_listings(current_auctions, previous_auctions) if previous_auctions else 0
-            
+
             stats_values.append({
                 "item_id": item_id,
                 "timestamp": snapshot_time,
-                "estimated_sales": estimated_sales,
+                "estimated_sales": breakdown.get("sold", 0),
+                "estimated_relisted": breakdown.get("relisted", 0),
+                "estimated_expired": breakdown.get("expired", 0),
                 "new_listings": new_listings,
+                "price_sketch": TDigest.from_weighted(
+                    depth_index.depths[item_id].levels()
+                ).to_bytes(),
                 **stats  # Unpack the calculated statistics
             })
-        
-        # Batch insert the commodity statistics into the appropriate regional table
-        if stats_values:
-            model = EUCommodityPriceStats if region == 'eu' else USCommodityPriceStats
-            self.session.execute(
-                model.__table__.insert(),
-                stats_values
+        return stats_values
+
+    def _process_in_memory(
+        self, region: str, chunks, snapshot_time: datetime
+    ) -> tuple[int, DepthIndex, list[dict]]:
+        """Ingest the snapshot and derive stats with both snapshots held in memory."""
+        # The previous snapshot is only needed once the new one is loaded,
+        # so fetch it while the download is in flight
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="previous-snapshot") as executor:
+            previous_future = executor.submit(
+                contextvars.copy_context().run, self._fetch_previous_snapshot, region
             )
-            
-        # Collect and store token price
-        token_data = self.api.get_wow_token_price()
-        token_price = {
-            "timestamp": snapshot_time,
-            "price": token_data["price"]
-        }
-        
-        # Store token price in the appropriate regional table
-        token_model = EUTokenPrice if region == 'eu' else USTokenPrice
-        self.session.execute(
-            token_model.__table__.insert(),
-            [token_price]
+
+            with span("ingest") as ingest_span:
+                row_count, current_by_item = self._run_ingest_pipeline(chunks, snapshot_time)
+                ingest_span.set_attributes(rows=row_count, items=len(current_by_item))
+
+            with span("previous_snapshot_wait"):
+                previous_by_item = previous_future.result()
+
+        # Sorted price levels per item for cost-to-buy-N queries
+        with span("depth_index"):
+            depth_index = DepthIndex.from_auctions(current_by_item, snapshot_time)
+
+        # Split disappeared auctions into sold, relisted and expired
+        with span("diff", previous_items=len(previous_by_item)):
+            disappeared = classify_disappeared_auctions(current_by_item, previous_by_item)
+
+        with span("stats") as stats_span:
+            stats_values = self._build_stats(
+                current_by_item, previous_by_item, disappeared, depth_index, snapshot_time
+            )
+            stats_span.set_attribute("rows", len(stats_values))
+        return row_count, depth_index, stats_values
+
+    def _iter_item_chunks(self, snapshot_time: datetime, previous_time: datetime | None):
+        """Walk the current and previous snapshots together, item by item.
+
+        Both snapshots are streamed in item_id order from the database (the
+        current one through the collector's uncommitted transaction) and
+        merged, yielding groups of at most low_memory_chunk_items items.
+
+        Yields:
+            (current auctions by item, previous auctions by item) per chunk
+        """
+        current_items = self.repository.iter_snapshot_items(snapshot_time)
+        previous_items = (
+            self.repository.iter_snapshot_items(previous_time)
+            if previous_time is not None
+            else iter(())
         )
-        
-        self.session.commit()
-        
+        current, previous = next(current_items, None), next(previous_items, None)
+        current_chunk: dict[int, list[dict]] = {}
+        previous_chunk: dict[int, list[dict]] = {}
+        chunk_items = 0
+        while current is not None or previous is not None:
+            # Items only in the previous snapshot still count towards
+            # disappeared auctions, so they are merged in as well
+            if previous is None or (current is not None and current[0] <= previous[0]):
+                item_id = current[0]
+                current_chunk[item_id] = current[1]
+                current = next(current_items, None)
+            else:
+                item_id = previous[0]
+            if previous is not None and previous[0] == item_id:
+                previous_chunk[item_id] = previous[1]
+                previous = next(previous_items, None)
+            chunk_items += 1
+            if chunk_items >= self.low_memory_chunk_items:
+                yield current_chunk, previous_chunk
+                current_chunk, previous_chunk = {}, {}
+                chunk_items = 0
+        if current_chunk or previous_chunk:
+            yield current_chunk, previous_chunk
+
+    def _process_in_chunks(
+        self, chunks, snapshot_time: datetime, latest
+    ) -> tuple[int, DepthIndex, list[dict]]:
+        """Ingest the snapshot, then derive stats a chunk of items at a time.
+
+        Low-memory mode: the ingest pipeline only inserts rows, and both
+        snapshots are read back in item order instead of being grouped in
+        memory. Only the stats rows and the depth index grow with the feed.
+        """
+        with span("ingest") as ingest_span:
+            row_count, _ = self._run_ingest_pipeline(chunks, snapshot_time, low_memory=True)
+            ingest_span.set_attribute("rows", row_count)
+
+        previous_time = latest.snapshot_time.replace(tzinfo=UTC) if latest else None
+        depth_index, stats_values = self.stats_from_database(snapshot_time, previous_time)
+        return row_count, depth_index, stats_values
+
+    def stats_from_database(
+        self, snapshot_time: datetime, previous_time: datetime | None
+    ) -> tuple[DepthIndex, list[dict]]:
+        """Depth index and stats rows of a stored snapshot, a chunk of items at a time.
+
+        Args:
+            snapshot_time: Snapshot to derive stats for, visible to the session
+            previous_time: Snapshot it is compared with for sales and new
+                listings, or None
+
+        Returns:
+            (depth index, stats rows as inserted into commodity_price_stats)
+        """
+        depths = {}
+        stats_values = []
+        with span("chunked_stats") as stats_span:
+            chunk_count = 0
+            for current_by_item, previous_by_item in self._iter_item_chunks(
+                snapshot_time, previous_time
+            ):
+                chunk_depth = DepthIndex.from_auctions(current_by_item, snapshot_time)
+                depths.update(chunk_depth.depths)
+                disappeared = classify_disappeared_auctions(current_by_item, previous_by_item)
+                stats_values.extend(
+                    self._build_stats(
+                        current_by_item, previous_by_item, disappeared, chunk_depth, snapshot_time
+                    )
+                )
+                chunk_count += 1
+            stats_span.set_attributes(rows=len(stats_values), chunks=chunk_count)
+        return DepthIndex(depths, snapshot_time), stats_values
+
+    def collect_snapshot_for_region(self):
+        """Collect and store current auction house data for the repository's region"""
+        region = self.repository.region
+        with span("collect_snapshot", region=region) as collect_span:
+            last_modified = self._collect_snapshot(region, collect_span)
+        return last_modified
+
+    def _collect_snapshot(self, region: str, collect_span: Span):
+        ingest_started = datetime.now(UTC)
+        tables = get_region_tables(region)
+        latest = SnapshotCatalogRepository(self.session).get_latest(region)
+
+        chunks, headers = self.api.stream_commodities(chunk_size=self.chunk_bytes)
+        last_modified = self._parse_last_modified(headers)
+        snapshot_time = datetime.now(UTC)
+
+        payload_bytes = payload_size(headers, latest.row_count if latest else None)
+        low_memory = self.memory_budget.requires_low_memory(payload_bytes)
+        collect_span.set_attributes(payload_bytes=payload_bytes, low_memory=low_memory)
+        if low_memory:
+            self.logger.info(
+                f"{region.upper()} payload of ~{payload_bytes / 2**20:.0f} MiB exceeds the "
+                f"memory budget, collecting in chunks of {self.low_memory_chunk_items} items"
+            )
+            row_count, depth_index, stats_values = self._process_in_chunks(
+                chunks, snapshot_time, latest
+            )
+        else:
+            row_count, depth_index, stats_values = self._process_in_memory(
+                region, chunks, snapshot_time
+            )
+
+        with span("stats_insert"):
+            # Batch insert the commodity statistics into the appropriate regional table
+            if stats_values:
+                self.session.execute(
+                    tables.commodity_price_stats.__table__.insert(),
+                    stats_values
+                )
+
+            # Refresh the current-market table in place for point lookups
+            LatestPriceRepository(self.session).upsert_stats(region, stats_values)
+
+        # Fold the new stats into the running indicators, then score the
+        # snapshot against the state it was folded into
+        with span("indicators"):
+            indicator_updates = IndicatorEngine().update_region(
+                self.session, region, stats_values
+            )
+            AnomalyDetector().process(
+                self.session,
+                region,
+                stats_values,
+                {new["item_id"]: previous for previous, new in indicator_updates},
+            )
+
+        # Catalog the snapshot in the same transaction so it is visible
+        # exactly when the snapshot rows are
+        SnapshotCatalogRepository(self.session).record_snapshot(
+            region=region,
+            snapshot_time=snapshot_time,
+            last_modified=last_modified,
+            row_count=row_count,
+            item_count=len(stats_values),
+            ingest_duration_seconds=(
+                datetime.now(UTC) - ingest_started
+            ).total_seconds(),
+        )
+
+        if tracemalloc.is_tracing():
+            # Everything the collection built is still alive here
+            collect_span.set_attribute("top_allocations", top_allocations())
+
+        with span("commit"):
+            commit_started = time.perf_counter()
+            if self.fence is not None:
+                self.fence(self.session)
+            self.session.commit()
+            committed = datetime.now(UTC)
+        COMMIT_SECONDS.observe(time.perf_counter() - commit_started, region=region)
+        COLLECTION_SECONDS.observe((committed - ingest_started).total_seconds(), region=region)
+        PUBLISH_TO_INGEST_LAG.set((committed - last_modified).total_seconds(), region=region)
+        LAST_SNAPSHOT_TIMESTAMP.set(snapshot_time.timestamp(), region=region)
+        collect_span.set_attributes(
+            rows=row_count,
+            items=len(stats_values),
+            publish_lag_seconds=round((committed - last_modified).total_seconds(), 3),
+        )
+
+        # Only publish the order book once its snapshot is committed
+        get_depth_store().publish(region, depth_index)
+
         # Return the Last-Modified timestamp for logging
         return last_modified
 
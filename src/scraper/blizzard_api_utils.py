@@ -1,11 +1,18 @@
+import os
+import re
 import time
-from dataclasses import dataclass
-from datetime import UTC, datetime
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from utils.api_budget import PRIORITY_FOREGROUND, get_api_budget
+from utils.metrics import API_BYTES_DOWNLOADED, API_REQUEST_SECONDS
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
 
 @dataclass
 class BlizzardConfig:
@@ -16,9 +23,32 @@ class BlizzardConfig:
     region: str
     timeout: int = 60  # Increased timeout for large auction data downloads
     max_retries: int = 3
+    # Overridable to point the client at a stand-in server; {region} is filled in
+    api_base_url: str = field(
+        default_factory=lambda: os.getenv(
+            "BLIZZARD_API_BASE_URL", "https://{region}.api.blizzard.com"
+        )
+    )
+    oauth_url: str = field(
+        default_factory=lambda: os.getenv(
+            "BLIZZARD_OAUTH_URL", "https://oauth.battle.net/token"
+        )
+    )
+
+
+class BudgetedSession(requests.Session):
+    """Session that draws every request from the process-wide API budget"""
 
+    def __init__(self, priority=PRIORITY_FOREGROUND):
+        super().__init__()
+        self.priority = priority
 
-def create_session(config):
+    def request(self, method, url, *args, **kwargs):
+        get_api_budget().acquire(self.priority)
+        return super().request(method, url, *args, **kwargs)
+
+
+def create_session(config, priority=PRIORITY_FOREGROUND):
     """Create a requests session with retry strategy"""
     retry_strategy = Retry(
         total=config.max_retries,
@@ -26,14 +56,16 @@ def create_session(config):
         status_forcelist=[429, 500, 502, 503, 504],
     )
 
-    session = requests.Session()
-    session.mount("https://", HTTPAdapter(max_retries=retry_strategy))
+    session = BudgetedSession(priority)
+    adapter = HTTPAdapter(max_retries=retry_strategy)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     return session
 
 
 def get_access_token(config, session):
     """Get OAuth access token from Blizzard"""
-    token_url = "https://oauth.battle.net/token"
+    token_url = config.oauth_url
     data = {"grant_type": "client_credentials"}
     auth = (config.client_id, config.client_secret)
 
@@ -48,13 +80,39 @@ def get_access_token(config, session):
 
 
 class BlizzardAPI:
-    """Improved Blizzard API client with better separation of concerns"""
+    """Improved Blizzard API client with better separation of concerns
+
+    Requests are paced by the process-wide API budget at the client's
+    priority (utils.api_budget); background crawls pass PRIORITY_BACKGROUND.
+    """
 
-    def __init__(self, config):
+    def __init__(self, config, priority=PRIORITY_FOREGROUND):
         self.config = config
-        self.session = create_session(config)
+        self.session = create_session(config, priority)
+        self.session.hooks["response"].append(self._observe_response)
         self._token_info = None
 
+    @staticmethod
+    def _endpoint_label(url):
+        """URL path with numeric ids collapsed, to keep metric labels bounded"""
+        return _NUMERIC_SEGMENT.sub("/{id}", urlparse(url).path)
+
+    def _observe_response(self, response, *args, **kwargs):
+        """Record latency and body size of every API response"""
+        endpoint = self._endpoint_label(response.url)
+        API_REQUEST_SECONDS.observe(
+            response.elapsed.total_seconds(),
+            region=self.config.region,
+            endpoint=endpoint,
+            status=str(response.status_code),
+        )
+        # Streamed bodies are counted as they are consumed
+        if not kwargs.get("stream"):
+            API_BYTES_DOWNLOADED.inc(
+                len(response.content), region=self.config.region, endpoint=endpoint
+            )
+        return response
+
     def _ensure_valid_token(self):
         """Ensure we have a valid access token"""
         if not self._token_info or time.time() >= float(self._token_info["expires_at"]):
@@ -94,7 +152,7 @@ class BlizzardAPI:
 
     def _build_url(self, endpoint):
         """Build full API URL"""
-        return f"https://{self.config.region}.api.blizzard.com{endpoint}"
+        return self.config.api_base_url.format(region=self.config.region) + endpoint
 
     def _static_params(self):
         """Common parameters for static data"""
@@ -151,19 +209,25 @@ class BlizzardAPI:
                 headers["If-Modified-Since"] = if_modified_since
 
                 response = self.session.get(
-                    url, headers=headers, params=params, timeout=self.config.timeout
+                    url,
+                    headers=headers,
+                    params=params,
+                    timeout=self.config.timeout,
+                    stream=True,
                 )
 
                 if response.status_code == 304:
                     # 304 Not Modified - data hasn't changed, no body downloaded!
+                    response.close()
                     return False
                 elif response.status_code == 200:
-                    # 200 OK - data has changed, cache the response for reuse
-                    data = response.json()
-                    self._cached_commodities = data
-                    self._cached_commodities_timestamp = datetime.now(UTC)
+                    # 200 OK - data has changed, keep the unread body so
+                    # stream_commodities() can consume it without a second request
+                    self._discard_pending_commodities()
+                    self._pending_commodities = (response, time.monotonic())
                     return True
                 else:
+                    response.close()
                     response.raise_for_status()
                     return True
 
@@ -171,17 +235,57 @@ class BlizzardAPI:
             # If we can't check for updates, assume data has changed
             return True
 
-    def get_cached_commodities_if_fresh(self):
-        """Get recently cached commodities data if available and fresh (within 60 seconds)"""
-        if (
-            hasattr(self, "_cached_commodities")
-            and hasattr(self, "_cached_commodities_timestamp")
-            and self._cached_commodities_timestamp
-            and (datetime.now(UTC) - self._cached_commodities_timestamp).total_seconds()
-            < 60
-        ):
-            return self._cached_commodities
-        return None
+    def _discard_pending_commodities(self):
+        pending = getattr(self, "_pending_commodities", None)
+        self._pending_commodities = None
+        if pending is not None:
+            pending[0].close()
+
+    def stream_commodities(self, chunk_size=1024 * 1024):
+        """Stream the commodities document as raw byte chunks
+
+        Reuses the response opened by is_commodities_updated() when it is
+        less than 60 seconds old, otherwise issues a new streaming request.
+
+        Returns:
+            (iterator of byte chunks, response headers)
+        """
+        pending = getattr(self, "_pending_commodities", None)
+        self._pending_commodities = None
+        if pending is not None and time.monotonic() - pending[1] < 60:
+            response = pending[0]
+        else:
+            if pending is not None:
+                pending[0].close()
+            self._ensure_valid_token()
+            if self._token_info is None:
+                raise RuntimeError(
+                    "Access token is not available. Please authenticate first."
+                )
+            response = self.session.get(
+                self._build_url("/data/wow/auctions/commodities"),
+                headers={"Authorization": f"Bearer {self._token_info['access_token']}"},
+                params=self._dynamic_params(),
+                timeout=self.config.timeout,
+                stream=True,
+            )
+            try:
+                response.raise_for_status()
+            except requests.exceptions.RequestException:
+                response.close()
+                raise
+
+        endpoint = self._endpoint_label(response.url)
+
+        def chunks():
+            with response:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    API_BYTES_DOWNLOADED.inc(
+                        len(chunk), region=self.config.region, endpoint=endpoint
+                    )
+                    yield chunk
+
+        return chunks(), response.headers
 
     def get_item(self, item_id):
         """Get item details by ID"""
@@ -229,4 +333,32 @@ class BlizzardAPI:
         """Get current WoW Token price"""
         url = self._build_url("/data/wow/token/index")
         response = self._make_request("GET", url, self._dynamic_params())
-        return response
\ No newline at end of file
+        return response
+
+    def get_wow_token_price_if_modified(self, if_modified_since=None):
+        """Get the WoW Token price only if it changed since a Last-Modified value
+
+        Returns:
+            (token data or None when not modified, Last-Modified header of the response)
+        """
+        url = self._build_url("/data/wow/token/index")
+        self._ensure_valid_token()
+        if self._token_info is None:
+            raise RuntimeError(
+                "Access token is not available. Please authenticate first."
+            )
+
+        headers = {"Authorization": f"Bearer {self._token_info['access_token']}"}
+        if if_modified_since:
+            headers["If-Modified-Since"] = if_modified_since
+
+        response = self.session.get(
+            url,
+            headers=headers,
+            params=self._dynamic_params(),
+            timeout=self.config.timeout,
+        )
+        if response.status_code == 304:
+            return None, if_modified_since
+        response.raise_for_status()
+        return response.json(), response.headers.get("Last-Modified")
\ No newline at end of file
@@ -0,0 +1,314 @@
+"""
+Event-driven collection scheduler.
+
+Every region, the token sampler and partition maintenance run as
+independent asyncio tasks. A region task opens its own collection window
+each hour (COLLECTION_MINUTE_<REGION> overrides the shared minute), polls
+until that region has published a new snapshot, then sleeps until its next
+window. Failures back off exponentially per task. A region that publishes
+late or keeps failing therefore never holds up another region's ingest.
+
+The blocking region collections run on a pool of COLLECTION_WORKERS
+threads (one per region by default), so fewer workers than regions
+queues regions behind each other; sampling and maintenance calls run in
+threads through asyncio.to_thread. Time comes from an injectable clock, so
+the scheduler can also be driven by a virtual clock.
+
+When several replicas run (scraper.leases), every replica runs every task,
+but a region task only collects while this replica holds the region's lease
+and the token and maintenance tasks only work while it is the leader. A
+region task that takes a region over collects at once, as on startup, in
+case the previous owner missed its window.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Protocol
+
+from scraper.leases import LEADER, region_lease
+from utils.tracing import span
+
+if TYPE_CHECKING:
+    from scraper.scraper import ScraperOrchestrator
+
+
+class Clock(Protocol):
+    def now(self) -> datetime: ...
+
+    async def sleep(self, seconds: float) -> None: ...
+
+
+class SystemClock:
+    """Wall-clock time in UTC."""
+
+    def now(self) -> datetime:
+        return datetime.now(UTC)
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(max(0.0, seconds))
+
+
+class AcceleratedClock:
+    """Virtual UTC time running `speedup` times faster than the wall clock.
+
+    Sleeps shrink by the same factor, so a day of hourly windows can be
+    replayed in minutes. Work done in threads still takes real time, which
+    the virtual clock sees multiplied by the speedup.
+    """
+
+    def __init__(self, speedup: float, start: datetime | None = None):
+        if speedup <= 0:
+            raise ValueError("speedup must be positive")
+        self.speedup = speedup
+        self.start = start or datetime.now(UTC)
+        self._origin = time.monotonic()
+
+    def now(self) -> datetime:
+        elapsed = (time.monotonic() - self._origin) * self.speedup
+        return self.start + timedelta(seconds=elapsed)
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(max(0.0, seconds) / self.speedup)
+
+
+# Real seconds between ownership checks while another replica holds a lease
+LEASE_POLL_SECONDS = 1.0
+
+
+def next_window_start(now: datetime, minute: int) -> datetime:
+    """Next time at `minute` past the hour, strictly after now."""
+    start = now.replace(minute=minute, second=0, microsecond=0)
+    if start <= now:
+        start += timedelta(hours=1)
+    return start
+
+
+class CollectionScheduler:
+    """Runs region collection, token sampling and maintenance as independent tasks."""
+
+    def __init__(self, orchestrator: "ScraperOrchestrator", clock: Clock | None = None):
+        self.orchestrator = orchestrator
+        self.config = orchestrator.polling_config
+        self.clock = clock or SystemClock()
+        self.logger = logging.getLogger(__name__)
+        self.collection_minutes = {
+            region: int(
+                os.getenv(
+                    f"COLLECTION_MINUTE_{region.upper()}", self.config.collection_minute
+                )
+            )
+            for region in orchestrator.regions
+        }
+        self._stopping: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._analytics_lock: asyncio.Lock | None = None
+        self._collectors: ThreadPoolExecutor | None = None
+
+    # Lifecycle
+
+    async def run(self) -> None:
+        """Run all tasks until stop() is called."""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._analytics_lock = asyncio.Lock()
+        self._collectors = ThreadPoolExecutor(
+            max_workers=self.orchestrator.collection_workers, thread_name_prefix="collector"
+        )
+
+        tasks = [
+            asyncio.create_task(self._region_task(region), name=f"collect-{region}")
+            for region in self.orchestrator.regions
+        ]
+        tasks.append(asyncio.create_task(self._token_task(), name="token-sampler"))
+        tasks.append(asyncio.create_task(self._maintenance_task(), name="maintenance"))
+
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._collectors.shutdown(wait=False, cancel_futures=True)
+        await asyncio.to_thread(self.orchestrator.token_sampler.flush)
+
+    def stop(self) -> None:
+        """Ask the scheduler to stop; safe to call from any thread."""
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    @property
+    def running(self) -> bool:
+        return self._stopping is not None and not self._stopping.is_set()
+
+    async def _sleep_until(self, when: datetime) -> None:
+        await self.clock.sleep((when - self.clock.now()).total_seconds())
+
+    async def _wait_for_lease(self, lease: str) -> None:
+        """Wait until this replica owns a lease (leases run on real time)."""
+        while self.running and not self.orchestrator.owns(lease):
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+
+    def _backoff(self, failures: int) -> float:
+        """Exponential backoff with jitter, capped at max_backoff_seconds."""
+        delay = min(
+            self.config.retry_delay_seconds * 2 ** max(0, failures - 1),
+            self.config.max_backoff_seconds,
+        )
+        return delay * random.uniform(0.8, 1.2)
+
+    # Region collection
+
+    async def _collect(self, region: str) -> tuple[bool, bool]:
+        # Like asyncio.to_thread, but on the collection pool; the context
+        # copy keeps the caller's trace context in the worker thread
+        success, new_data = await asyncio.get_running_loop().run_in_executor(
+            self._collectors,
+            contextvars.copy_context().run,
+            self.orchestrator._collect_region_in_session,
+            region,
+        )
+        if new_data:
+            await self._refresh_cross_region_analytics()
+        return success, new_data
+
+    async def _refresh_cross_region_analytics(self) -> None:
+        # Offered after every region's new data; the scanner waits until all
+        # regions have finished the cycle. Serialised so regions finishing
+        # together do not scan concurrently
+        async with self._analytics_lock:
+            await asyncio.to_thread(self.orchestrator._run_cross_region_analytics)
+
+    async def _poll_window(self, region: str, deadline: datetime) -> bool:
+        """Poll a region until it yields a new snapshot or the window closes.
+
+        Returns:
+            True if a new snapshot was collected
+        """
+        failures = 0
+        attempt = 1
+        lease = region_lease(region)
+        while self.running and self.orchestrator.owns(lease) and self.clock.now() < deadline:
+            try:
+                success, new_data = await self._collect(region)
+            except Exception as e:
+                self.logger.error(f"{region.upper()} collection attempt #{attempt} raised: {e}")
+                success, new_data = False, False
+
+            if new_data:
+                return True
+            if success:
+                failures = 0
+                delay = self.config.retry_delay_seconds
+            else:
+                failures += 1
+                delay = self._backoff(failures)
+
+            remaining = (deadline - self.clock.now()).total_seconds()
+            if remaining <= 0:
+                break
+            self.logger.info(
+                f"{region.upper()}: no new data on attempt #{attempt}; "
+                f"retrying in {min(delay, remaining):.0f}s"
+            )
+            await self.clock.sleep(min(delay, remaining))
+            attempt += 1
+        return False
+
+    async def _region_task(self, region: str) -> None:
+        minute = self.collection_minutes[region]
+        lease = region_lease(region)
+
+        while self.running:
+            await self._wait_for_lease(lease)
+            if not self.running:
+                break
+
+            # Collect immediately on startup or when taking the region over
+            self.logger.info(f"{region.upper()}: initial collection")
+            with span("collection_window", region=region, initial=True) as window_span:
+                try:
+                    _, new_data = await self._collect(region)
+                    window_span.set_attribute("new_data", new_data)
+                except Exception as e:
+                    self.logger.error(f"{region.upper()} initial collection failed: {e}")
+
+            while self.running and self.orchestrator.owns(lease):
+                window_start = next_window_start(self.clock.now(), minute)
+                self.logger.info(
+                    f"{region.upper()}: next collection window at {window_start:%H:%M} UTC"
+                )
+                await self._sleep_until(window_start)
+                if not self.orchestrator.owns(lease):
+                    break
+
+                deadline = window_start + timedelta(minutes=self.config.window_duration_minutes)
+                # Root of the window's trace: every attempt's region span,
+                # and analytics it triggers, nest under it
+                with span(
+                    "collection_window", region=region, window_start=window_start.isoformat()
+                ) as window_span:
+                    new_data = await self._poll_window(region, deadline)
+                    window_span.set_attribute("new_data", new_data)
+                if new_data:
+                    self.logger.info(f"{region.upper()}: new data collected, window complete")
+                else:
+                    self.logger.warning(
+                        f"{region.upper()}: window closed without new data"
+                    )
+
+            if self.running:
+                self.logger.info(f"{region.upper()}: owned by another replica, standing by")
+
+    # Token sampling
+
+    async def _token_task(self) -> None:
+        sampler = self.orchestrator.token_sampler
+        failures = 0
+        while self.running:
+            await self._wait_for_lease(LEADER)
+            try:
+                await asyncio.to_thread(sampler.run_once)
+                failures = 0
+                delay = sampler.poll_interval_seconds
+            except Exception as e:
+                failures += 1
+                delay = self._backoff(failures)
+                self.logger.warning(f"Token sampling failed: {e}")
+            await self.clock.sleep(delay)
+
+    # Partition maintenance
+
+    async def _maintenance_task(self) -> None:
+        failures = 0
+        while self.running:
+            await self._wait_for_lease(LEADER)
+            today = self.clock.now().date()
+            if self.orchestrator.last_maintenance_date != today:
+                try:
+                    self.logger.info("Running daily partition maintenance...")
+                    await asyncio.to_thread(
+                        self.orchestrator.partition_manager.run_daily_maintenance
+                    )
+                    self.orchestrator.last_maintenance_date = today
+                    failures = 0
+                    self.logger.info("Daily partition maintenance completed")
+                except Exception as e:
+                    failures += 1
+                    delay = min(
+                        self.config.maintenance_retry_seconds * 2 ** (failures - 1),
+                        timedelta(hours=6).total_seconds(),
+                    )
+                    self.logger.warning(
+                        f"Daily partition maintenance failed: {e}. Retrying in {delay:.0f}s"
+                    )
+                    await self.clock.sleep(delay)
+                    continue
+
+            tomorrow = datetime.combine(
+                today + timedelta(days=1), datetime.min.time(), tzinfo=UTC
+            )
+            await self._sleep_until(tomorrow)
@@ -0,0 +1,198 @@
+"""
+Leases that let several scheduler replicas run side by side.
+
+Scheduler work is owned through rows in scheduler_leases, each held by one
+replica until it expires:
+
+    leader         - partition setup and maintenance, seeding, token sampling
+    region:<code>  - collection of one region
+    replica:<id>   - liveness of each replica, used to share regions out
+
+A background thread renews held leases every LEASE_RENEW_SECONDS and tries
+to take free or expired ones, so work held by a replica that died moves to a
+live one within LEASE_TTL_SECONDS plus one renewal (a replica that stops
+cleanly releases its leases at once). A replica stops treating a lease as
+held as soon as it has gone a TTL without renewing it, even while the
+database is unreachable. Regions are spread over the live replicas: a
+replica takes no more than its share and gives one up per renewal when it
+holds more.
+
+Writes that only the owner may make (the snapshot commit) call fence() in
+the same transaction, which also keeps the lease from being taken over
+until that transaction ends.
+"""
+
+import logging
+import math
+import os
+import secrets
+import socket
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from repository.database import get_session
+from repository.lease_repository import LeaseRepository
+
+LEADER = "leader"
+
+
+def region_lease(region: str) -> str:
+    return f"region:{region}"
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when work is about to be committed by a replica that no longer owns it."""
+
+
+def ha_enabled() -> bool:
+    return os.getenv("SCHEDULER_HA", "false").lower() in ("1", "true", "yes")
+
+
+class LeaseManager:
+    """Acquires and renews this replica's scheduler leases in the background."""
+
+    def __init__(
+        self,
+        regions: list[str],
+        replica_id: str | None = None,
+        ttl_seconds: float | None = None,
+        renew_seconds: float | None = None,
+    ):
+        self.regions = list(regions)
+        self.replica_id = (
+            replica_id
+            or os.getenv("SCHEDULER_REPLICA_ID")
+            or f"{socket.gethostname()[:60]}-{os.getpid()}-{secrets.token_hex(3)}"
+        )
+        self.ttl_seconds = ttl_seconds or float(os.getenv("LEASE_TTL_SECONDS", "10"))
+        self.renew_seconds = renew_seconds or float(os.getenv("LEASE_RENEW_SECONDS", "3"))
+        if self.renew_seconds >= self.ttl_seconds:
+            raise ValueError("LEASE_RENEW_SECONDS must be shorter than LEASE_TTL_SECONDS")
+        self.logger = logging.getLogger(__name__)
+        # Lease name -> monotonic time until which it is certainly still ours
+        self._held: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def _replica_lease(self) -> str:
+        return f"replica:{self.replica_id}"
+
+    # Lifecycle
+
+    def start(self) -> "LeaseManager":
+        """Take the first leases synchronously, then keep renewing in the background."""
+        self.logger.info(f"Scheduler replica {self.replica_id} joining")
+        self.renew()
+        self._thread = threading.Thread(target=self._run, name="lease-renewer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop renewing and release every lease so other replicas take over at once."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            names = list(self._held)
+            self._held.clear()
+        session = get_session()
+        try:
+            repository = LeaseRepository(session)
+            for name in names:
+                repository.release(name, self.replica_id)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logger.warning(f"Failed to release leases {names}: {e}")
+        finally:
+            session.close()
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.renew_seconds):
+            try:
+                self.renew()
+            except Exception as e:
+                self.logger.warning(f"Lease renewal failed: {e}")
+
+    # Ownership
+
+    def owns(self, name: str) -> bool:
+        with self._lock:
+            return time.monotonic() < self._held.get(name, 0.0)
+
+    def held(self) -> list[str]:
+        now = time.monotonic()
+        with self._lock:
+            return sorted(name for name, until in self._held.items() if now < until)
+
+    def fence(self, session: Session, name: str) -> None:
+        """Confirm, inside the caller's transaction, that this replica still owns a lease.
+
+        Raises:
+            LeaseLostError: if the lease expired or passed to another replica
+        """
+        if not LeaseRepository(session).lock_if_held(name, self.replica_id):
+            raise LeaseLostError(f"Lease {name} is no longer held by {self.replica_id}")
+
+    # Renewal
+
+    def _try_acquire(self, session: Session, name: str) -> bool:
+        started = time.monotonic()
+        try:
+            acquired = LeaseRepository(session).try_acquire(
+                name, self.replica_id, self.ttl_seconds
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        was_held = self.owns(name)
+        with self._lock:
+            if acquired:
+                # Measured from before the request, so never later than the
+                # expiry other replicas see
+                self._held[name] = started + self.ttl_seconds
+            else:
+                self._held.pop(name, None)
+        if acquired and not was_held:
+            self.logger.info(f"Replica {self.replica_id} acquired lease {name}")
+        elif was_held and not acquired:
+            self.logger.warning(f"Replica {self.replica_id} lost lease {name}")
+        return acquired
+
+    def _release(self, session: Session, name: str) -> None:
+        with self._lock:
+            self._held.pop(name, None)
+        LeaseRepository(session).release(name, self.replica_id)
+        session.commit()
+        self.logger.info(f"Replica {self.replica_id} released lease {name} to rebalance")
+
+    def renew(self) -> None:
+        """Renew held leases and take free ones, up to this replica's share of regions."""
+        session = get_session()
+        try:
+            self._try_acquire(session, self._replica_lease)
+            self._try_acquire(session, LEADER)
+
+            live_replicas = max(1, LeaseRepository(session).count_live("replica:"))
+            share = math.ceil(len(self.regions) / live_replicas)
+
+            owned = [
+                region
+                for region in self.regions
+                if self.owns(region_lease(region))
+                and self._try_acquire(session, region_lease(region))
+            ]
+            if len(owned) > share:
+                self._release(session, region_lease(owned.pop()))
+            for region in self.regions:
+                if len(owned) >= share:
+                    break
+                if region not in owned and self._try_acquire(session, region_lease(region)):
+                    owned.append(region)
+        finally:
+            session.close()
@@ -8,3 +8,6 @@ class SimplePollingConfig:
     retry_delay_seconds: int = 30  # 30 seconds between retries
     head_timeout_seconds: int = 10  # Timeout for HEAD requests
     collection_minute: int = 30  # Collect at :30 past each hour
+    window_duration_minutes: int = 30  # How long a region is polled for new data
+    max_backoff_seconds: int = 300  # Cap on the retry delay after repeated failures
+    maintenance_retry_seconds: int = 300  # First retry delay for failed maintenance
@@ -0,0 +1,42 @@
+"""
+Region registry for auction data collection.
+
+Regions are enabled through the COLLECTION_REGIONS environment variable
+(comma separated, e.g. "eu,us,kr,tw"). Every enabled region must be one of
+models.models.SUPPORTED_REGIONS, which map to their own set of tables.
+"""
+
+import os
+
+from models.models import SUPPORTED_REGIONS
+
+DEFAULT_REGIONS = ("eu", "us")
+
+
+def get_enabled_regions() -> list[str]:
+    """Get the regions to collect, in configured order.
+
+    Raises:
+        ValueError: If a configured region is not supported.
+    """
+    configured = os.getenv("COLLECTION_REGIONS", ",".join(DEFAULT_REGIONS))
+    regions = []
+    for region in configured.split(","):
+        region = region.strip().lower()
+        if not region or region in regions:
+            continue
+        if region not in SUPPORTED_REGIONS:
+            raise ValueError(
+                f"Unsupported region '{region}' in COLLECTION_REGIONS "
+                f"(supported: {', '.join(SUPPORTED_REGIONS)})"
+            )
+        regions.append(region)
+    return regions
+
+
+def get_collection_workers(regions: list[str]) -> int:
+    """Get the size of the collection worker pool (one worker per region by default)."""
+    workers = int(os.getenv("COLLECTION_WORKERS", "0"))
+    if workers <= 0:
+        workers = len(regions)
+    return max(1, min(workers, len(regions)))
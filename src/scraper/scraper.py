@@ -1,18 +1,29 @@
+import asyncio
 import logging
-import time
+import os
 from datetime import UTC, datetime
 
 from sqlalchemy.orm import Session
 
-from models.models import AuctionSnapshotEU, AuctionSnapshotUS, ScraperLog
-from repository.auction_repository_eu import AuctionRepositoryEU
-from repository.auction_repository_us import AuctionRepositoryUS
+from analytics.arbitrage import ArbitrageScanner
+from analytics.profit_engine import ProfitEngine
+from jobs.handlers import enqueue_cross_region_analytics, enqueue_region_analytics
+from models.models import ScraperLog
+from repository.auction_repository import AuctionRepository
 from repository.database import db_session
+from repository.snapshot_catalog_repository import SnapshotCatalogRepository
 from scraper.auction_collector import AuctionCollector
 from scraper.blizzard_api_utils import BlizzardAPI, BlizzardConfig
+from scraper.collection_scheduler import Clock, CollectionScheduler
+from scraper.leases import LeaseManager, region_lease
 from scraper.polling_config import SimplePollingConfig
+from scraper.regions import get_collection_workers, get_enabled_regions
+from scraper.token_sampler import TokenSampler
 from utils.benchmark import BenchmarkManager
+from utils.metrics import POLL_OUTCOMES
 from utils.partition_manager import PartitionManagerService
+from utils.telemetry import get_telemetry_writer
+from utils.tracing import span
 
 
 class ScraperOrchestrator:
@@ -20,8 +31,29 @@ class ScraperOrchestrator:
         self.logger = logging.getLogger(__name__)
         self.running = False
         self.polling_config = SimplePollingConfig()
+        self.regions = get_enabled_regions()
+        # Threads region collections run on (see CollectionScheduler)
+        self.collection_workers = get_collection_workers(self.regions)
+        self.profit_engine = ProfitEngine()
+        self.profit_price_bases = [
+            basis.strip()
+            for basis in os.getenv("PROFIT_PRICE_BASES", "min,median,craft,depth").split(",")
+            if basis.strip()
+        ]
+        self.arbitrage_scanner = ArbitrageScanner()
+        # With a job queue, analytics are queued for job workers instead of run inline
+        self.job_queue = os.getenv("JOB_QUEUE", "false").lower() in ("1", "true", "yes")
+        # Token prices are sampled on their own cadence, off the collection path
+        self.token_sampler = TokenSampler(self.regions, self._create_api_for_region)
         self.partition_manager = PartitionManagerService()
         self.last_maintenance_date = None
+        self.scheduler: CollectionScheduler | None = None
+        # Set when running as one of several replicas (see scraper.leases)
+        self.leases: LeaseManager | None = None
+
+    def owns(self, lease: str) -> bool:
+        """Whether this replica owns a piece of work; a lone replica owns everything."""
+        return self.leases is None or self.leases.owns(lease)
 
     def _create_api_for_region(self, region: str) -> BlizzardAPI:
         """Create BlizzardAPI instance for specific region."""
@@ -45,37 +77,34 @@ class ScraperOrchestrator:
 
     def _log_scraper_attempt(
         self,
-        session: Session,
         region: str,
         status: str,
         last_modified: datetime | None = None,
         error_message: str | None = None,
         poll_attempts: int = 1,
     ) -> None:
-        """Log scraper attempt to database."""
-        log_entry = ScraperLog(
-            region=region,
-            status=status,
-            last_modified=last_modified,
-            error_message=error_message,
-            poll_attempts=poll_attempts,
+        """Queue a scraper attempt log for the write-behind telemetry writer."""
+        POLL_OUTCOMES.inc(region=region, outcome=status)
+        get_telemetry_writer().record(
+            ScraperLog,
+            {
+                "region": region,
+                "timestamp": datetime.now(UTC),
+                "status": status,
+                "last_modified": last_modified,
+                "error_message": error_message[:500] if error_message else None,
+                "poll_attempts": poll_attempts,
+            },
         )
-        session.add(log_entry)
-        session.commit()
 
     def _get_last_modified_from_db(
         self, session: Session, region: str
     ) -> datetime | None:
-        """Get the last successful collection timestamp for a region."""
-        last_log = (
-            session.query(ScraperLog)
-            .filter_by(region=region, status="success")
-            .order_by(ScraperLog.timestamp.desc())
-            .first()
-        )
-        if last_log and last_log.last_modified:
+        """Get the Blizzard Last-Modified of the latest committed snapshot for a region."""
+        latest = SnapshotCatalogRepository(session).get_latest(region)
+        if latest and latest.last_modified:
             # Cast to datetime to satisfy type checker
-            return last_log.last_modified  # type: ignore
+            return latest.last_modified  # type: ignore
         return None
 
     def _collect_region_data(self, region: str, session: Session) -> tuple[bool, bool]:
@@ -102,7 +131,7 @@ class ScraperOrchestrator:
                         f"{region.upper()} auction data unchanged since {last_modified_str} - skipping collection"
                     )
                     self._log_scraper_attempt(
-                        session, region, "no_change", last_modified, poll_attempts=1
+                        region, "no_change", last_modified, poll_attempts=1
                     )
                     return True, False  # No error, but no new data
             except Exception as e:
@@ -116,22 +145,20 @@ class ScraperOrchestrator:
             self.logger.info(
                 f"{region.upper()} auction data updated since {last_modified_str} - polling for new data"
             )
-            if region == "eu":
-                auction_model = AuctionSnapshotEU
-                repository = AuctionRepositoryEU(session)
-            else:
-                auction_model = AuctionSnapshotUS
-                repository = AuctionRepositoryUS(session)
-
-            collector = AuctionCollector(session, api, repository)
+            repository = AuctionRepository(session, region)
+            leases = self.leases
+            fence = (
+                (lambda txn: leases.fence(txn, region_lease(region)))
+                if leases is not None
+                else None
+            )
+            collector = AuctionCollector(session, api, repository, fence=fence)
 
             # Data collection and insertion
-            last_modified_from_api = collector.collect_snapshot_for_region(
-                auction_model
-            )
+            last_modified_from_api = collector.collect_snapshot_for_region()
 
             self._log_scraper_attempt(
-                session, region, "success", last_modified_from_api, poll_attempts=1
+                region, "success", last_modified_from_api, poll_attempts=1
             )
             new_last_modified_str = (
                 last_modified_from_api.strftime("%Y-%m-%d %H:%M:%S UTC")
@@ -141,214 +168,90 @@ class ScraperOrchestrator:
             self.logger.info(
                 f"Successfully collected {region.upper()} auction data - new last_modified: {new_last_modified_str}"
             )
+            self._run_region_analytics(region, session)
             return True, True  # Success and new data collected
 
         except Exception as e:
             self.logger.warning(f"Failed to collect {region.upper()} data: {e}")
+            session.rollback()
             self._log_scraper_attempt(
-                session, region, "failed", error_message=str(e), poll_attempts=1
+                region, "failed", error_message=str(e), poll_attempts=1
             )
             return False, False  # Failed and no new data
 
-    def _run_daily_maintenance_if_needed(self) -> None:
-        """Run daily partition maintenance if it hasn't been run today."""
-        today = datetime.now().date()
+    def _run_region_analytics(self, region: str, session: Session) -> None:
+        """Refresh derived analytics for a freshly collected region.
 
-        if self.last_maintenance_date != today:
+        Analytics failures are logged and never fail the collection itself.
+        """
+        if self.job_queue:
             try:
-                self.logger.info("Running daily partition maintenance...")
-                self.partition_manager.run_daily_maintenance()
-                self.last_maintenance_date = today
-                self.logger.info("Daily partition maintenance completed")
+                enqueue_region_analytics(session, region, self.profit_price_bases)
+                session.commit()
             except Exception as e:
-                self.logger.warning(
-                    f"Daily partition maintenance failed: {e}. Continuing without maintenance..."
-                )
+                session.rollback()
+                self.logger.warning(f"Failed to queue analytics for {region.upper()}: {e}")
+            return
+        try:
+            with span("analytics", price_bases=",".join(self.profit_price_bases)):
+                for price_basis in self.profit_price_bases:
+                    recipe_count = self.profit_engine.run(session, region, price_basis)
+                    self.logger.info(
+                        f"Computed {region.upper()} profits for {recipe_count} recipes ({price_basis} prices)"
+                    )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logger.warning(f"Analytics for {region.upper()} failed: {e}")
 
-    def run_collection_cycle(self) -> tuple[bool, bool, dict[str, bool]]:
-        """Run a single collection cycle for both regions.
+    def _run_cross_region_analytics(self) -> None:
+        """Refresh analytics that compare regions.
 
-        Returns:
-            tuple[bool, bool, dict[str, bool]]: (success, new_data_collected, region_new_data_status)
+        Called whenever a region has new data; the scan itself only runs once
+        every region has a snapshot newer than the previous scan.
+        """
+        if len(self.regions) < 2:
+            return
+        if self.job_queue:
+            try:
+                with db_session() as session:
+                    enqueue_cross_region_analytics(session, self.regions)
+            except Exception as e:
+                self.logger.warning(f"Failed to queue cross-region analytics: {e}")
+            return
+        try:
+            with span("cross_region_analytics"), db_session() as session:
+                self.arbitrage_scanner.scan(session, self.regions)
+        except Exception as e:
+            self.logger.warning(f"Cross-region analytics failed: {e}")
+
+    def _collect_region_in_session(self, region: str) -> tuple[bool, bool]:
+        """Collect a region in its own session so regions can run on separate workers."""
+        with span("region", region=region) as region_span, db_session() as session:
+            success, new_data = self._collect_region_data(region, session)
+            region_span.set_attributes(success=success, new_data=new_data)
+            return success, new_data
+
+    def start_polling_collection(self, clock: Clock | None = None) -> None:
+        """Run collection until stopped.
+
+        Each region, the token sampler and partition maintenance are
+        independent tasks on the asyncio CollectionScheduler, each with its
+        own window, retries and backoff. A clock other than the system clock
+        (e.g. an AcceleratedClock) replays the schedule in virtual time.
         """
-        with db_session() as session:
-            self.logger.info("Starting auction collection cycle...")
-
-            # Run daily maintenance if needed (once per day)
-            self._run_daily_maintenance_if_needed()
-
-            # Collect EU data
-            eu_success, eu_new_data = self._collect_region_data("eu", session)
-
-            # Collect US data
-            us_success, us_new_data = self._collect_region_data("us", session)
-
-            # Determine overall success and if new data was collected
-            overall_success = eu_success and us_success
-            any_new_data = eu_new_data or us_new_data
-            region_new_data_status = {"eu": eu_new_data, "us": us_new_data}
-
-            if overall_success:
-                self.logger.info(
-                    "Collection cycle completed successfully for both regions"
-                )
-                return True, any_new_data, region_new_data_status
-            elif eu_success or us_success:
-                self.logger.warning("Collection cycle completed with partial success")
-                return False, any_new_data, region_new_data_status
-            else:
-                self.logger.error("Collection cycle failed for both regions")
-                return False, False, region_new_data_status
-
-    def start_polling_collection(self) -> None:
-        """Start continuous polling collection at :30 past each hour with retries."""
         self.running = True
         self.logger.info(
-            f"Starting intelligent polling collection at :{self.polling_config.collection_minute:02d} past each hour..."
+            f"Starting event-driven collection for {', '.join(self.regions).upper()} "
+            f"(windows at :{self.polling_config.collection_minute:02d} past each hour unless overridden)..."
         )
-
-        # Run collection immediately on startup
-        self.logger.info("Running initial collection on startup...")
-        try:
-            success, _, _ = self.run_collection_cycle()
-            if not success:
-                self.logger.warning("Startup collection had errors")
-        except Exception as e:
-            self.logger.error(f"Error in startup collection: {e}")
-
-        while self.running:
-            try:
-                # Calculate time until next :30 minute mark
-                now = datetime.now()
-                target_minute = self.polling_config.collection_minute
-
-                # Calculate minutes until target minute
-                minutes_until_target = (target_minute - now.minute) % 60
-                if minutes_until_target == 0 and now.second > 0:
-                    # We're at the target minute but not at the start, wait for next hour
-                    minutes_until_target = 60
-
-                seconds_to_wait = (minutes_until_target * 60) - now.second
-
-                # Wait until the scheduled collection time
-                self.logger.info(
-                    f"Waiting {seconds_to_wait} seconds until collection window at {target_minute} minutes past the hour"
-                )
-                time.sleep(seconds_to_wait)
-
-                # Start polling every 30 seconds for up to 30 minutes
-                self.logger.info(
-                    f"Collection window started at {target_minute} minutes past the hour. Polling every 30 seconds for up to 30 minutes..."
-                )
-
-                window_start = datetime.now()
-                window_duration_minutes = 30
-                polling_attempt = 1
-                regions_collected = {"eu": False, "us": False}
-
-                while self.running:
-                    self.logger.info(f"Polling attempt #{polling_attempt}")
-
-                    # Check if we've exceeded the 30-minute window
-                    elapsed_minutes = (
-                        datetime.now() - window_start
-                    ).total_seconds() / 60
-                    if elapsed_minutes >= window_duration_minutes:
-                        self.logger.info(
-                            f"Collection window ended after {window_duration_minutes} minutes. Waiting until next hour."
-                        )
-                        break
-
-                    # Try to collect data
-                    try:
-                        success, new_data_collected, region_new_data_status = (
-                            self.run_collection_cycle()
-                        )
-
-                        # Update regions_collected status - once a region has new data, mark it as collected
-                        for region, has_new_data in region_new_data_status.items():
-                            if has_new_data:
-                                regions_collected[region] = True
-
-                        # Check if both regions have been collected
-                        both_regions_collected = all(regions_collected.values())
-
-                        if success and new_data_collected:
-                            if both_regions_collected:
-                                self.logger.info(
-                                    "New data collected successfully for both regions! Collection window complete - waiting until next hour."
-                                )
-                                break
-                            else:
-                                uncollected_regions = [
-                                    region
-                                    for region, collected in regions_collected.items()
-                                    if not collected
-                                ]
-                                self.logger.info(
-                                    f"New data collected successfully! Still waiting for: {', '.join(uncollected_regions).upper()}. Continuing to poll..."
-                                )
-                        elif success and not new_data_collected:
-                            if both_regions_collected:
-                                self.logger.info(
-                                    "Both regions already collected in this window. Waiting until next hour."
-                                )
-                                break
-                            else:
-                                uncollected_regions = [
-                                    region
-                                    for region, collected in regions_collected.items()
-                                    if not collected
-                                ]
-                                self.logger.info(
-                                    f"No new data available yet. Still waiting for: {', '.join(uncollected_regions).upper()}. Continuing to poll..."
-                                )
-                        else:
-                            self.logger.warning(
-                                f"Collection attempt #{polling_attempt} had errors. Continuing to poll..."
-                            )
-
-                        polling_attempt += 1
-
-                        # Wait 30 seconds before next attempt (unless window is about to end or both regions collected)
-                        if both_regions_collected:
-                            break
-
-                        remaining_minutes = window_duration_minutes - elapsed_minutes
-                        if remaining_minutes > 0.5:  # More than 30 seconds left
-                            self.logger.info(
-                                "Waiting 30 seconds before next polling attempt..."
-                            )
-                            time.sleep(30)
-                        else:
-                            self.logger.info(
-                                "Collection window ending soon, making final attempt..."
-                            )
-
-                    except Exception as e:
-                        self.logger.error(
-                            f"Collection attempt #{polling_attempt} failed with exception: {e}"
-                        )
-                        polling_attempt += 1
-
-                        # Wait 30 seconds before next attempt (unless window is about to end)
-                        elapsed_minutes = (
-                            datetime.now() - window_start
-                        ).total_seconds() / 60
-                        remaining_minutes = window_duration_minutes - elapsed_minutes
-                        if remaining_minutes > 0.5:
-                            self.logger.info(
-                                "Waiting 30 seconds before next polling attempt..."
-                            )
-                            time.sleep(30)
-                        else:
-                            break
-
-            except Exception as e:
-                self.logger.error(f"Error in polling collection loop: {e}")
-                time.sleep(60)  # Wait 1 minute before retrying
+        self.scheduler = CollectionScheduler(self, clock)
+        asyncio.run(self.scheduler.run())
 
     def stop(self) -> None:
         """Stop the polling collection."""
         self.running = False
-        self.logger.info("Stopping intelligent polling collection...")
+        self.logger.info("Stopping collection scheduler...")
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self.token_sampler.flush()
@@ -0,0 +1,128 @@
+"""
+WoW Token price sampler.
+
+The token price changes on its own cadence (roughly every 20 minutes), not
+with the hourly commodities snapshot. The sampler polls every enabled
+region's token endpoint with conditional requests (If-Modified-Since), so
+an unchanged price costs a 304 with no body. Each new price is keyed by
+the endpoint's own last_updated_timestamp, and samples are buffered and
+written in bulk to the regions' *_token_price tables. The collection
+scheduler calls run_once on its own token task.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Any
+
+from repository.database import db_session
+from repository.token_repository import TokenPriceRepository
+from scraper.blizzard_api_utils import BlizzardAPI
+from utils.tracing import span
+
+# Samples kept per region while the database is unavailable (days of prices)
+MAX_PENDING_SAMPLES = 1000
+
+
+class TokenSampler:
+    """Polls token prices for all regions and bulk-writes new samples."""
+
+    def __init__(
+        self,
+        regions: list[str],
+        api_factory: Callable[[str], BlizzardAPI],
+        poll_interval_seconds: float | None = None,
+        flush_interval_seconds: float | None = None,
+    ):
+        self.regions = regions
+        self.api_factory = api_factory
+        self.poll_interval_seconds = poll_interval_seconds or float(
+            os.getenv("TOKEN_POLL_SECONDS", "60")
+        )
+        self.flush_interval_seconds = flush_interval_seconds or float(
+            os.getenv("TOKEN_FLUSH_SECONDS", "300")
+        )
+        self.logger = logging.getLogger(__name__)
+
+        self._apis: dict[str, BlizzardAPI] = {}
+        self._last_modified: dict[str, str | None] = {}
+        self._last_updated: dict[str, int] = {}
+        self._pending: dict[str, list[dict[str, Any]]] = {r: [] for r in regions}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _get_api(self, region: str) -> BlizzardAPI:
+        if region not in self._apis:
+            self._apis[region] = self.api_factory(region)
+        return self._apis[region]
+
+    def sample_region(self, region: str) -> bool:
+        """Poll one region; returns True if a new price was buffered."""
+        data, last_modified = self._get_api(region).get_wow_token_price_if_modified(
+            self._last_modified.get(region)
+        )
+        self._last_modified[region] = last_modified
+        if data is None:
+            return False
+
+        last_updated = data["last_updated_timestamp"]
+        if last_updated == self._last_updated.get(region):
+            return False
+        self._last_updated[region] = last_updated
+
+        with self._lock:
+            self._pending[region].append(
+                {
+                    "timestamp": datetime.fromtimestamp(last_updated / 1000, UTC),
+                    "price": data["price"],
+                }
+            )
+        return True
+
+    def sample_once(self) -> int:
+        """Poll every region once; returns the number of new prices buffered."""
+        sampled = 0
+        for region in self.regions:
+            try:
+                sampled += self.sample_region(region)
+            except Exception as e:
+                self.logger.warning(f"Token poll for {region.upper()} failed: {e}")
+        return sampled
+
+    def flush(self) -> int:
+        """Write buffered samples, one bulk insert per region."""
+        with self._lock:
+            pending = {region: rows for region, rows in self._pending.items() if rows}
+            self._pending = {region: [] for region in self.regions}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        try:
+            with db_session() as session:
+                for region, rows in pending.items():
+                    TokenPriceRepository(session, region).bulk_insert(rows)
+        except Exception as e:
+            self.logger.warning(f"Failed to write token prices: {e}")
+            with self._lock:
+                for region, rows in pending.items():
+                    self._pending[region][:0] = rows
+                    del self._pending[region][:-MAX_PENDING_SAMPLES]
+            return 0
+
+        written = sum(len(rows) for rows in pending.values())
+        self.logger.info(f"Stored {written} token price sample(s)")
+        return written
+
+    def run_once(self) -> int:
+        """Poll all regions and flush when the flush interval has elapsed."""
+        with span("token", regions=",".join(self.regions)) as token_span:
+            sampled = self.sample_once()
+            token_span.set_attribute("sampled", sampled)
+            if time.monotonic() - self._last_flush >= self.flush_interval_seconds:
+                with span("token_flush"):
+                    self.flush()
+        return sampled
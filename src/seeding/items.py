@@ -7,18 +7,22 @@ from sqlalchemy import DDL
 from models.models import Item
 from scraper.blizzard_api_utils import BlizzardAPI, BlizzardConfig
 from seeding.seeder import Seeder
+from utils.api_budget import PRIORITY_BACKGROUND
 
 class ItemSeeder(Seeder):
+    seeder_type = "items"
+
     def seed(self, session: Session) -> None:
         """Seed item data using the repository pattern."""
         config = BlizzardConfig(
             client_id=self.client_id, client_secret=self.client_secret, region="eu"
         )
-        api = BlizzardAPI(config)
+        api = BlizzardAPI(config, priority=PRIORITY_BACKGROUND)
 
-        # Fetch items in chunks of 1000
-        starting_id = 1
+        # Fetch items in chunks of 1000, resuming after the last committed chunk
+        starting_id = self.load_progress(session).get("next_item_id", 1)
         while True:
+            self.ensure_may_continue()
             items = api.search_items_by_id(starting_id=starting_id)
             if not items:
                 print(f"No more items found starting from ID {starting_id}.")
@@ -49,13 +53,14 @@ class ItemSeeder(Seeder):
                 print("No valid items to insert")
                 break
 
+            starting_id = item_values[-1]["id"] + 1
+
             stmt = pg_insert(Item).values(item_values)
             stmt = stmt.on_conflict_do_nothing()
             session.execute(stmt)
+            self.save_progress(session, {"next_item_id": starting_id})
             session.commit()
             
-            starting_id = item_values[-1]["id"] + 1
-            
             print(f"Inserted {len(item_values)} items, next starting ID: {starting_id}")
         
         # Create a commodities view after seeding items
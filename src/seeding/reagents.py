@@ -5,9 +5,12 @@ from sqlalchemy.orm import Session
 from repository.reagent_repository import ReagentRepository
 from scraper.blizzard_api_utils import BlizzardAPI, BlizzardConfig
 from seeding.seeder import Seeder
+from utils.api_budget import PRIORITY_BACKGROUND
 
 
 class ReagentSeeder(Seeder):
+    seeder_type = "reagents"
+
     def _process_reagents(self, recipe_info: dict) -> list[dict[str, Any]]:
         """Process recipe info and return list of reagent dictionaries."""
         reagents_list = []
@@ -57,12 +60,18 @@ class ReagentSeeder(Seeder):
         config = BlizzardConfig(
             client_id=self.client_id, client_secret=self.client_secret, region="eu"
         )
-        api = BlizzardAPI(config)
+        api = BlizzardAPI(config, priority=PRIORITY_BACKGROUND)
         reagent_repo = ReagentRepository(session)
 
         professions = api.get_professions()
+        # Professions already committed by an interrupted run
+        done = set(self.load_progress(session).get("professions", []))
 
         for profession in professions:
+            if profession["id"] in done:
+                print(f"Skipping profession: {profession['name']} (already seeded)")
+                continue
+            self.ensure_may_continue()
             print(f"Processing profession: {profession['name']}")
 
             profession_info = api.get_profession_info(profession["key"]["href"])
@@ -99,14 +108,16 @@ class ReagentSeeder(Seeder):
                             )
                         reagent_batch.extend(reagents)
 
-            if reagent_batch:
-                try:
-                    reagent_repo.batch_insert(reagent_batch)
-                    session.commit()
+            try:
+                reagent_repo.batch_insert(reagent_batch)
+                done.add(profession["id"])
+                self.save_progress(session, {"professions": sorted(done)})
+                session.commit()
+                if reagent_batch:
                     print(
                         f"Inserted reagents for {profession['name']} (processed {len(reagent_batch)} reagents)"
                     )
-                except Exception as e:
-                    session.rollback()
-                    print(f"Error inserting reagents for {profession['name']}: {e}")
-                    raise
+            except Exception as e:
+                session.rollback()
+                print(f"Error inserting reagents for {profession['name']}: {e}")
+                raise
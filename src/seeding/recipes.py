@@ -6,9 +6,12 @@ from sqlalchemy.orm import Session
 from repository.recipe_repository import RecipeRepository
 from scraper.blizzard_api_utils import BlizzardAPI, BlizzardConfig
 from seeding.seeder import Seeder
+from utils.api_budget import PRIORITY_BACKGROUND
 
 
 class RecipeSeeder(Seeder):
+    seeder_type = "recipes"
+
     def _process_recipe(
         self, recipe_info: dict, profession_name: str, tier_name: str
     ) -> list[dict[str, Any]]:
@@ -73,12 +76,18 @@ class RecipeSeeder(Seeder):
         config = BlizzardConfig(
             client_id=self.client_id, client_secret=self.client_secret, region="eu"
         )
-        api = BlizzardAPI(config)
+        api = BlizzardAPI(config, priority=PRIORITY_BACKGROUND)
         recipe_repo = RecipeRepository(session)
 
         professions = api.get_professions()
+        # Professions already committed by an interrupted run
+        done = set(self.load_progress(session).get("professions", []))
 
         for profession in professions:
+            if profession["id"] in done:
+                print(f"Skipping profession: {profession['name']} (already seeded)")
+                continue
+            self.ensure_may_continue()
             print(f"Processing profession: {profession['name']}")
 
             profession_info = api.get_profession_info(profession["key"]["href"])
@@ -120,7 +129,9 @@ class RecipeSeeder(Seeder):
                                 f"Faction: {recipe_data['faction']})"
                             )
 
+            recipe_repo.batch_insert(recipe_batch)
+            done.add(profession["id"])
+            self.save_progress(session, {"professions": sorted(done)})
+            session.commit()
             if recipe_batch:
-                recipe_repo.batch_insert(recipe_batch)
-                session.commit()
                 print(f"Inserted {len(recipe_batch)} recipes for {profession['name']}")
@@ -1,6 +1,7 @@
 import logging
 import os
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from datetime import UTC, datetime
 
 from dotenv import load_dotenv
@@ -11,9 +12,22 @@ from repository.database import db_session
 from utils.benchmark import BenchmarkManager
 
 
+class SeedingAborted(RuntimeError):
+    """Raised when a seeder is told to stop, e.g. because the replica lost leadership."""
+
+
 class Seeder(ABC):
-    def __init__(self, session: Session | None = None):
+    # seeder_status row holding this seeder's completion and checkpoint
+    seeder_type: str = ""
+
+    def __init__(
+        self,
+        session: Session | None = None,
+        should_continue: Callable[[], bool] | None = None,
+    ):
         self.session = session
+        # Asked before each chunk of work and each checkpoint
+        self.should_continue = should_continue
         self._load_env()
 
     def _load_env(self):
@@ -30,6 +44,35 @@ class Seeder(ABC):
         self.client_id: str = client_id
         self.client_secret: str = client_secret
 
+    def ensure_may_continue(self) -> None:
+        """Stop between chunks once should_continue says so.
+
+        Raises:
+            SeedingAborted: if the seeder may no longer write
+        """
+        if self.should_continue is not None and not self.should_continue():
+            raise SeedingAborted(f"{self.seeder_type} seeding stopped at its checkpoint")
+
+    def load_progress(self, session: Session) -> dict:
+        """Checkpoint left by an interrupted run, empty when starting fresh."""
+        status = session.get(SeederStatus, self.seeder_type)
+        return dict(status.progress or {}) if status is not None else {}
+
+    def save_progress(self, session: Session, progress: dict) -> None:
+        """Record a checkpoint in the caller's transaction (no commit).
+
+        Committing it together with the rows it covers means a restart
+        resumes exactly after the last committed batch. A seeder that
+        may no longer continue raises SeedingAborted instead, so the batch
+        is never committed.
+        """
+        self.ensure_may_continue()
+        status = session.get(SeederStatus, self.seeder_type)
+        if status is None:
+            status = SeederStatus(seeder_type=self.seeder_type, completed=False)
+            session.add(status)
+        status.progress = dict(progress)  # type: ignore
+
     @abstractmethod
     def seed(self, session: Session) -> None:
         """Implement seeding logic in subclasses."""
@@ -80,6 +123,7 @@ class SeederOrchestrator:
         if status:
             status.completed = True  # type: ignore
             status.completed_at = datetime.now(UTC)  # type: ignore
+            status.progress = None  # type: ignore
         else:
             status = SeederStatus(
                 seeder_type=seeder_type,
@@ -90,8 +134,13 @@ class SeederOrchestrator:
 
         session.commit()
 
-    def run_initial_seeding(self) -> None:
-        """Run all seeders sequentially if they haven't been completed."""
+    def run_initial_seeding(self, should_continue: Callable[[], bool] | None = None) -> None:
+        """Run all seeders sequentially if they haven't been completed.
+
+        Args:
+            should_continue: Checked before each profession or item chunk;
+                seeding raises SeedingAborted once it returns False
+        """
         with db_session() as session:
             if not self.should_run_seeders(session):
                 self.logger.info(
@@ -133,7 +182,7 @@ class SeederOrchestrator:
                         self.logger.info("Running recipes seeder...")
                         from seeding.recipes import RecipeSeeder
 
-                        recipe_seeder = RecipeSeeder(session)
+                        recipe_seeder = RecipeSeeder(session, should_continue)
                         recipe_seeder.seed(session)
                         self.mark_seeder_complete(session, "recipes")
                         self.logger.info("Recipes seeding completed successfully.")
@@ -154,7 +203,7 @@ class SeederOrchestrator:
                         self.logger.info("Running reagents seeder...")
                         from seeding.reagents import ReagentSeeder
 
-                        reagent_seeder = ReagentSeeder(session)
+                        reagent_seeder = ReagentSeeder(session, should_continue)
                         reagent_seeder.seed(session)
                         self.mark_seeder_complete(session, "reagents")
                         self.logger.info("Reagents seeding completed successfully.")
@@ -176,7 +225,7 @@ class SeederOrchestrator:
                         self.logger.info("Running items seeder...")
                         from seeding.items import ItemSeeder
 
-                        item_seeder = ItemSeeder(session)
+                        item_seeder = ItemSeeder(session, should_continue)
                         item_seeder.seed(session)
                         self.mark_seeder_complete(session, "items")
                         self.logger.info("Items seeding completed successfully.")
@@ -0,0 +1,123 @@
+"""
+Synthetic commodities feed generator.
+
+Produces documents shaped like the Blizzard commodities endpoint with
+realistic skew: item popularity follows a Zipf-like law (a few items carry
+most auctions), base prices are log-normal across items, and both unit
+price spreads and stack quantities are heavy-tailed (Pareto). Successive
+snapshots churn: some auctions sell or expire, some are relisted at a
+nearby price, new ones appear, and time_left buckets age.
+
+Everything is driven by a seeded random.Random, so feeds are reproducible.
+"""
+
+import json
+import random
+from dataclasses import dataclass
+from typing import Any
+
+TIME_LEFT_BUCKETS = ("SHORT", "MEDIUM", "LONG", "VERY_LONG")
+# Next bucket after an hour passes; SHORT auctions expire
+_AGED_TIME_LEFT = {"VERY_LONG": "VERY_LONG", "LONG": "MEDIUM", "MEDIUM": "SHORT"}
+
+
+@dataclass
+class CommodityFeedConfig:
+    auction_count: int = 50_000
+    item_count: int = 2_000
+    first_item_id: int = 190_000
+    # Zipf exponent of item popularity (higher = more concentrated)
+    popularity_exponent: float = 1.1
+    # Log-normal parameters of per-item base prices, in copper
+    price_log_mean: float = 9.5
+    price_log_sigma: float = 2.0
+    # Pareto shape of the markup over the item's base price
+    price_tail_alpha: float = 3.0
+    # Pareto shape and cap of stack quantities
+    quantity_tail_alpha: float = 1.3
+    max_quantity: int = 1_000
+    # Share of auctions that disappear between snapshots, and of those
+    # the share relisted at a nearby price
+    churn: float = 0.3
+    relist_share: float = 0.25
+    seed: int = 42
+
+
+class CommodityFeedGenerator:
+    """Generates a reproducible sequence of commodities snapshots."""
+
+    def __init__(self, config: CommodityFeedConfig | None = None):
+        self.config = config or CommodityFeedConfig()
+        self.random = random.Random(self.config.seed)
+        cfg = self.config
+
+        self.item_ids = list(range(cfg.first_item_id, cfg.first_item_id + cfg.item_count))
+        self.base_prices = {
+            item_id: max(1, int(self.random.lognormvariate(cfg.price_log_mean, cfg.price_log_sigma)))
+            for item_id in self.item_ids
+        }
+        self._popularity = [
+            1.0 / rank**cfg.popularity_exponent for rank in range(1, cfg.item_count + 1)
+        ]
+        self.random.shuffle(self._popularity)
+        self._next_auction_id = 1
+        self.auctions: list[dict[str, Any]] = self._new_auctions(cfg.auction_count)
+
+    def _quantity(self) -> int:
+        cfg = self.config
+        return min(cfg.max_quantity, int(self.random.paretovariate(cfg.quantity_tail_alpha)))
+
+    def _unit_price(self, item_id: int) -> int:
+        markup = self.random.paretovariate(self.config.price_tail_alpha)
+        return max(1, int(self.base_prices[item_id] * markup))
+
+    def _auction(self, item_id: int, unit_price: int, quantity: int) -> dict[str, Any]:
+        auction = {
+            "id": self._next_auction_id,
+            "item": {"id": item_id},
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "time_left": self.random.choice(TIME_LEFT_BUCKETS[1:]),
+        }
+        self._next_auction_id += 1
+        return auction
+
+    def _new_auctions(self, count: int) -> list[dict[str, Any]]:
+        items = self.random.choices(self.item_ids, weights=self._popularity, k=count)
+        return [
+            self._auction(item_id, self._unit_price(item_id), self._quantity())
+            for item_id in items
+        ]
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current snapshot as a commodities API document."""
+        return {
+            "_links": {"self": {"href": "https://example.invalid/data/wow/auctions/commodities"}},
+            "auctions": self.auctions,
+        }
+
+    def to_bytes(self) -> bytes:
+        """Current snapshot serialized as compact JSON, as the API sends it."""
+        return json.dumps(self.snapshot(), separators=(",", ":")).encode()
+
+    def advance(self) -> dict[str, Any]:
+        """Move one hour forward and return the new snapshot."""
+        cfg = self.config
+        survivors = []
+        relisted = []
+        for auction in self.auctions:
+            aged = _AGED_TIME_LEFT.get(auction["time_left"])
+            if aged is None or self.random.random() < cfg.churn:
+                if self.random.random() < cfg.relist_share:
+                    # Same stack back on the market at a slightly different price
+                    price = max(1, int(auction["unit_price"] * self.random.uniform(0.98, 1.02)))
+                    relisted.append(
+                        self._auction(auction["item"]["id"], price, auction["quantity"])
+                    )
+                continue
+            survivors.append({**auction, "time_left": aged})
+
+        # Top the market back up to the configured size with new listings
+        missing = max(0, cfg.auction_count - len(survivors) - len(relisted))
+        self.auctions = survivors + relisted + self._new_auctions(missing)
+        return self.snapshot()
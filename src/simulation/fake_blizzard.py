@@ -0,0 +1,400 @@
+"""
+Local stand-in for the Blizzard API.
+
+Serves the endpoints the scheduler uses, with synthetic data:
+
+    POST /oauth/token                                   client credentials
+    GET  /{region}/data/wow/auctions/commodities        Last-Modified / 304
+    GET  /{region}/data/wow/token/index                 Last-Modified / 304
+    GET  /{region}/data/wow/profession/index
+    GET  /{region}/data/wow/profession/{id}
+    GET  /{region}/data/wow/profession/{id}/skill-tier/{id}
+    GET  /{region}/data/wow/recipe/{id}
+    GET  /{region}/data/wow/search/item                 id=[start,] paging
+
+Commodities are published once per hour of the injected clock (at
+publish_minute plus a fixed per-region offset) from a churning
+CommodityFeedGenerator, and token prices change every
+token_interval_minutes. Latency, server errors and 429 throttling can be
+injected. Point a client at it with BLIZZARD_API_BASE_URL=server.base_url
+and BLIZZARD_OAUTH_URL=server.oauth_url.
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Protocol
+from urllib.parse import parse_qs, urlparse
+
+from simulation.commodities import CommodityFeedConfig, CommodityFeedGenerator
+
+
+class _Clock(Protocol):
+    def now(self) -> datetime: ...
+
+
+class _SystemClock:
+    def now(self) -> datetime:
+        return datetime.now(UTC)
+
+
+@dataclass
+class FakeBlizzardConfig:
+    auction_count: int = 50_000
+    item_count: int = 2_000
+    # Commodities publish at this minute past the hour, plus up to
+    # publish_spread_minutes of fixed per-region offset
+    publish_minute: int = 25
+    publish_spread_minutes: int = 15
+    token_interval_minutes: int = 20
+    # Fault injection
+    latency_seconds: float = 0.0
+    latency_jitter_seconds: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after_seconds: int = 1
+    # Static data sizes
+    profession_count: int = 3
+    tiers_per_profession: int = 2
+    recipes_per_tier: int = 25
+    searchable_items: int = 3_000
+    seed: int = 42
+
+
+@dataclass
+class _RegionFeed:
+    generator: CommodityFeedGenerator
+    published_at: datetime | None = None
+    body: bytes = b""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _http_date(when: datetime) -> str:
+    return format_datetime(when.astimezone(UTC), usegmt=True)
+
+
+class FakeBlizzardServer:
+    """Threaded HTTP server emulating the Blizzard API endpoints."""
+
+    def __init__(
+        self,
+        config: FakeBlizzardConfig | None = None,
+        clock: _Clock | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.config = config or FakeBlizzardConfig()
+        self.clock = clock or _SystemClock()
+        self.logger = logging.getLogger(__name__)
+        self.requests: Counter[tuple[str, int]] = Counter()
+        self.bytes_sent = 0
+        self._stats_lock = threading.Lock()
+        self._feeds: dict[str, _RegionFeed] = {}
+        self._feeds_lock = threading.Lock()
+        self._fault_random = random.Random(self.config.seed)
+        self._fault_lock = threading.Lock()
+
+        handler = type("FakeBlizzardHandler", (_Handler,), {"fake": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    # Lifecycle
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        return self.address + "/{region}"
+
+    @property
+    def oauth_url(self) -> str:
+        return self.address + "/oauth/token"
+
+    def start(self) -> "FakeBlizzardServer":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="fake-blizzard", daemon=True
+            )
+            self._thread.start()
+            self.logger.info(f"Fake Blizzard API listening on {self.address}")
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeBlizzardServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def record(self, kind: str, status: int, sent: int) -> None:
+        with self._stats_lock:
+            self.requests[(kind, status)] += 1
+            self.bytes_sent += sent
+
+    # Fault injection
+
+    def injected_fault(self) -> tuple[int, dict[str, str]] | None:
+        """Sleep the configured latency and maybe pick an injected failure."""
+        cfg = self.config
+        with self._fault_lock:
+            delay = cfg.latency_seconds + self._fault_random.uniform(0, cfg.latency_jitter_seconds)
+            roll = self._fault_random.random()
+        if delay > 0:
+            time.sleep(delay)
+        if roll < cfg.throttle_rate:
+            return 429, {"Retry-After": str(cfg.retry_after_seconds)}
+        if roll < cfg.throttle_rate + cfg.error_rate:
+            return 503, {}
+        return None
+
+    # Commodities
+
+    def _region_offset(self, region: str) -> int:
+        spread = max(1, self.config.publish_spread_minutes)
+        return random.Random(f"{self.config.seed}:{region}").randrange(spread)
+
+    def publish_time(self, region: str, now: datetime) -> datetime:
+        """Time of the latest commodities publish at or before now."""
+        minutes = self.config.publish_minute + self._region_offset(region)
+        published = now.replace(minute=0, second=0, microsecond=0) + timedelta(minutes=minutes)
+        while published > now:
+            published -= timedelta(hours=1)
+        return published
+
+    def commodities(self, region: str) -> tuple[datetime, bytes]:
+        with self._feeds_lock:
+            feed = self._feeds.get(region)
+            if feed is None:
+                feed = _RegionFeed(
+                    CommodityFeedGenerator(
+                        CommodityFeedConfig(
+                            auction_count=self.config.auction_count,
+                            item_count=self.config.item_count,
+                            seed=zlib.crc32(f"{self.config.seed}:{region}".encode()),
+                        )
+                    )
+                )
+                self._feeds[region] = feed
+
+        published = self.publish_time(region, self.clock.now())
+        with feed.lock:
+            if feed.published_at != published:
+                if feed.published_at is not None:
+                    feed.generator.advance()
+                feed.published_at = published
+                feed.body = feed.generator.to_bytes()
+            return feed.published_at, feed.body
+
+    # Token
+
+    def token(self, region: str) -> tuple[datetime, dict[str, Any]]:
+        interval = timedelta(minutes=self.config.token_interval_minutes)
+        now = self.clock.now()
+        slot = int(now.timestamp() // interval.total_seconds())
+        updated = datetime.fromtimestamp(slot * interval.total_seconds(), UTC)
+        price = random.Random(f"{self.config.seed}:{region}:{slot}").randint(
+            2_500_000_000, 3_500_000_000
+        )
+        return updated, {
+            "last_updated_timestamp": int(updated.timestamp() * 1000),
+            "price": price - price % 10_000,
+        }
+
+    # Static data
+
+    def profession_index(self, base: str) -> dict[str, Any]:
+        return {
+            "professions": [
+                {
+                    "key": {"href": f"{base}/data/wow/profession/{p}"},
+                    "name": f"Profession {p}",
+                    "id": p,
+                }
+                for p in range(1, self.config.profession_count + 1)
+            ]
+        }
+
+    def profession(self, base: str, profession_id: int) -> dict[str, Any]:
+        return {
+            "id": profession_id,
+            "name": f"Profession {profession_id}",
+            "skill_tiers": [
+                {
+                    "key": {"href": f"{base}/data/wow/profession/{profession_id}/skill-tier/{t}"},
+                    "name": f"Tier {t}",
+                    "id": t,
+                }
+                for t in range(1, self.config.tiers_per_profession + 1)
+            ],
+        }
+
+    def _recipe_id(self, profession_id: int, tier_id: int, n: int) -> int:
+        cfg = self.config
+        return ((profession_id - 1) * cfg.tiers_per_profession + tier_id - 1) * cfg.recipes_per_tier + n + 1
+
+    def skill_tier(self, base: str, profession_id: int, tier_id: int) -> dict[str, Any]:
+        recipe_ids = [
+            self._recipe_id(profession_id, tier_id, n) for n in range(self.config.recipes_per_tier)
+        ]
+        return {
+            "id": tier_id,
+            "name": f"Tier {tier_id}",
+            "categories": [
+                {
+                    "name": "Category 1",
+                    "recipes": [
+                        {"key": {"href": f"{base}/data/wow/recipe/{r}"}, "name": f"Recipe {r}", "id": r}
+                        for r in recipe_ids
+                    ],
+                }
+            ],
+        }
+
+    def recipe(self, recipe_id: int) -> dict[str, Any]:
+        rng = random.Random(f"{self.config.seed}:recipe:{recipe_id}")
+        first = 190_000
+        items = range(first, first + self.config.item_count)
+        return {
+            "id": recipe_id,
+            "name": f"Recipe {recipe_id}",
+            "crafted_item": {"id": rng.choice(items)},
+            "crafted_quantity": {"value": rng.randint(1, 3)},
+            "reagents": [
+                {"reagent": {"id": item_id}, "quantity": rng.randint(1, 10)}
+                for item_id in rng.sample(items, k=min(len(items), rng.randint(1, 4)))
+            ],
+        }
+
+    def item_search(self, start: int, page_size: int) -> dict[str, Any]:
+        first = 190_000
+        last = first + self.config.searchable_items
+        ids = range(max(start, first), min(last, max(start, first) + page_size))
+        named = lambda value: {"en_US": value}  # noqa: E731
+        return {
+            "results": [
+                {
+                    "data": {
+                        "id": item_id,
+                        "name": named(f"Item {item_id}"),
+                        "level": 70,
+                        "item_class": {"name": named("Tradeskill")},
+                        "item_subclass": {"name": named("Herb")},
+                        "inventory_type": {"name": named("Non-equippable")},
+                        "is_equippable": False,
+                        "is_stackable": True,
+                        "quality": {"name": named("Common")},
+                    }
+                }
+                for item_id in ids
+            ]
+        }
+
+
+_PROFESSION = re.compile(r"^/data/wow/profession/(\d+)$")
+_SKILL_TIER = re.compile(r"^/data/wow/profession/(\d+)/skill-tier/(\d+)$")
+_RECIPE = re.compile(r"^/data/wow/recipe/(\d+)$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fake: FakeBlizzardServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, kind: str, status: int, body: bytes = b"", headers: dict[str, str] | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body:
+            self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+        self.fake.record(kind, status, len(body))
+
+    def _send_json(self, kind: str, data: Any) -> None:
+        self._send(kind, 200, json.dumps(data).encode())
+
+    def _not_modified_since(self, modified: datetime) -> bool:
+        header = self.headers.get("If-Modified-Since")
+        if not header:
+            return False
+        try:
+            return modified.replace(microsecond=0) <= parsedate_to_datetime(header)
+        except (TypeError, ValueError):
+            return False
+
+    def _conditional(self, kind: str, modified: datetime, body: bytes) -> None:
+        headers = {"Last-Modified": _http_date(modified)}
+        if self._not_modified_since(modified):
+            self._send(kind, 304, headers=headers)
+        else:
+            self._send(kind, 200, body, headers)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if urlparse(self.path).path != "/oauth/token":
+            self._send("unknown", 404)
+            return
+        self._send_json("oauth", {"access_token": "fake-token", "token_type": "bearer", "expires_in": 86399})
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.split("/", 2)
+        if len(parts) < 3:
+            self._send("unknown", 404)
+            return
+        region, path = parts[1], "/" + parts[2]
+        base = f"{self.fake.address}/{region}"
+        params = parse_qs(url.query)
+
+        fault = self.fake.injected_fault()
+        if fault is not None:
+            status, headers = fault
+            self._send("fault", status, headers=headers)
+            return
+
+        if path == "/data/wow/auctions/commodities":
+            published, body = self.fake.commodities(region)
+            self._conditional("commodities", published, body)
+        elif path == "/data/wow/token/index":
+            updated, data = self.fake.token(region)
+            self._conditional("token", updated, json.dumps(data).encode())
+        elif path == "/data/wow/profession/index":
+            self._send_json("static", self.fake.profession_index(base))
+        elif match := _PROFESSION.match(path):
+            self._send_json("static", self.fake.profession(base, int(match[1])))
+        elif match := _SKILL_TIER.match(path):
+            self._send_json("static", self.fake.skill_tier(base, int(match[1]), int(match[2])))
+        elif match := _RECIPE.match(path):
+            self._send_json("static", self.fake.recipe(int(match[1])))
+        elif path == "/data/wow/search/item":
+            start = int(re.sub(r"[^\d]", "", params.get("id", ["[1,]"])[0].split(",")[0]) or 1)
+            page_size = int(params.get("_pageSize", ["100"])[0])
+            self._send_json("static", self.fake.item_search(start, page_size))
+        else:
+            self._send("unknown", 404)
@@ -0,0 +1,179 @@
+"""
+End-to-end soak run of the collection scheduler against the fake API.
+
+Starts a FakeBlizzardServer, points the Blizzard client at it and runs
+ScraperOrchestrator.start_polling_collection on an AcceleratedClock, so a
+day of hourly publishes, collection windows and token polls replays in
+minutes. Snapshots are written to the configured database. Resident memory
+is sampled throughout, and a summary of throughput, API traffic, injected
+faults and memory is printed (and optionally written as JSON) at the end.
+
+Usage:
+    python -m simulation.soak --virtual-hours 24 --speedup 360
+    python -m simulation.soak --auctions 200000 --throttle-rate 0.05 --error-rate 0.02
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from dataclasses import asdict
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from simulation.fake_blizzard import FakeBlizzardConfig, FakeBlizzardServer
+
+
+def _rss_bytes() -> int:
+    """Current resident set size, falling back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemorySampler:
+    """Samples RSS in a background thread."""
+
+    def __init__(self, interval_seconds: float = 1.0):
+        self.interval_seconds = interval_seconds
+        self.samples: list[tuple[float, int]] = []
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+        self._started = time.monotonic()
+
+    def start(self) -> "MemorySampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self.samples.append((time.monotonic() - self._started, _rss_bytes()))
+            self._stopping.wait(self.interval_seconds)
+
+    @property
+    def peak_bytes(self) -> int:
+        return max((rss for _, rss in self.samples), default=_rss_bytes())
+
+
+def run_soak(
+    fake_config: FakeBlizzardConfig,
+    regions: list[str],
+    virtual_hours: float,
+    speedup: float,
+) -> dict[str, Any]:
+    # Imported late: the API client and scheduler read the environment set here
+    from scraper.collection_scheduler import AcceleratedClock
+    from utils.metrics import COLLECTION_SECONDS, INGEST_ROWS_INSERTED, POLL_OUTCOMES
+
+    clock = AcceleratedClock(speedup)
+    server = FakeBlizzardServer(fake_config, clock=clock).start()
+    os.environ.update(
+        {
+            "BLIZZARD_API_BASE_URL": server.base_url,
+            "BLIZZARD_OAUTH_URL": server.oauth_url,
+            "BLIZZARD_API_CLIENT_ID": os.getenv("BLIZZARD_API_CLIENT_ID", "soak"),
+            "BLIZZARD_API_CLIENT_SECRET": os.getenv("BLIZZARD_API_CLIENT_SECRET", "soak"),
+            "COLLECTION_REGIONS": ",".join(regions),
+        }
+    )
+
+    from scraper.scraper import ScraperOrchestrator
+
+    orchestrator = ScraperOrchestrator()
+    end = clock.now() + timedelta(hours=virtual_hours)
+
+    def stop_at_end() -> None:
+        while clock.now() < end:
+            time.sleep(0.2)
+        orchestrator.stop()
+
+    sampler = MemorySampler().start()
+    started = time.monotonic()
+    threading.Thread(target=stop_at_end, name="soak-timer", daemon=True).start()
+    try:
+        orchestrator.start_polling_collection(clock)
+    finally:
+        elapsed = time.monotonic() - started
+        sampler.stop()
+        server.stop()
+
+    rows = sum(INGEST_ROWS_INSERTED.value(region=r) for r in regions)
+    return {
+        "virtual_hours": virtual_hours,
+        "speedup": speedup,
+        "wall_seconds": round(elapsed, 1),
+        "fake_api": asdict(fake_config),
+        "regions": {
+            region: {
+                "snapshots": int(POLL_OUTCOMES.value(region=region, outcome="success")),
+                "no_change_polls": int(POLL_OUTCOMES.value(region=region, outcome="no_change")),
+                "failed_polls": int(POLL_OUTCOMES.value(region=region, outcome="failed")),
+                "rows_inserted": int(INGEST_ROWS_INSERTED.value(region=region)),
+                "mean_collection_seconds": round(
+                    COLLECTION_SECONDS.total(region=region)
+                    / max(1, COLLECTION_SECONDS.count(region=region)),
+                    3,
+                ),
+            }
+            for region in regions
+        },
+        "rows_per_wall_second": round(rows / elapsed, 1) if elapsed else 0.0,
+        "api_requests": {
+            f"{kind} {status}": count for (kind, status), count in sorted(server.requests.items())
+        },
+        "api_bytes_sent": server.bytes_sent,
+        "peak_rss_mib": round(sampler.peak_bytes / 2**20, 1),
+        "final_rss_mib": round(_rss_bytes() / 2**20, 1),
+    }
+
+
+def main() -> None:
+    defaults = FakeBlizzardConfig()
+    parser = argparse.ArgumentParser(description="Soak test collection against a fake Blizzard API")
+    parser.add_argument("--regions", default="eu,us")
+    parser.add_argument("--virtual-hours", type=float, default=24.0)
+    parser.add_argument("--speedup", type=float, default=360.0, help="Virtual seconds per wall second")
+    parser.add_argument("--auctions", type=int, default=defaults.auction_count)
+    parser.add_argument("--items", type=int, default=defaults.item_count)
+    parser.add_argument("--latency", type=float, default=defaults.latency_seconds)
+    parser.add_argument("--latency-jitter", type=float, default=defaults.latency_jitter_seconds)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--report", type=Path, help="Also write the summary as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    fake_config = FakeBlizzardConfig(
+        auction_count=args.auctions,
+        item_count=args.items,
+        latency_seconds=args.latency,
+        latency_jitter_seconds=args.latency_jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+    )
+    regions = [r.strip().lower() for r in args.regions.split(",") if r.strip()]
+    summary = run_soak(fake_config, regions, args.virtual_hours, args.speedup)
+
+    print(json.dumps(summary, indent=2))
+    if args.report:
+        args.report.write_text(json.dumps(summary, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
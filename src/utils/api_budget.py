@@ -0,0 +1,204 @@
+"""
+Request budget for the Blizzard API, shared by every process.
+
+Blizzard allows a client 100 requests per second and 36,000 per hour. Every
+API client draws from one token bucket that refills at
+API_REQUESTS_PER_SECOND (default 10, the hourly cap spread evenly) and holds
+up to API_REQUEST_BURST requests (default 100), which keeps the client under
+both limits.
+
+The bucket lives in a row of the api_budget table, so scheduler replicas and
+job worker processes share one budget instead of each getting the full rate.
+A process leases up to API_BUDGET_LEASE tokens per round trip and spends
+them locally, so it hits the database once per batch rather than once per
+request; unspent leased tokens let the shared bucket run at most that many
+requests ahead per process. While the database is unreachable a process falls back to a bucket of its
+own, retrying the shared one every SHARED_RETRY_SECONDS; several processes
+can then exceed the limits together until it is back. API_BUDGET_SHARED=false
+keeps every process on its own bucket.
+
+Requests have a priority. Background requests (seeding) never take the last
+API_RESERVED_REQUESTS tokens and wait while any foreground request in the
+same process (collection, token sampling) is waiting, so a long crawl only
+uses budget that collection does not need.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from repository.api_budget_repository import ApiBudgetRepository
+from repository.database import get_session
+from utils.metrics import API_BUDGET_WAIT_SECONDS
+
+PRIORITY_FOREGROUND = 0
+PRIORITY_BACKGROUND = 1
+
+_PRIORITY_LABELS = {PRIORITY_FOREGROUND: "foreground", PRIORITY_BACKGROUND: "background"}
+
+# api_budget row holding the shared bucket
+SHARED_BUCKET = "blizzard"
+SHARED_RETRY_SECONDS = 30.0
+
+
+@dataclass
+class ApiBudget:
+    """Token bucket shared by every API client in the process.
+
+    With shared set, tokens come from the api_budget row instead, so the
+    limits hold across processes. A requests_per_second of 0 disables the
+    budget.
+    """
+
+    requests_per_second: float = 10.0
+    burst: float = 100.0
+    reserved: float = 20.0
+    shared: bool = False
+    bucket: str = SHARED_BUCKET
+    lease: int = 10  # Tokens taken from the shared bucket per round trip
+    _tokens: float = field(init=False)
+    _refilled_at: float = field(init=False, default_factory=time.monotonic)
+    _foreground_waiting: int = field(init=False, default=0)
+    _condition: threading.Condition = field(init=False, default_factory=threading.Condition)
+    # Monotonic time before which the shared bucket is not retried
+    _shared_retry_at: float = field(init=False, default=0.0)
+    # Shared tokens leased but not yet spent, by the floor they were taken above
+    _leased: dict[float, int] = field(init=False, default_factory=dict)
+    # Set while a thread is leasing from the shared bucket
+    _leasing: bool = field(init=False, default=False)
+
+    def __post_init__(self):
+        self.reserved = min(self.reserved, max(self.burst - 1, 0.0))
+        self.lease = max(int(self.lease), 1)
+        self._tokens = self.burst
+
+    @classmethod
+    def from_env(cls) -> "ApiBudget":
+        return cls(
+            requests_per_second=float(os.getenv("API_REQUESTS_PER_SECOND", "10")),
+            burst=float(os.getenv("API_REQUEST_BURST", "100")),
+            reserved=float(os.getenv("API_RESERVED_REQUESTS", "20")),
+            shared=os.getenv("API_BUDGET_SHARED", "true").lower() in ("1", "true", "yes"),
+            lease=int(os.getenv("API_BUDGET_LEASE", "10")),
+        )
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._refilled_at) * self.requests_per_second
+        )
+        self._refilled_at = now
+
+    def _take_shared(self, floor: float) -> tuple[int, float] | None:
+        session = get_session()
+        try:
+            taken = ApiBudgetRepository(session).take(
+                self.bucket, self.requests_per_second, self.burst, floor, self.lease
+            )
+            session.commit()
+            return taken
+        except SQLAlchemyError as e:
+            session.rollback()
+            self._shared_retry_at = time.monotonic() + SHARED_RETRY_SECONDS
+            logging.getLogger(__name__).warning(
+                f"Shared API budget unavailable, pacing this process alone "
+                f"for {SHARED_RETRY_SECONDS:.0f}s: {e}"
+            )
+            return None
+        finally:
+            session.close()
+
+    def _lease_shared(self, floor: float) -> tuple[int, float] | None:
+        """Lease a batch of shared tokens, releasing the condition for the
+        database round trip so other threads keep spending leased tokens."""
+        self._leasing = True
+        self._condition.release()
+        try:
+            return self._take_shared(floor)
+        finally:
+            self._condition.acquire()
+            self._leasing = False
+            self._condition.notify_all()
+
+    def _spend_leased(self, floor: float) -> bool:
+        # Tokens leased above a higher floor are safe to spend at a lower one
+        for leased_floor, count in self._leased.items():
+            if count and leased_floor >= floor:
+                self._leased[leased_floor] = count - 1
+                return True
+        return False
+
+    def _take(self, floor: float) -> float | None:
+        """Take a token if more than floor are left (condition held).
+
+        Returns:
+            0.0 when a token was taken, None while another thread is leasing
+            from the shared bucket, otherwise how many tokens short the
+            bucket is
+        """
+        if self._spend_leased(floor):
+            return 0.0
+        if self.shared and time.monotonic() >= self._shared_retry_at:
+            if self._leasing:
+                return None
+            leased = self._lease_shared(floor)
+            if leased is not None:
+                taken, shortfall = leased
+                if not taken:
+                    return shortfall
+                self._leased[floor] = self._leased.get(floor, 0) + taken - 1
+                return 0.0
+        self._refill()
+        if self._tokens - floor >= 1:
+            self._tokens -= 1
+            return 0.0
+        return floor + 1 - self._tokens
+
+    def acquire(self, priority: int = PRIORITY_FOREGROUND) -> float:
+        """Block until the request may be sent.
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.requests_per_second <= 0:
+            return 0.0
+        started = time.monotonic()
+        foreground = priority == PRIORITY_FOREGROUND
+        floor = 0.0 if foreground else self.reserved
+        with self._condition:
+            if foreground:
+                self._foreground_waiting += 1
+            try:
+                while True:
+                    shortfall: float | None = 0.0
+                    if foreground or not self._foreground_waiting:
+                        shortfall = self._take(floor)
+                        if shortfall is not None and shortfall <= 0:
+                            break
+                    # A lease in flight notifies when it lands
+                    shortfall = 1.0 if shortfall is None else shortfall
+                    self._condition.wait(max(shortfall / self.requests_per_second, 0.001))
+            finally:
+                if foreground:
+                    self._foreground_waiting -= 1
+                    self._condition.notify_all()
+        waited = time.monotonic() - started
+        API_BUDGET_WAIT_SECONDS.observe(waited, priority=_PRIORITY_LABELS.get(priority, str(priority)))
+        return waited
+
+
+_budget: ApiBudget | None = None
+_budget_lock = threading.Lock()
+
+
+def get_api_budget() -> ApiBudget:
+    """Get the process-wide API request budget."""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = ApiBudget.from_env()
+        return _budget
@@ -0,0 +1,60 @@
+import json
+import re
+
+_AUCTIONS_START = re.compile(rb'"auctions"\s*:\s*\[')
+# Separator between two auction objects in Blizzard's compact JSON
+_AUCTION_BOUNDARY = b'},{"id"'
+
+
+class AuctionStreamSplitter:
+    """Cuts a streamed commodities document into batches of whole auctions.
+
+    feed() takes raw response chunks and yields JSON arrays of complete
+    auction objects, so batches can be decoded independently while the rest
+    of the document is still downloading. finish() decodes whatever is left.
+    If the document is not in the expected compact shape, nothing is cut
+    early and finish() falls back to decoding the whole document.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._in_auctions = False
+        self._prefix = bytearray()
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        if not self._in_auctions:
+            self._prefix += chunk
+            match = _AUCTIONS_START.search(self._prefix)
+            if not match:
+                return []
+            self._in_auctions = True
+            self._buffer = bytearray(self._prefix[match.end():])
+            self._prefix = bytearray()
+        else:
+            self._buffer += chunk
+
+        cut = self._buffer.rfind(_AUCTION_BOUNDARY)
+        if cut < 0:
+            return []
+        batch = b"[" + bytes(self._buffer[: cut + 1]) + b"]"
+        del self._buffer[: cut + 2]
+        return [batch]
+
+    def finish(self) -> list[bytes]:
+        if not self._in_auctions:
+            # Unexpected layout: decode the whole document at once
+            document = json.loads(self._prefix) if self._prefix else {}
+            self._prefix = bytearray()
+            auctions = document.get("auctions", [])
+            return [json.dumps(auctions).encode()] if auctions else []
+
+        # The tail holds the last auctions, the closing bracket and any
+        # trailing keys of the document
+        tail = "[" + self._buffer.decode()
+        auctions, end = json.JSONDecoder().raw_decode(tail)
+        self._buffer = bytearray()
+        return [tail[:end].encode()] if auctions else []
+
+    @staticmethod
+    def decode(batch: bytes) -> list[dict]:
+        return json.loads(batch)
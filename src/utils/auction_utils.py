@@ -1,11 +1,52 @@
+import math
 import statistics
+from datetime import datetime
+
+# Relative width of the unit-price bands used to match relisted auctions
+RELIST_PRICE_BAND = 0.05
+
+# Stored codes of the API's time_left buckets
+TIME_LEFT_CODES = {
+    "SHORT": 1,  # <0.5 hours
+    "MEDIUM": 2,  # 0.5 - 2 hours
+    "LONG": 3,  # 2 - 12 hours
+    "VERY_LONG": 4,  # 12 - 48 hours
+}
 
-# TODO: add more logic to this estimation. e.g. was it likely that an entry was relisted?
-# Could implement a function to check for relistings, return these IDs, and remove from set
 # TODO: Once I have market trend data, I need to check if the price of the delisting was
 # not in line with the market value. This will tell me if it was a cancellation or a sale.
 
 
+def snapshot_rows(auctions: list[dict], snapshot_time: datetime) -> list[dict]:
+    """Map API commodity auctions to auction snapshot rows"""
+    return [
+        {
+            "auction_id": auction["id"],
+            "item_id": auction["item"]["id"],
+            "unit_price": auction["unit_price"],
+            "quantity": auction["quantity"],
+            "time_left": TIME_LEFT_CODES[auction["time_left"]],
+            "snapshot_time": snapshot_time,
+        }
+        for auction in auctions
+    ]
+
+
+def group_snapshot_rows(
+    rows: list[dict], grouped: dict[int, list[dict]] | None = None
+) -> dict[int, list[dict]]:
+    """Group snapshot rows by item_id, adding to `grouped` when given"""
+    grouped = {} if grouped is None else grouped
+    for row in rows:
+        grouped.setdefault(row["item_id"], []).append({
+            "id": row["auction_id"],
+            "quantity": row["quantity"],
+            "unit_price": row["unit_price"],
+            "time_left": row["time_left"]
+        })
+    return grouped
+
+
 def calculate_median_price(auctions: list[dict]) -> int:
     """Calculate median price from list of auctions"""
     prices = []
@@ -37,6 +78,71 @@ def count_new_listings(current: list[dict], previous: list[dict]) -> int:
     )
 
 
+def price_band(unit_price: int, band_width: float = RELIST_PRICE_BAND) -> int:
+    """Logarithmic price band of a unit price; neighbouring bands differ by band_width"""
+    if unit_price <= 0:
+        return 0
+    return int(math.log(unit_price) / math.log1p(band_width))
+
+
+def classify_disappeared_auctions(
+    current_by_item: dict[int, list[dict]],
+    previous_by_item: dict[int, list[dict]],
+    band_width: float = RELIST_PRICE_BAND,
+) -> dict[int, dict[str, int]]:
+    """Split the quantity of disappeared auctions into sold, relisted and expired
+
+    A disappeared auction is relisted when a newly appeared auction of the same
+    item has the same quantity and a unit price in the same or a neighbouring
+    price band; each new auction can absorb one relisting. Unmatched
+    disappearances that had less than 30 minutes left are expired, the rest
+    are counted as sold. Both snapshots are walked once, with the new auctions
+    hash-indexed by (item_id, quantity, price band).
+
+    Args:
+        current_by_item: Item ID -> current auctions ('id', 'quantity', 'unit_price')
+        previous_by_item: Item ID -> previous auctions ('id', 'quantity',
+            'unit_price', 'time_left')
+        band_width: Relative width of a price band
+
+    Returns:
+        Item ID -> {'sold', 'relisted', 'expired'} quantities for every item of
+        the previous snapshot
+    """
+    previous_ids = {a["id"] for auctions in previous_by_item.values() for a in auctions}
+    current_ids = set()
+
+    # Unmatched new auctions per (item_id, quantity, price band)
+    appeared: dict[tuple[int, int, int], int] = {}
+    for item_id, auctions in current_by_item.items():
+        for a in auctions:
+            current_ids.add(a["id"])
+            if a["id"] not in previous_ids:
+                key = (item_id, a["quantity"], price_band(a["unit_price"], band_width))
+                appeared[key] = appeared.get(key, 0) + 1
+
+    breakdown = {}
+    for item_id, auctions in previous_by_item.items():
+        counts = {"sold": 0, "relisted": 0, "expired": 0}
+        for a in auctions:
+            if a["id"] in current_ids:
+                continue
+            band = price_band(a["unit_price"], band_width)
+            for candidate in (band, band - 1, band + 1):
+                key = (item_id, a["quantity"], candidate)
+                if appeared.get(key):
+                    appeared[key] -= 1
+                    counts["relisted"] += a["quantity"]
+                    break
+            else:
+                if a["time_left"] == 1:  # 1 = less than 30 minutes
+                    counts["expired"] += a["quantity"]
+                else:
+                    counts["sold"] += a["quantity"]
+        breakdown[item_id] = counts
+    return breakdown
+
+
 def calculate_commodity_stats(auctions: list[dict]) -> dict:
     """Calculate statistics for a commodity from its auctions
     
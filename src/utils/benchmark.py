@@ -5,13 +5,23 @@ from typing import Any, Dict, Optional
 from sqlalchemy.orm import Session
 
 from models.models import Benchmark
+from utils.telemetry import TelemetryWriter, get_telemetry_writer
 
 
 class BenchmarkManager:
-    """Manager for recording operation benchmarks."""
+    """Manager for recording operation benchmarks.
 
-    def __init__(self, session: Session):
+    Benchmarks are handed to the write-behind telemetry writer, so recording
+    one never commits (or otherwise touches) the caller's session.
+    """
+
+    def __init__(
+        self,
+        session: Optional[Session] = None,
+        writer: Optional[TelemetryWriter] = None,
+    ):
         self.session = session
+        self.writer = writer or get_telemetry_writer()
 
     def record_benchmark(
         self,
@@ -25,25 +35,25 @@ class BenchmarkManager:
         error_message: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
     ) -> None:
-        """Record a benchmark entry in the database."""
+        """Queue a benchmark entry for the database."""
         duration = (end_time - start_time).total_seconds()
 
-        benchmark = Benchmark(
-            operation_type=operation_type,
-            operation_name=operation_name,
-            region=region,
-            start_time=start_time,
-            end_time=end_time,
-            duration_seconds=duration,
-            record_count=record_count,
-            status=status,
-            error_message=error_message,
-            metadata=metadata,
+        self.writer.record(
+            Benchmark,
+            {
+                "operation_type": operation_type,
+                "operation_name": operation_name,
+                "region": region,
+                "start_time": start_time,
+                "end_time": end_time,
+                "duration_seconds": duration,
+                "record_count": record_count,
+                "status": status,
+                "error_message": error_message[:500] if error_message else None,
+                "extra_data": metadata,
+            },
         )
 
-        self.session.add(benchmark)
-        self.session.commit()
-
     @contextmanager
     def benchmark_operation(
         self,
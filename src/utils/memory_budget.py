@@ -0,0 +1,74 @@
+"""
+Memory budget for snapshot collection.
+
+Collecting a snapshot in memory keeps the current and previous snapshots
+grouped by item, so peak memory grows with the payload. MemoryBudget
+estimates that peak from the size of the incoming commodities payload and
+tells the collector to switch to its chunked low-memory mode when the
+estimate exceeds MEMORY_BUDGET_MB (unset or 0 disables the budget).
+"""
+
+import os
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any
+
+# Peak bytes per byte of commodities JSON when collecting in memory.
+# tracemalloc measures about 9 on synthetic feeds; rounded up for allocator
+# overhead that tracemalloc does not see
+PAYLOAD_MEMORY_FACTOR = 12.0
+
+# Average size of one auction in the commodities JSON, for estimating the
+# payload from a snapshot's row count
+AUCTION_JSON_BYTES = 88
+
+
+@dataclass
+class MemoryBudget:
+    budget_bytes: int | None = None
+
+    @classmethod
+    def from_env(cls) -> "MemoryBudget":
+        megabytes = float(os.getenv("MEMORY_BUDGET_MB", "0") or 0)
+        return cls(int(megabytes * 2**20) if megabytes > 0 else None)
+
+    @staticmethod
+    def estimate_peak_bytes(payload_bytes: int) -> int:
+        return int(payload_bytes * PAYLOAD_MEMORY_FACTOR)
+
+    def requires_low_memory(self, payload_bytes: int | None) -> bool:
+        """Whether collecting a payload of this size in memory would exceed the budget."""
+        if self.budget_bytes is None or not payload_bytes:
+            return False
+        return self.estimate_peak_bytes(payload_bytes) > self.budget_bytes
+
+
+def payload_size(headers, previous_row_count: int | None = None) -> int | None:
+    """Size of the decoded commodities payload, from headers or the last snapshot.
+
+    Content-Length only gives the decoded size when the body is not
+    compressed; otherwise the previous snapshot's row count is the best guess.
+    """
+    length = headers.get("Content-Length")
+    if length and not headers.get("Content-Encoding"):
+        return int(length)
+    if previous_row_count:
+        return previous_row_count * AUCTION_JSON_BYTES
+    return None
+
+
+def top_allocations(limit: int = 10) -> list[dict[str, Any]]:
+    """Largest live allocation sites by source line, when tracemalloc is running."""
+    if not tracemalloc.is_tracing():
+        return []
+    statistics = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    ).statistics("lineno")
+    return [
+        {
+            "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in statistics[:limit]
+    ]
@@ -12,7 +12,9 @@ from datetime import datetime, timedelta
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from models.models import get_region_tables
 from repository.database import db_session
+from scraper.regions import get_enabled_regions
 
 
 class PartitionManager:
@@ -20,15 +22,40 @@ class PartitionManager:
 
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.regions = get_enabled_regions()
         self.partitioned_tables = [
-            "auction_snapshots_eu",
-            "auction_snapshots_us",
-            "eu_commodity_price_stats",
-            "us_commodity_price_stats",
-            "eu_token_price",
-            "us_token_price",
+            model.__tablename__
+            for region in self.regions
+            for model in (
+                get_region_tables(region).auction_snapshot,
+                get_region_tables(region).commodity_price_stats,
+                get_region_tables(region).token_price,
+            )
         ]
 
+    def ensure_region_tables(self, session: Session) -> None:
+        """
+        Create the partitioned tables (and initial partitions) for every enabled region.
+
+        Args:
+            session: Database session
+        """
+        try:
+            for region in self.regions:
+                session.execute(
+                    text("SELECT create_region_tables(:region)"), {"region": region}
+                )
+            session.commit()
+
+            self.logger.info(
+                f"Region tables ready for {', '.join(self.regions).upper()}"
+            )
+
+        except Exception as e:
+            self.logger.error(f"Failed to create region tables: {e}")
+            session.rollback()
+            raise
+
     def ensure_future_partitions(self, session: Session, months_ahead: int = 6) -> None:
         """
         Ensure partitions exist for the specified number of months ahead.
@@ -100,12 +127,9 @@ class PartitionManager:
                     tablename as partition_name,
                     'time_partition' as partition_type
                 FROM pg_tables pt
-                WHERE (pt.tablename LIKE '%auction_snapshots_eu_%' 
-                       OR pt.tablename LIKE '%auction_snapshots_us_%'
-                       OR pt.tablename LIKE '%eu_commodity_price_stats_%'
-                       OR pt.tablename LIKE '%us_commodity_price_stats_%'
-                       OR pt.tablename LIKE '%eu_token_price_%'
-                       OR pt.tablename LIKE '%us_token_price_%')
+                WHERE (pt.tablename LIKE 'auction_snapshots_%' 
+                       OR pt.tablename LIKE '%_commodity_price_stats_%'
+                       OR pt.tablename LIKE '%_token_price_%')
                   AND pt.tablename ~ '_[0-9]{4}_[0-9]{2}$'
                 ORDER BY schemaname, tablename
             """)
@@ -151,10 +175,8 @@ class PartitionManager:
                 SELECT tablename
                 FROM pg_tables
                 WHERE (tablename LIKE '%auction_snapshots_%'
-                   OR tablename LIKE '%eu_commodity_price_stats_%'
-                   OR tablename LIKE '%us_commodity_price_stats_%'
-                   OR tablename LIKE '%eu_token_price_%'
-                   OR tablename LIKE '%us_token_price_%')
+                   OR tablename LIKE '%_commodity_price_stats_%'
+                   OR tablename LIKE '%_token_price_%')
                    AND tablename ~ '\\d{{4}}_\\d{{2}}$'
                    AND substring(tablename from '(\\d{{4}}_\\d{{2}})$') < '{cutoff_str}'
             """)
@@ -311,6 +333,7 @@ class PartitionManagerService:
         try:
             with db_session() as session:
                 self.logger.info("Initializing partition management...")
+                self.partition_manager.ensure_region_tables(session)
                 self.partition_manager.ensure_future_partitions(session, months_ahead=6)
                 self.logger.info("Partition initialization completed")
         except Exception as e:
@@ -0,0 +1,198 @@
+"""
+Threaded stage pipeline connected by bounded queues.
+
+Each stage runs a function over the items of its input queue on its own
+worker threads and puts whatever the function yields on the next stage's
+queue. Queues are bounded, so a slow stage applies backpressure upstream
+instead of letting work pile up in memory. The end-to-end time approaches
+that of the slowest stage because network waits, C-level parsing and
+database round trips of different items overlap.
+
+The first error in any stage aborts the whole pipeline and is re-raised
+from run().
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+@dataclass
+class Stage:
+    name: str
+    function: Callable[[Any], Iterable[Any] | None]
+    workers: int = 1
+    queue_size: int = 8
+    # Called once after the input is exhausted (single-worker stages only)
+    finish: Callable[[], Iterable[Any] | None] | None = None
+    items: int = 0
+    # Time in the stage function, excluding waits on a full downstream queue
+    busy_seconds: float = 0.0
+    # Wall-clock window in which the stage was working (time.time_ns)
+    first_started_ns: int | None = None
+    last_finished_ns: int | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class PipelineAborted(Exception):
+    """Raised inside workers when another stage has failed."""
+
+
+class Pipeline:
+    """Runs a source iterable through a chain of stages."""
+
+    def __init__(
+        self,
+        name: str,
+        on_item: Callable[[str, float], None] | None = None,
+    ):
+        self.name = name
+        # Called with (stage name, seconds) after each processed item
+        self.on_item = on_item
+        self.stages: list[Stage] = []
+        self.logger = logging.getLogger(__name__)
+        self._error: BaseException | None = None
+        self._abort = threading.Event()
+        self.started_ns: int | None = None
+        self.source_finished_ns: int | None = None
+        self.source_items = 0
+
+    def add_stage(
+        self,
+        name: str,
+        function: Callable[[Any], Iterable[Any] | None],
+        workers: int = 1,
+        queue_size: int = 8,
+        finish: Callable[[], Iterable[Any] | None] | None = None,
+    ) -> "Pipeline":
+        if finish is not None and workers != 1:
+            raise ValueError("A stage with a finish callback must have one worker")
+        self.stages.append(Stage(name, function, max(1, workers), max(1, queue_size), finish))
+        return self
+
+    def _put(self, target: queue.Queue, item: Any) -> None:
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted
+            try:
+                target.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source: queue.Queue) -> Any:
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted
+            try:
+                return source.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+
+    def _fail(self, error: BaseException) -> None:
+        if self._error is None:
+            self._error = error
+        self._abort.set()
+
+    def _emit(self, outputs: Iterable[Any] | None, target: queue.Queue | None) -> None:
+        if outputs is None:
+            return
+        for output in outputs:
+            if target is not None:
+                self._put(target, output)
+
+    def run(self, source: Iterable[Any]) -> None:
+        """Feed the source through every stage and wait for completion."""
+        if not self.stages:
+            raise ValueError("Pipeline has no stages")
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+
+        def worker(index: int) -> None:
+            stage = self.stages[index]
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            try:
+                while True:
+                    item = self._get(inbox)
+                    if item is _DONE:
+                        break
+                    started_ns = time.time_ns()
+                    started = time.perf_counter()
+                    outputs = stage.function(item)
+                    # Generators do their work as they are iterated, so run
+                    # them here; time blocked on a full downstream queue is
+                    # the next stage's doing, not this one's
+                    if outputs is not None and not isinstance(outputs, list | tuple):
+                        outputs = list(outputs)
+                    elapsed = time.perf_counter() - started
+                    finished_ns = time.time_ns()
+                    self._emit(outputs, outbox)
+                    with stage._lock:
+                        stage.items += 1
+                        stage.busy_seconds += elapsed
+                        if stage.first_started_ns is None:
+                            stage.first_started_ns = started_ns
+                        stage.last_finished_ns = finished_ns
+                    if self.on_item is not None:
+                        self.on_item(stage.name, elapsed)
+                if stage.finish is not None:
+                    self._emit(stage.finish(), outbox)
+                    stage.last_finished_ns = time.time_ns()
+
+                # The last worker of a stage closes the next stage's input
+                with remaining_lock:
+                    remaining[index] -= 1
+                    last = remaining[index] == 0
+                if last and outbox is not None:
+                    for _ in range(self.stages[index + 1].workers):
+                        self._put(outbox, _DONE)
+            except PipelineAborted:
+                pass
+            except BaseException as e:
+                self._fail(e)
+
+        threads = [
+            threading.Thread(
+                target=worker, args=(index,), name=f"{self.name}-{stage.name}-{n}", daemon=True
+            )
+            for index, stage in enumerate(self.stages)
+            for n in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        # The source runs on the calling thread
+        self.started_ns = time.time_ns()
+        try:
+            for item in source:
+                self.source_items += 1
+                self._put(queues[0], item)
+            self.source_finished_ns = time.time_ns()
+            for _ in range(self.stages[0].workers):
+                self._put(queues[0], _DONE)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+        for thread in threads:
+            thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+    def stage_summary(self) -> dict[str, dict[str, float]]:
+        """Items processed and busy seconds per stage."""
+        return {
+            stage.name: {"items": stage.items, "busy_seconds": round(stage.busy_seconds, 3)}
+            for stage in self.stages
+        }
@@ -0,0 +1,136 @@
+"""
+Write-behind buffering for telemetry tables (benchmarks, scraper_logs).
+
+Telemetry rows are appended to an in-memory buffer and written in batches
+by a background thread on its own database session, at a fixed interval,
+when the buffer fills up, or on shutdown. Recording a row therefore never
+touches the caller's session or adds a commit to the ingest path.
+"""
+
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Any
+
+from repository.database import db_session
+
+
+class TelemetryWriter:
+    """Buffers telemetry rows in memory and flushes them in batches in the background."""
+
+    def __init__(
+        self,
+        flush_interval_seconds: float = 5.0,
+        flush_threshold: int = 500,
+        max_buffered: int = 50000,
+        max_attempts: int = 3,
+    ):
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_threshold = flush_threshold
+        self.max_buffered = max_buffered
+        self.max_attempts = max_attempts
+        self.logger = logging.getLogger(__name__)
+        self.dropped = 0
+
+        # (model, row values, failed flush attempts)
+        self._buffer: deque[tuple[Any, dict[str, Any], int]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(self, model, values: dict[str, Any]) -> None:
+        """Queue one row for the model's table; never blocks on the database."""
+        with self._lock:
+            if len(self._buffer) >= self.max_buffered:
+                # Shed the oldest rows rather than grow without bound
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append((model, values, 0))
+            pending = len(self._buffer)
+
+        if self._thread is None:
+            self.start()
+        if pending >= self.flush_threshold:
+            self._wake.set()
+
+    def start(self) -> None:
+        """Start the background flush thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="telemetry-writer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the background thread and flush whatever is still buffered."""
+        thread = self._thread
+        self._stopping.set()
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Write all buffered rows now and return how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return 0
+
+            rows_by_table: dict[Any, list[dict[str, Any]]] = {}
+            for model, values, _ in batch:
+                rows_by_table.setdefault(model.__table__, []).append(values)
+
+            try:
+                with db_session() as session:
+                    for table, rows in rows_by_table.items():
+                        session.execute(table.insert(), rows)
+            except Exception as e:
+                retry = [
+                    (model, values, attempts + 1)
+                    for model, values, attempts in batch
+                    if attempts + 1 < self.max_attempts
+                ]
+                self.logger.warning(
+                    f"Failed to flush {len(batch)} telemetry rows "
+                    f"({len(retry)} will be retried): {e}"
+                )
+                with self._lock:
+                    self.dropped += len(batch) - len(retry)
+                    # Put the batch back in front of anything recorded since
+                    self._buffer.extendleft(reversed(retry))
+                    while len(self._buffer) > self.max_buffered:
+                        self._buffer.pop()
+                        self.dropped += 1
+                return 0
+
+            return len(batch)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            self.flush()
+
+
+_writer: TelemetryWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_telemetry_writer() -> TelemetryWriter:
+    """Get the process-wide telemetry writer, flushed automatically at exit."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = TelemetryWriter()
+            atexit.register(_writer.stop)
+        return _writer
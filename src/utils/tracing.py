@@ -0,0 +1,337 @@
+"""
+Lightweight hierarchical tracing for the collection path.
+
+span() opens a timed span as a child of the current one (tracked in a
+contextvar), so nesting follows the call stack:
+
+    with span("collection_window", region="us"):
+        with span("region", region="us"):
+            with span("commit"):
+                ...
+
+When a root span ends, the finished trace is handed to the configured
+exporters (TRACE_EXPORTERS, comma separated):
+
+    benchmarks - one `benchmarks` row per trace, span tree in extra_data
+    otlp_file  - OTLP/JSON lines appended to TRACE_OTLP_FILE
+
+Context does not follow work into plain threads; submit such work with
+contextvars.copy_context().run (asyncio.to_thread already does this), or
+record already-timed work with record_span().
+"""
+
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any, Protocol
+
+from models.models import Benchmark
+from utils.telemetry import get_telemetry_writer
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: str | None = None
+    children: list["Span"] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    # tracemalloc (traced bytes at start, running peak) while memory profiling
+    _memory: list[int] | None = field(default=None, repr=False)
+
+    @property
+    def duration_seconds(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def _add_child(self, child: "Span") -> None:
+        # Children may finish on other threads
+        with self._lock:
+            self.children.append(child)
+
+    def walk(self) -> Iterator["Span"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Nested span tree, offsets relative to this span's start."""
+        return self._to_dict(self.start_ns)
+
+    def _to_dict(self, origin_ns: int) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "name": self.name,
+            "offset_seconds": round((self.start_ns - origin_ns) / 1e9, 6),
+            "duration_seconds": round(self.duration_seconds, 6),
+            "status": self.status,
+        }
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [
+                child._to_dict(origin_ns)
+                for child in sorted(self.children, key=lambda c: c.start_ns)
+            ]
+        return data
+
+
+class SpanExporter(Protocol):
+    def export(self, root: Span) -> None: ...
+
+
+class BenchmarkExporter:
+    """Writes each trace as one benchmarks row through the telemetry writer."""
+
+    def export(self, root: Span) -> None:
+        span_count = sum(1 for _ in root.walk())
+        get_telemetry_writer().record(
+            Benchmark,
+            {
+                "operation_type": "trace",
+                "operation_name": root.name[:100],
+                "region": root.attributes.get("region"),
+                "start_time": datetime.fromtimestamp(root.start_ns / 1e9, UTC),
+                "end_time": datetime.fromtimestamp((root.end_ns or root.start_ns) / 1e9, UTC),
+                "duration_seconds": root.duration_seconds,
+                "record_count": span_count,
+                "status": "success" if root.status == "ok" else "failed",
+                "error_message": root.error[:500] if root.error else None,
+                "extra_data": {"trace_id": root.trace_id, "span": root.to_dict()},
+            },
+        )
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPFileExporter:
+    """Appends each trace as one OTLP/JSON ExportTraceServiceRequest line."""
+
+    def __init__(self, path: str, service_name: str = "ironforge-scheduler"):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def _span(self, span: Span) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in span.attributes.items()
+            ],
+            "status": {"code": 1} if span.status == "ok" else {"code": 2, "message": span.error or ""},
+        }
+        if span.parent_id:
+            data["parentSpanId"] = span.parent_id
+        return data
+
+    def export(self, root: Span) -> None:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": self.service_name}}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "ironforge.tracing"},
+                            "spans": [self._span(span) for span in root.walk()],
+                        }
+                    ],
+                }
+            ]
+        }
+        line = json.dumps(request, default=str)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def _exporters_from_env() -> list[SpanExporter]:
+    exporters: list[SpanExporter] = []
+    for name in os.getenv("TRACE_EXPORTERS", "benchmarks").split(","):
+        name = name.strip().lower()
+        if name == "benchmarks":
+            exporters.append(BenchmarkExporter())
+        elif name == "otlp_file":
+            exporters.append(
+                OTLPFileExporter(os.getenv("TRACE_OTLP_FILE", "logs/traces.otlp.jsonl"))
+            )
+        elif name:
+            raise ValueError(f"Unknown trace exporter: {name}")
+    return exporters
+
+
+class Tracer:
+    """Creates spans and exports finished traces.
+
+    With memory profiling on (MEMORY_PROFILING=true) tracemalloc runs for
+    the whole process and every span records the peak traced memory above
+    its starting level (memory_peak_bytes) and its net change
+    (memory_delta_bytes). tracemalloc is process wide, so spans running
+    concurrently on other threads are included in each other's figures.
+    Every span start resets tracemalloc's peak, so the peak reached so far
+    is first folded into every open span, on any thread.
+    """
+
+    def __init__(
+        self,
+        exporters: list[SpanExporter] | None = None,
+        memory_profiling: bool | None = None,
+    ):
+        self.exporters = _exporters_from_env() if exporters is None else exporters
+        self.memory_profiling = (
+            os.getenv("MEMORY_PROFILING", "false").lower() in ("1", "true", "yes")
+            if memory_profiling is None
+            else memory_profiling
+        )
+        if self.memory_profiling and not tracemalloc.is_tracing():
+            tracemalloc.start(int(os.getenv("MEMORY_PROFILING_FRAMES", "1")))
+        self.logger = logging.getLogger(__name__)
+        self._current: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+            "current_span", default=None
+        )
+        self._memory_lock = threading.Lock()
+        # Memory-profiled spans not yet finished, by span_id
+        self._open_memory_spans: dict[str, Span] = {}
+
+    def _start_memory(self, span: Span) -> None:
+        with self._memory_lock:
+            current, peak = tracemalloc.get_traced_memory()
+            # Resetting the peak for this span would lose what every open span
+            # (parents and spans on other threads) has reached so far
+            for open_span in self._open_memory_spans.values():
+                open_span._memory[1] = max(open_span._memory[1], peak)
+            tracemalloc.reset_peak()
+            span._memory = [current, current]
+            self._open_memory_spans[span.span_id] = span
+
+    def _finish_memory(self, span: Span) -> None:
+        if span._memory is None:
+            return
+        with self._memory_lock:
+            self._open_memory_spans.pop(span.span_id, None)
+            current, peak = tracemalloc.get_traced_memory()
+            start, running_peak = span._memory
+            span._memory[1] = max(running_peak, peak)
+            span.set_attributes(
+                memory_peak_bytes=span._memory[1] - start,
+                memory_delta_bytes=current - start,
+            )
+
+    def current_span(self) -> Span | None:
+        return self._current.get()
+
+    def _new_span(self, name: str, start_ns: int, attributes: dict[str, Any]) -> Span:
+        parent = self._current.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=start_ns,
+            attributes=dict(attributes),
+        )
+        if parent is not None:
+            parent._add_child(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time a block as a child of the current span."""
+        span = self._new_span(name, time.time_ns(), attributes)
+        if self.memory_profiling:
+            self._start_memory(span)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            self._current.reset(token)
+            if self.memory_profiling:
+                self._finish_memory(span)
+            if span.parent_id is None:
+                self._export(span)
+
+    def record_span(
+        self, name: str, start_ns: int, end_ns: int, **attributes: Any
+    ) -> Span:
+        """Attach an already-timed span (e.g. work done on other threads)."""
+        span = self._new_span(name, start_ns, attributes)
+        span.end_ns = end_ns
+        if span.parent_id is None:
+            self._export(span)
+        return span
+
+    def _export(self, root: Span) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(root)
+            except Exception as e:
+                self.logger.warning(f"Failed to export trace {root.trace_id}: {e}")
+
+
+_tracer: Tracer | None = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer, configured from the environment."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def span(name: str, **attributes: Any):
+    """Open a span on the process-wide tracer."""
+    return get_tracer().span(name, **attributes)
+
+
+def current_span() -> Span | None:
+    return get_tracer().current_span()
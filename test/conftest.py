@@ -0,0 +1,75 @@
+import secrets
+
+import pytest
+from sqlalchemy import delete, text
+from sqlalchemy.exc import OperationalError
+
+
+class Sessions:
+    """Opens sessions for a test and rolls back whatever they left open."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._opened = []
+
+    def __call__(self):
+        session = self._factory()
+        self._opened.append(session)
+        return session
+
+    def commit(self, work):
+        """Run work(session) in a new session, commit and return its result."""
+        session = self()
+        result = work(session)
+        session.commit()
+        return result
+
+    def close(self):
+        while self._opened:
+            session = self._opened.pop()
+            session.rollback()
+            session.close()
+
+
+@pytest.fixture
+def sessions():
+    """Sessions on the configured database; skips when it is unreachable."""
+    from repository.database import get_engine, get_session
+
+    try:
+        with get_engine().connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("Postgres is not reachable")
+
+    opened = Sessions(get_session)
+    yield opened
+    opened.close()
+
+
+@pytest.fixture
+def unique_key(sessions):
+    """Makes keys for a column that only this test uses; their rows are deleted afterwards.
+
+    Rows holding the same key in any related columns are deleted too.
+    """
+    made = []
+
+    def make(column, *related):
+        key = f"test-{secrets.token_hex(4)}"
+        length = getattr(column.type, "length", None)
+        if length is not None and len(key) > length:
+            # Bare hex for short codes; no real region code is all hex digits
+            key = secrets.token_hex(length)[:length]
+        made.extend((each, key) for each in (column, *related))
+        return key
+
+    yield make
+    # Release locks the test left behind before cleaning up
+    sessions.close()
+    sessions.commit(
+        lambda session: [
+            session.execute(delete(column.class_).where(column == key))
+            for column, key in made
+        ]
+    )
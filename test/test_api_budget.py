@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from models.models import ApiBudgetBucket
+from repository.api_budget_repository import ApiBudgetRepository
+from utils.api_budget import ApiBudget
+
+
+@pytest.fixture
+def bucket(unique_key):
+    return unique_key(ApiBudgetBucket.name)
+
+
+def take(
+    sessions, bucket: str, floor: float = 0.0, count: int = 1
+) -> tuple[int, float]:
+    return sessions.commit(
+        lambda s: ApiBudgetRepository(s).take(bucket, 0.01, 3, floor, count)
+    )
+
+
+def budget(bucket: str, **kwargs) -> ApiBudget:
+    kwargs = {"burst": 2, "reserved": 0, "lease": 1, **kwargs}
+    return ApiBudget(requests_per_second=10, shared=True, bucket=bucket, **kwargs)
+
+
+def test_shared_bucket_holds_the_burst_then_runs_dry(sessions, bucket):
+    assert [take(sessions, bucket) for _ in range(3)] == [(1, 0.0)] * 3
+    taken, shortfall = take(sessions, bucket)
+    assert taken == 0
+    assert shortfall > 0.99
+
+
+def test_background_floor_keeps_tokens_back(sessions, bucket):
+    assert take(sessions, bucket, floor=2) == (1, 0.0)
+    assert take(sessions, bucket, floor=2)[0] == 0
+    assert take(sessions, bucket) == (1, 0.0)
+
+
+def test_batch_takes_what_is_left_above_the_floor(sessions, bucket):
+    assert take(sessions, bucket, floor=1, count=5) == (2, 0.0)
+    assert take(sessions, bucket, count=5) == (1, 0.0)
+
+
+def test_processes_draw_from_one_shared_budget(sessions, bucket):
+    first = budget(bucket)
+    second = budget(bucket)
+
+    first.acquire()
+    first.acquire()
+    # A bucket of its own would still be full
+    assert second.acquire() >= 0.05
+
+
+def test_leased_tokens_are_spent_without_a_round_trip(sessions, bucket, monkeypatch):
+    shared = budget(bucket, burst=5, lease=5)
+    round_trips = []
+    take_shared = shared._take_shared
+    monkeypatch.setattr(
+        shared,
+        "_take_shared",
+        lambda floor: round_trips.append(floor) or take_shared(floor),
+    )
+
+    for _ in range(5):
+        assert shared.acquire() < 0.05
+    assert round_trips == [0.0]
+
+
+def test_database_round_trip_does_not_hold_the_budget(bucket, monkeypatch):
+    shared = budget(bucket)
+    in_flight = threading.Event()
+    release = threading.Event()
+
+    def slow_take_shared(floor):
+        in_flight.set()
+        release.wait(5)
+        return 1, 0.0
+
+    monkeypatch.setattr(shared, "_take_shared", slow_take_shared)
+    leasing = threading.Thread(target=shared.acquire)
+    leasing.start()
+    try:
+        assert in_flight.wait(5)
+        assert shared._condition.acquire(timeout=1)
+        shared._condition.release()
+    finally:
+        release.set()
+        leasing.join(5)
+    assert not leasing.is_alive()
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from analytics import arbitrage
+from analytics.arbitrage import ArbitrageScanner
+from models.models import ArbitrageScan, SnapshotCatalog
+from repository.snapshot_catalog_repository import SnapshotCatalogRepository
+
+FIRST_SNAPSHOT = datetime(2026, 10, 1, 12, 0)
+
+
+class FakeTokenPrices:
+    def __init__(self, session, region):
+        pass
+
+    def get_latest(self):
+        return SimpleNamespace(price=3_000_000_000)
+
+
+@pytest.fixture
+def regions(unique_key, monkeypatch):
+    monkeypatch.setattr(arbitrage, "TokenPriceRepository", FakeTokenPrices)
+    return [unique_key(SnapshotCatalog.region, ArbitrageScan.region) for _ in range(2)]
+
+
+def record_snapshot(sessions, region: str, snapshot_time: datetime) -> None:
+    sessions.commit(
+        lambda s: SnapshotCatalogRepository(s).record_snapshot(
+            region, snapshot_time, None, row_count=0, item_count=0
+        )
+    )
+
+
+def test_scan_that_finds_nothing_still_gates_the_next_one(sessions, regions):
+    scanner = ArbitrageScanner()
+    first, second = regions
+    for region in regions:
+        record_snapshot(sessions, region, FIRST_SNAPSHOT)
+    assert scanner.regions_behind(sessions(), regions) == []
+
+    # No prices for these regions, so the scan writes no opportunities
+    assert sessions.commit(lambda s: scanner.scan(s, regions)) == 0
+    assert scanner.regions_behind(sessions(), regions) == regions
+
+    record_snapshot(sessions, first, FIRST_SNAPSHOT + timedelta(hours=1))
+    assert scanner.regions_behind(sessions(), regions) == [second]
+
+    record_snapshot(sessions, second, FIRST_SNAPSHOT + timedelta(hours=1, minutes=5))
+    assert scanner.regions_behind(sessions(), regions) == []
+
+
+def test_region_without_snapshots_is_behind(sessions, regions):
+    record_snapshot(sessions, regions[0], FIRST_SNAPSHOT)
+    assert ArbitrageScanner().regions_behind(sessions(), regions) == [regions[1]]
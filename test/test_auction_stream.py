@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from utils.auction_stream import AuctionStreamSplitter
+
+
+def commodities_document(count=500):
+    return {
+        "_links": {
+            "self": {
+                "href": "https://eu.api.blizzard.com/data/wow/auctions/commodities"
+            }
+        },
+        "auctions": [
+            {
+                "id": 1000 + n,
+                "item": {"id": 200 + n % 37},
+                "quantity": n % 50 + 1,
+                "unit_price": 10000 + n * 7,
+                "time_left": "SHORT" if n % 3 else "VERY_LONG",
+            }
+            for n in range(count)
+        ],
+        "id": "eu-commodities",
+    }
+
+
+def split(payload: bytes, chunk_size: int) -> tuple[list[bytes], list[bytes]]:
+    """(batches cut while feeding, batches returned by finish)"""
+    splitter = AuctionStreamSplitter()
+    fed = []
+    for start in range(0, len(payload), chunk_size):
+        fed.extend(splitter.feed(payload[start : start + chunk_size]))
+    return fed, splitter.finish()
+
+
+def decoded(batches: list[bytes]) -> list[dict]:
+    return [
+        auction for batch in batches for auction in AuctionStreamSplitter.decode(batch)
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_compact_document_matches_json_loads(chunk_size):
+    payload = json.dumps(commodities_document(), separators=(",", ":")).encode()
+
+    fed, finished = split(payload, chunk_size)
+
+    assert decoded(fed + finished) == json.loads(payload)["auctions"]
+    if chunk_size < len(payload):
+        # Small chunks are cut into batches while the download is in progress
+        assert fed
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_non_compact_document_falls_back_to_whole_decode(chunk_size):
+    payload = json.dumps(commodities_document(), indent=2).encode()
+
+    fed, finished = split(payload, chunk_size)
+
+    assert fed == []
+    assert decoded(finished) == json.loads(payload)["auctions"]
+
+
+def test_spaced_auctions_key_is_found():
+    payload = json.dumps(commodities_document(50), separators=(", ", " : ")).encode()
+
+    fed, finished = split(payload, 7)
+
+    assert decoded(fed + finished) == json.loads(payload)["auctions"]
+
+
+@pytest.mark.parametrize(
+    "document", [{"auctions": []}, {"id": "eu-commodities"}], ids=["empty", "missing"]
+)
+def test_document_without_auctions_yields_nothing(document):
+    payload = json.dumps(document, separators=(",", ":")).encode()
+
+    assert split(payload, 3) == ([], [])
@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+
+from analytics.backtest import Backtester, FlipStrategy, PriceHistory
+
+CUT = 0.05
+KEEP = 1 - CUT
+
+
+def history(prices, quantities, sales) -> PriceHistory:
+    """One column per item, one row per snapshot."""
+    prices = np.array(prices, dtype=np.float64)
+    item_ids = list(range(1, prices.shape[1] + 1))
+    built = PriceHistory.allocate(item_ids, list(range(prices.shape[0])))
+    built.prices[:] = prices
+    built.quantities[:] = quantities
+    built.sales[:] = sales
+    return built
+
+
+def test_items_trade_independently_in_one_sweep():
+    nan = math.nan
+    result = Backtester(auction_house_cut=CUT).run(
+        history(
+            # Item 1 dips then recovers, item 2 dips at the end, item 3 is
+            # listed once, item 4 never dips
+            prices=[
+                [100, 100, 100, 100],
+                [80, 100, nan, 100],
+                [100, 70, nan, 101],
+            ],
+            quantities=[[400, 8, 0, 400]] * 3,
+            sales=[[1000, 0, 0, 1000]] * 3,
+        ),
+        FlipStrategy(ema_snapshots=1),
+    )
+
+    by_item = {item.item_id: item for item in result.items}
+    assert sorted(by_item) == [1, 2]
+
+    flipped = by_item[1]
+    assert (flipped.buys, flipped.sells, flipped.final_inventory) == (1, 1, 0)
+    assert flipped.pnl == -100 * 80 + 100 * 100 * KEEP
+    # Bought at 80, marked at 80 after the cut
+    assert flipped.max_drawdown == 100 * 80 - 100 * 80 * KEEP
+
+    held = by_item[2]
+    assert (held.buys, held.sells, held.final_inventory) == (1, 0, 2)
+    assert held.pnl == -2 * 70 + 2 * 70 * KEEP
+
+
+def test_unsold_stock_is_sold_once_the_hold_expires():
+    result = Backtester(auction_house_cut=CUT).run(
+        history(
+            prices=[[100], [80], [80], [80]],
+            quantities=[[400]] * 4,
+            sales=[[0], [0], [0], [1000]],
+        ),
+        FlipStrategy(ema_snapshots=1, max_hold_snapshots=2),
+    )
+
+    [item] = result.items
+    assert (item.buys, item.sells, item.final_inventory) == (1, 1, 0)
+    assert item.pnl == -100 * 80 + 100 * 80 * KEEP
@@ -0,0 +1,59 @@
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from jobs import handlers
+
+LATEST = datetime(2026, 10, 1, 12, 0)
+
+
+class FakeCatalog:
+    def __init__(self, session):
+        pass
+
+    def get_latest(self, region):
+        return SimpleNamespace(snapshot_time=LATEST)
+
+    def get_between(self, region, start, end):
+        return [
+            SimpleNamespace(snapshot_time=datetime(2026, 10, 1, hour))
+            for hour in (10, 11, 12)
+        ]
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    monkeypatch.setattr(handlers, "SnapshotCatalogRepository", FakeCatalog)
+
+
+def test_recompute_stats_leaves_the_latest_snapshot_alone(catalog, monkeypatch):
+    def collector(*args):
+        raise AssertionError("the latest snapshot must not be recomputed")
+
+    monkeypatch.setattr(handlers, "AuctionCollector", collector)
+    session = MagicMock()
+
+    handlers.recompute_stats(
+        session,
+        {"region": "eu", "snapshot_time": LATEST.replace(tzinfo=UTC).isoformat()},
+    )
+
+    session.execute.assert_not_called()
+
+
+def test_stats_backfill_skips_the_latest_snapshot(catalog, monkeypatch):
+    queued = []
+    repository = MagicMock()
+    repository.enqueue.side_effect = lambda job_type, payload, **kwargs: queued.append(
+        payload["snapshot_time"]
+    )
+    monkeypatch.setattr(handlers, "JobRepository", lambda session: repository)
+
+    handlers.enqueue_stats_backfill(MagicMock(), "eu", LATEST, LATEST)
+
+    assert queued == [
+        "2026-10-01T10:00:00+00:00",
+        "2026-10-01T11:00:00+00:00",
+    ]
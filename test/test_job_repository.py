@@ -0,0 +1,117 @@
+import time
+
+import pytest
+from sqlalchemy import select, text
+
+from models.models import Job
+from repository.job_repository import JobRepository
+
+
+@pytest.fixture
+def job_type(unique_key):
+    # Jobs of a type unique to the test, so other rows in the queue never interfere
+    return unique_key(Job.job_type)
+
+
+def enqueue(sessions, job_type: str, **kwargs) -> int | None:
+    return sessions.commit(lambda s: JobRepository(s).enqueue(job_type, {}, **kwargs))
+
+
+def status(sessions, job_id: int) -> str:
+    return sessions().execute(select(Job.status).where(Job.id == job_id)).scalar_one()
+
+
+def test_queued_job_is_deduplicated_by_key(sessions, job_type):
+    key = f"{job_type}:key"
+    first = enqueue(sessions, job_type, dedupe_key=key)
+    assert first is not None
+    assert enqueue(sessions, job_type, dedupe_key=key) is None
+
+    session = sessions()
+    assert JobRepository(session).claim("worker", 60, [job_type]).id == first
+    session.commit()
+
+    # Only queued jobs count, so the key is free again once the job runs
+    assert enqueue(sessions, job_type, dedupe_key=key) not in (None, first)
+
+
+def test_concurrent_claims_skip_locked_jobs(sessions, job_type):
+    first = enqueue(sessions, job_type, priority=1)
+    second = enqueue(sessions, job_type, priority=2)
+
+    worker_a = sessions()
+    claimed_a = JobRepository(worker_a).claim("a", 60, [job_type])
+    assert claimed_a.id == first
+
+    # While a's claim is uncommitted, b gets the next job instead of waiting
+    worker_b = sessions()
+    worker_b.execute(text("SET LOCAL lock_timeout = '200ms'"))
+    claimed_b = JobRepository(worker_b).claim("b", 60, [job_type])
+    assert claimed_b.id == second
+
+    worker_c = sessions()
+    worker_c.execute(text("SET LOCAL lock_timeout = '200ms'"))
+    assert JobRepository(worker_c).claim("c", 60, [job_type]) is None
+
+    worker_a.commit()
+    worker_b.commit()
+    assert status(sessions, first) == status(sessions, second) == "running"
+
+
+def test_claim_holds_back_delayed_jobs(sessions, job_type):
+    enqueue(sessions, job_type, delay_seconds=60)
+    assert JobRepository(sessions()).claim("worker", 60, [job_type]) is None
+
+
+def test_expired_lease_returns_the_job_to_the_queue(sessions, job_type):
+    job_id = enqueue(sessions, job_type, max_attempts=2)
+    session = sessions()
+    repository = JobRepository(session)
+    assert repository.claim("a", 0.2, [job_type]).attempts == 1
+    session.commit()
+
+    time.sleep(0.4)
+    assert repository.requeue_expired() >= 1
+    session.commit()
+    assert status(sessions, job_id) == "queued"
+    # The worker that lost the lease can no longer settle the job
+    assert not repository.complete(job_id, "a")
+
+    claimed = repository.claim("b", 0.2, [job_type])
+    assert (claimed.id, claimed.attempts) == (job_id, 2)
+    session.commit()
+
+    time.sleep(0.4)
+    repository.requeue_expired()
+    session.commit()
+    assert status(sessions, job_id) == "failed"
+
+
+def test_retry_is_superseded_by_a_newer_queued_copy(sessions, job_type):
+    key = f"{job_type}:key"
+    job_id = enqueue(sessions, job_type, dedupe_key=key)
+    session = sessions()
+    repository = JobRepository(session)
+    repository.claim("a", 60, [job_type])
+    session.commit()
+
+    newer = enqueue(sessions, job_type, dedupe_key=key)
+    assert repository.fail(job_id, "a", "boom", retry_delay_seconds=0)
+    session.commit()
+
+    assert status(sessions, job_id) == "superseded"
+    assert status(sessions, newer) == "queued"
+
+
+def test_has_running_only_counts_live_leases(sessions, job_type):
+    enqueue(sessions, job_type)
+    session = sessions()
+    repository = JobRepository(session)
+    assert not repository.has_running(job_type)
+
+    repository.claim("a", 0.2, [job_type])
+    session.commit()
+    assert repository.has_running(job_type)
+
+    time.sleep(0.4)
+    assert not JobRepository(sessions()).has_running(job_type)
@@ -0,0 +1,97 @@
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from jobs import worker as worker_module
+from jobs.handlers import job_may_continue
+from jobs.worker import JobWorker
+
+
+class FakeJobRepository:
+    """Hands out one job, then nothing; complete() fails like a dropped connection."""
+
+    jobs = []
+    completed = []
+    lease_held = True
+
+    def __init__(self, session):
+        pass
+
+    def requeue_expired(self):
+        return 0
+
+    def purge_finished(self, older_than_days):
+        return 0
+
+    def claim(self, worker_id, lease_seconds, job_types):
+        return self.jobs.pop() if self.jobs else None
+
+    def extend_lease(self, job_id, worker_id, lease_seconds):
+        return self.lease_held
+
+    def complete(self, job_id, worker_id):
+        self.completed.append(job_id)
+        raise ConnectionError("server closed the connection unexpectedly")
+
+
+@contextmanager
+def fake_session():
+    yield MagicMock()
+
+
+@contextmanager
+def no_span(name, **attributes):
+    yield None
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    ran = []
+    FakeJobRepository.jobs = [
+        SimpleNamespace(id=1, job_type="test", payload={}, attempts=1, max_attempts=3)
+    ]
+    FakeJobRepository.completed = []
+    FakeJobRepository.lease_held = True
+    monkeypatch.setattr(worker_module, "JobRepository", FakeJobRepository)
+    monkeypatch.setattr(worker_module, "db_session", fake_session)
+    monkeypatch.setattr(worker_module, "span", no_span)
+    monkeypatch.setitem(
+        worker_module.JOB_HANDLERS, "test", lambda session, payload: ran.append(payload)
+    )
+    monkeypatch.setenv("JOB_POLL_SECONDS", "0.01")
+    monkeypatch.setenv("JOB_LEASE_SECONDS", "0.3")
+
+    job_worker = JobWorker(worker_id="test")
+    job_worker.ran = ran
+    # Stop as soon as the queue is empty
+    monkeypatch.setattr(job_worker, "_wait_for_jobs", job_worker.stop)
+    monkeypatch.setattr(job_worker, "_close_listener", lambda: None)
+    return job_worker
+
+
+def test_worker_survives_a_failure_to_record_the_outcome(worker):
+    worker.run()
+
+    assert worker.ran == [{}]
+    assert FakeJobRepository.completed == [1]
+
+
+def test_handler_is_told_to_stop_once_the_lease_is_lost(worker, monkeypatch):
+    FakeJobRepository.lease_held = False
+    answers = []
+
+    def long_handler(session, payload):
+        deadline = time.monotonic() + 5
+        while job_may_continue.get()() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        answers.append(job_may_continue.get()())
+
+    monkeypatch.setitem(worker_module.JOB_HANDLERS, "test", long_handler)
+    worker.run()
+
+    assert answers == [False]
+    # Outside a job nothing asks handlers to stop
+    assert job_may_continue.get()()
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.models import LatestCommodityPrice
+from repository.latest_price_repository import LatestPriceRepository
+
+FIRST_SNAPSHOT = datetime(2026, 10, 1, 12, 0)
+
+
+@pytest.fixture
+def region(unique_key):
+    return unique_key(LatestCommodityPrice.region)
+
+
+def stats(snapshot_time: datetime, prices: dict[int, int]) -> list[dict]:
+    return [
+        {"item_id": item_id, "timestamp": snapshot_time, "min_price": price}
+        for item_id, price in prices.items()
+    ]
+
+
+def upsert(sessions, region: str, stats_values: list[dict]) -> None:
+    sessions.commit(
+        lambda s: LatestPriceRepository(s).upsert_stats(region, stats_values)
+    )
+
+
+def test_items_missing_from_the_new_snapshot_are_removed(sessions, region):
+    upsert(sessions, region, stats(FIRST_SNAPSHOT, {1: 100, 2: 200}))
+    upsert(sessions, region, stats(FIRST_SNAPSHOT + timedelta(hours=1), {1: 110}))
+
+    repository = LatestPriceRepository(sessions())
+    assert repository.get_price_map(region) == {1: 110}
+    assert repository.get_latest_price(region, 2) is None
+    row = repository.get_latest_price(region, 1)
+    assert (row.previous_min_price, row.min_price_change) == (100, 10)
+
+
+def test_empty_snapshot_keeps_the_last_known_market(sessions, region):
+    upsert(sessions, region, stats(FIRST_SNAPSHOT, {1: 100, 2: 200}))
+    upsert(sessions, region, [])
+
+    assert LatestPriceRepository(sessions()).get_price_map(region) == {1: 100, 2: 200}
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models.models import SchedulerLease
+from repository.lease_repository import LeaseRepository
+from scraper.leases import LeaseLostError, LeaseManager
+
+TTL_SECONDS = 0.5
+
+
+@pytest.fixture
+def lease_name(unique_key):
+    return unique_key(SchedulerLease.name)
+
+
+def acquire(sessions, name: str, holder: str, ttl_seconds: float = TTL_SECONDS) -> bool:
+    return sessions.commit(
+        lambda s: LeaseRepository(s).try_acquire(name, holder, ttl_seconds)
+    )
+
+
+def test_lease_is_exclusive_until_it_expires(sessions, lease_name):
+    assert acquire(sessions, lease_name, "a")
+    assert not acquire(sessions, lease_name, "b")
+    # The holder renews its own lease
+    assert acquire(sessions, lease_name, "a")
+
+    time.sleep(TTL_SECONDS + 0.2)
+    assert acquire(sessions, lease_name, "b")
+    assert not acquire(sessions, lease_name, "a")
+
+
+def test_released_lease_is_free_at_once(sessions, lease_name):
+    assert acquire(sessions, lease_name, "a", ttl_seconds=60)
+    sessions.commit(lambda s: LeaseRepository(s).release(lease_name, "a"))
+
+    assert acquire(sessions, lease_name, "b", ttl_seconds=60)
+
+
+def test_fence_rejects_a_replica_whose_lease_was_taken_over(sessions, lease_name):
+    manager = LeaseManager(
+        [], replica_id="a", ttl_seconds=TTL_SECONDS, renew_seconds=0.1
+    )
+    assert manager._try_acquire(sessions(), lease_name)
+    owner = sessions()
+    manager.fence(owner, lease_name)
+    owner.commit()
+
+    time.sleep(TTL_SECONDS + 0.2)
+    assert acquire(sessions, lease_name, "b")
+
+    assert not manager.owns(lease_name)
+    with pytest.raises(LeaseLostError):
+        manager.fence(sessions(), lease_name)
+
+
+def test_fence_holds_off_takeover_until_the_transaction_ends(sessions, lease_name):
+    manager = LeaseManager(
+        [], replica_id="a", ttl_seconds=TTL_SECONDS, renew_seconds=0.1
+    )
+    assert manager._try_acquire(sessions(), lease_name)
+    owner = sessions()
+    manager.fence(owner, lease_name)
+
+    time.sleep(TTL_SECONDS + 0.2)
+    contender = sessions()
+    contender.execute(text("SET LOCAL lock_timeout = '200ms'"))
+    with pytest.raises(OperationalError, match="lock timeout"):
+        LeaseRepository(contender).try_acquire(lease_name, "b", TTL_SECONDS)
+    contender.rollback()
+
+    owner.commit()
+    assert acquire(sessions, lease_name, "b")
@@ -0,0 +1,134 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from utils.pipeline import Pipeline
+
+
+def test_items_flow_through_every_stage():
+    results = []
+    lock = threading.Lock()
+
+    def collect(item):
+        with lock:
+            results.append(item)
+
+    pipeline = (
+        Pipeline("test")
+        .add_stage("double", lambda n: [n * 2], workers=2)
+        .add_stage("split", lambda n: [n, n + 1], workers=3)
+        .add_stage("collect", collect)
+    )
+    pipeline.run(range(100))
+
+    assert sorted(results) == sorted(v for n in range(100) for v in (n * 2, n * 2 + 1))
+    summary = pipeline.stage_summary()
+    assert [summary[name]["items"] for name in ("double", "split", "collect")] == [
+        100,
+        100,
+        200,
+    ]
+    assert pipeline.source_items == 100
+
+
+def test_done_reaches_every_worker_of_a_wider_stage():
+    # One upstream worker must close the input of all downstream workers,
+    # otherwise run() never returns
+    seen = []
+    pipeline = (
+        Pipeline("fan-out")
+        .add_stage("source", lambda n: [n])
+        .add_stage("wide", lambda n: seen.append(n), workers=4)
+    )
+    pipeline.run(range(10))
+
+    assert sorted(seen) == list(range(10))
+
+
+def test_finish_callback_emits_after_the_last_item():
+    received = []
+    batch = []
+
+    def accumulate(n):
+        batch.append(n)
+
+    def flush():
+        yield sum(batch)
+
+    pipeline = (
+        Pipeline("finish")
+        .add_stage("accumulate", accumulate, finish=flush)
+        .add_stage("sink", received.append)
+    )
+    pipeline.run(range(10))
+
+    assert received == [45]
+
+
+def test_finish_requires_a_single_worker():
+    with pytest.raises(ValueError):
+        Pipeline("finish").add_stage("accumulate", print, workers=2, finish=list)
+
+
+def test_stage_error_aborts_the_run_and_is_reraised():
+    processed = []
+
+    def explode(n):
+        if n == 5:
+            raise RuntimeError("bad item")
+        return [n]
+
+    pipeline = (
+        Pipeline("abort")
+        .add_stage("explode", explode, workers=2)
+        .add_stage("sink", processed.append)
+    )
+    # The source never ends, so run() only returns because the error aborts it
+    with pytest.raises(RuntimeError, match="bad item"):
+        pipeline.run(itertools.count())
+
+    assert 5 not in processed
+
+
+def test_finish_error_is_reraised():
+    def fail():
+        raise KeyError("tail")
+
+    pipeline = Pipeline("finish-error").add_stage(
+        "accumulate", lambda n: None, finish=fail
+    )
+
+    with pytest.raises(KeyError):
+        pipeline.run(range(3))
+
+
+def test_source_error_is_reraised():
+    def source():
+        yield 1
+        raise OSError("connection reset")
+
+    pipeline = Pipeline("source-error").add_stage("sink", lambda n: None)
+
+    with pytest.raises(OSError, match="connection reset"):
+        pipeline.run(source())
+
+
+def test_busy_time_excludes_backpressure_from_the_next_stage():
+    def produce(n):
+        # Lazy output: the work happens while the generator is iterated
+        time.sleep(0.001)
+        yield n
+
+    pipeline = (
+        Pipeline("backpressure")
+        .add_stage("fast", produce, queue_size=1)
+        .add_stage("slow", lambda n: time.sleep(0.02), queue_size=1)
+    )
+    pipeline.run(range(20))
+
+    summary = pipeline.stage_summary()
+    assert summary["slow"]["busy_seconds"] >= 0.3
+    # Blocked on the slow stage's full queue most of the run, but busy ~20 ms
+    assert 0.015 <= summary["fast"]["busy_seconds"] < 0.15
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from analytics.quantile_sketch import DEFAULT_COMPRESSION, TDigest, merge_sketches
+
+
+def exact_quantile(pairs, q):
+    """Smallest value whose cumulative weight reaches q of the total."""
+    pairs = sorted(pairs)
+    target = q * sum(weight for _, weight in pairs)
+    cumulative = 0.0
+    for value, weight in pairs:
+        cumulative += weight
+        if cumulative >= target:
+            return value
+    return pairs[-1][0]
+
+
+def snapshot_listings(rng, count=300):
+    return [
+        (round(rng.lognormvariate(10, 0.5)), rng.randint(1, 200)) for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize(
+    ("q", "tolerance"),
+    [(0.01, 0.05), (0.05, 0.02), (0.5, 0.01), (0.95, 0.02), (0.99, 0.05)],
+)
+def test_merged_digest_matches_exact_quantiles(seed, q, tolerance):
+    rng = random.Random(seed)
+    snapshots = [snapshot_listings(rng) for _ in range(48)]
+    digest = merge_sketches(
+        TDigest.from_weighted(pairs).to_bytes() for pairs in snapshots
+    )
+
+    exact = exact_quantile([pair for pairs in snapshots for pair in pairs], q)
+    assert digest.quantile(q) == pytest.approx(exact, rel=tolerance)
+
+
+def test_compression_bounds_centroid_count():
+    rng = random.Random(7)
+    first = TDigest.from_weighted(snapshot_listings(rng, 5000))
+    second = TDigest.from_weighted(snapshot_listings(rng, 5000))
+    merged = TDigest.merge([first, second])
+
+    for sketch in (first, second, merged):
+        assert DEFAULT_COMPRESSION / 2 <= len(sketch) <= 2 * DEFAULT_COMPRESSION
+    assert merged.total_weight == pytest.approx(
+        first.total_weight + second.total_weight
+    )
+
+
+def test_round_trip_keeps_centroids():
+    digest = TDigest.from_weighted(snapshot_listings(random.Random(3)))
+    restored = TDigest.from_bytes(digest.to_bytes())
+
+    assert restored.compression == digest.compression
+    assert restored.weights == [round(weight) for weight in digest.weights]
+    assert restored.means == pytest.approx(digest.means, rel=1e-6)
@@ -0,0 +1,53 @@
+import pytest
+
+from models.models import SeederStatus
+from seeding.seeder import Seeder, SeedingAborted
+
+
+class ChunkSeeder(Seeder):
+    """Seeds numbered chunks, checkpointing after each like the real seeders."""
+
+    chunks = 5
+
+    def seed(self, session):
+        done = self.load_progress(session).get("chunks", 0)
+        for chunk in range(done, self.chunks):
+            self.ensure_may_continue()
+            self.save_progress(session, {"chunks": chunk + 1})
+            session.commit()
+
+
+@pytest.fixture
+def seeder_type(unique_key, monkeypatch):
+    monkeypatch.setenv("BLIZZARD_API_CLIENT_ID", "id")
+    monkeypatch.setenv("BLIZZARD_API_CLIENT_SECRET", "secret")
+    return unique_key(SeederStatus.seeder_type)
+
+
+def make_seeder(seeder_type, should_continue=None):
+    seeder = ChunkSeeder(should_continue=should_continue)
+    seeder.seeder_type = seeder_type
+    return seeder
+
+
+def test_seeder_stops_at_the_checkpoint_once_told_to(sessions, seeder_type):
+    # Ownership is lost while the third chunk is in flight, before its checkpoint
+    answers = iter([True, True, True, True, True, False])
+    seeder = make_seeder(seeder_type, lambda: next(answers))
+
+    session = sessions()
+    with pytest.raises(SeedingAborted):
+        seeder.seed(session)
+    session.rollback()
+
+    # The chunk whose checkpoint was refused is not committed
+    assert seeder.load_progress(sessions()) == {"chunks": 2}
+
+
+def test_new_owner_resumes_from_the_last_checkpoint(sessions, seeder_type):
+    stopped = make_seeder(seeder_type, lambda: False)
+    with pytest.raises(SeedingAborted):
+        stopped.seed(sessions())
+
+    make_seeder(seeder_type).seed(sessions())
+    assert make_seeder(seeder_type).load_progress(sessions()) == {"chunks": 5}
@@ -0,0 +1,50 @@
+import threading
+import tracemalloc
+
+import pytest
+
+from utils.tracing import Tracer
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def tracer():
+    already_tracing = tracemalloc.is_tracing()
+    yield Tracer(exporters=[], memory_profiling=True)
+    if not already_tracing:
+        tracemalloc.stop()
+
+
+def test_child_peak_is_folded_into_the_parent(tracer):
+    with tracer.span("parent") as parent:
+        with tracer.span("child") as child:
+            block = bytearray(8 * MB)
+            del block
+
+    assert child.attributes["memory_peak_bytes"] >= 8 * MB
+    assert parent.attributes["memory_peak_bytes"] >= 8 * MB
+
+
+def test_span_starting_on_another_thread_keeps_concurrent_peaks(tracer):
+    allocated = threading.Event()
+    other_started = threading.Event()
+    spans = {}
+
+    def worker():
+        with tracer.span("worker") as worker_span:
+            spans["worker"] = worker_span
+            block = bytearray(8 * MB)
+            del block
+            allocated.set()
+            # Another thread resets tracemalloc's peak before this span ends
+            other_started.wait(5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert allocated.wait(5)
+    with tracer.span("other"):
+        other_started.set()
+        thread.join(5)
+
+    assert spans["worker"].attributes["memory_peak_bytes"] >= 8 * MB